@@ -0,0 +1,67 @@
+import math
+import threading
+import time
+
+MAX_BUCKETS = 10000
+# Once over MAX_BUCKETS, idle buckets are swept at most this often (seconds)
+PRUNE_INTERVAL = 10.0
+
+
+def parse_rate(limit):
+    # "30/60" -> a bucket of 30 requests refilled at 30 per 60 seconds
+    count, _, seconds = limit.partition('/')
+    capacity = int(count)
+    return capacity, capacity / float(seconds or 1)
+
+
+def retry_after(seconds):
+    return str(max(1, math.ceil(seconds)))
+
+
+class TokenBucketLimiter:
+    # In-process token buckets, one per key. Each worker process keeps its own,
+    # so the effective limit scales with the number of workers.
+
+    def __init__(self, clock=time.monotonic, max_buckets=MAX_BUCKETS, prune_interval=PRUNE_INTERVAL):
+        self.clock = clock
+        self.max_buckets = max_buckets
+        self.prune_interval = prune_interval
+        self.pruned_at = clock()
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, key, capacity, refill_per_second):
+        # Returns 0 when a token was taken, otherwise the seconds until one is available
+        with self.lock:
+            now = self.clock()
+            tokens, updated, _, _ = self.buckets.get(key, (capacity, now, capacity, refill_per_second))
+            tokens = min(capacity, tokens + (now - updated) * refill_per_second)
+            taken = tokens >= 1
+            # Each bucket keeps its own rate, so a sweep judges it by the route that filled it
+            self.buckets[key] = (tokens - 1 if taken else tokens, now, capacity, refill_per_second)
+            if len(self.buckets) > self.max_buckets and now - self.pruned_at >= self.prune_interval:
+                self.prune(now)
+            return 0 if taken else (1 - tokens) / refill_per_second
+
+    def prune(self, now):
+        # Buckets that have refilled completely carry no state worth keeping
+        self.pruned_at = now
+        for key, (tokens, updated, capacity, refill_per_second) in list(self.buckets.items()):
+            if tokens + (now - updated) * refill_per_second >= capacity:
+                del self.buckets[key]
+
+    def reset(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class ConcurrencyLimiter:
+    def __init__(self, limit):
+        self.limit = limit
+        self.semaphore = threading.BoundedSemaphore(limit)
+
+    def try_acquire(self):
+        return self.semaphore.acquire(blocking=False)
+
+    def release(self):
+        self.semaphore.release()
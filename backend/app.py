@@ -1,10 +1,46 @@
 import os
-from flask import Flask, request, jsonify, session, Response
+import csv
+import json
+import math
+import time
+import uuid
+import hmac
+import functools
+import mimetypes
+import threading
+import click
+from io import BytesIO
+from collections import Counter
+from flask import Flask, request, jsonify, session, Response, g, make_response, render_template, stream_with_context, url_for
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
-from datetime import datetime
-from flask_babel import Babel, gettext as _
+from datetime import datetime, timedelta
+from flask_babel import Babel, get_locale, gettext as _, lazy_gettext as _l
+from markupsafe import Markup
 from sqlalchemy.dialects.mysql import LONGBLOB
+from sqlalchemy.orm import declared_attr
+from sqlalchemy.orm.exc import StaleDataError
+from imaging import PHOTO_VARIANT_WIDTHS, dhash, ingest_image, make_placeholder, resize_image, sniff_mimetype
+from dedup import BAND_COUNT, BKTree, band_neighbours, hamming, hash_bands
+from routing import READ_METHODS, RoutingSession
+from werkzeug.datastructures import FileStorage
+from werkzeug.middleware.proxy_fix import ProxyFix
+import chunked_uploads
+import listing_stats
+from mediators import group_listings, normalize_name, normalize_phone
+from features import parse_features
+import saved_searches
+from admission import ConcurrencyLimiter, TokenBucketLimiter, parse_rate, retry_after
+import compression
+import columnar
+import similarity
+import price_index
+import fragments
+import zipstream
+import locations
+import price_model
+import profiling
+from sqlalchemy import event
 
 app = Flask(__name__)
 app.config.from_object('config.Config')
@@ -12,17 +48,111 @@ app.config['SECRET_KEY'] = 'your-secret-key'
 app.config['BABEL_DEFAULT_LOCALE'] = 'en'
 app.config['BABEL_TRANSLATION_DIRECTORIES'] = os.path.join(app.root_path, 'translations')
 app.config['LANGUAGES'] = {'en': 'English', 'kn': 'Kannada', 'te': 'Telugu'}
+if app.config['TRUSTED_PROXY_COUNT']:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXY_COUNT'])
 
 def determine_locale():
+    # ?lang= gives every server-rendered page a crawlable URL per language
+    if request.args.get('lang') in app.config['LANGUAGES']:
+        return request.args['lang']
     if 'language' in session:
         return session['language']
     return request.accept_languages.best_match(['en', 'kn', 'te'])
 
 babel = Babel(app, locale_selector=determine_locale)
-db = SQLAlchemy(app)
+db = SQLAlchemy(app, session_options={'class_': RoutingSession})
 CORS(app)
 
-class Property(db.Model):
+@app.before_request
+def pin_recent_writers_to_primary():
+    g.pin_primary = session.get('primary_until', 0) > time.time()
+
+rate_limiter = TokenBucketLimiter()
+upload_slots = ConcurrencyLimiter(app.config['MAX_CONCURRENT_UPLOADS'])
+UPLOAD_ENDPOINTS = {'add_property', 'update_property', 'put_upload_chunk', 'finalize_upload'}
+
+@app.before_request
+def admit_request():
+    # Reject early, before the body is read or a DB connection is taken
+    if not app.config['RATELIMIT_ENABLED'] or app.testing or request.method == 'OPTIONS':
+        return None
+    limit = app.config['RATE_LIMITS'].get(request.endpoint)
+    if limit:
+        wait = rate_limiter.acquire((request.remote_addr, request.endpoint), *parse_rate(limit))
+        if wait:
+            response = jsonify({'error': 'Too many requests, please retry later'})
+            response.headers['Retry-After'] = retry_after(wait)
+            return response, 429
+    if request.endpoint in UPLOAD_ENDPOINTS:
+        if not upload_slots.try_acquire():
+            response = jsonify({'error': 'Too many uploads in progress, please retry shortly'})
+            response.headers['Retry-After'] = retry_after(1)
+            return response, 503
+        g.upload_slot = True
+    return None
+
+@app.teardown_request
+def release_upload_slot(exc):
+    if g.pop('upload_slot', False):
+        upload_slots.release()
+
+profiler = profiling.SamplingProfiler()
+memory_profile_lock = threading.Lock()
+
+@app.before_request
+def track_profiled_request():
+    if profiler.running:
+        profiler.track(request.endpoint)
+
+@app.teardown_request
+def untrack_profiled_request(exc):
+    if profiler.running:
+        profiler.untrack()
+
+@app.after_request
+def remember_write_for_replica_pinning(response):
+    if request.method not in READ_METHODS and response.status_code < 400 and app.config['SQLALCHEMY_BINDS']:
+        session['primary_until'] = time.time() + app.config['REPLICA_PIN_SECONDS']
+    return response
+
+@app.after_request
+def compress_response(response):
+    if (response.direct_passthrough or response.is_streamed or response.status_code in (204, 206, 304)
+            or 'Content-Encoding' in response.headers or not compression.is_compressible(response.mimetype)):
+        return response
+    body = response.get_data()
+    if len(body) < app.config['COMPRESS_MIN_SIZE']:
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = compression.choose_encoding(request.headers.get('Accept-Encoding'))
+    if encoding:
+        response.set_data(compression.compress(body, encoding, app.config['COMPRESS_GZIP_LEVEL'],
+                                               app.config['COMPRESS_BROTLI_LEVEL']))
+        response.headers['Content-Encoding'] = encoding
+        tag, weak = response.get_etag()
+        if tag and not weak:
+            response.set_etag(compression.encoded_etag(tag, encoding))
+    return response
+
+class Mediator(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=True, index=True)
+    phone = db.Column(db.String(20), nullable=True, unique=True)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+
+class FeatureTag(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False, unique=True)
+
+# Posting lists: the (tag_id, property_id) primary key lists every listing per tag
+property_feature = db.Table(
+    'property_feature',
+    db.Column('tag_id', db.Integer, db.ForeignKey('feature_tag.id'), primary_key=True),
+    db.Column('property_id', db.Integer, db.ForeignKey('property.id'), primary_key=True, index=True),
+)
+
+# Shared by the hot property table and its archive, so rows can be copied across column for column
+class ListingColumns:
     id = db.Column(db.Integer, primary_key=True)
     property_type = db.Column(db.String(50), nullable=False)
     address = db.Column(db.String(200), nullable=False)
@@ -36,36 +166,360 @@ class Property(db.Model):
     description = db.Column(db.Text, nullable=True)
     features = db.Column(db.Text, nullable=True)
     status = db.Column(db.String(50), nullable=False)
+    # Transliterated phonetic search keys (locations.search_key), set on every flush
+    city_key = db.Column(db.String(100), nullable=True)
+    locality_key = db.Column(db.String(100), nullable=True)
+    address_key = db.Column(db.String(200), nullable=True)
     mediator_name = db.Column(db.String(100), nullable=True)
     mediator_contact = db.Column(db.String(20), nullable=True)
     listing_date = db.Column(db.Date, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.now)
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+    deleted_at = db.Column(db.DateTime, nullable=True)
+    version = db.Column(db.Integer, nullable=False)
 
+    @declared_attr
+    def mediator_id(cls):
+        return db.Column(db.Integer, db.ForeignKey('mediator.id'), nullable=True, index=True)
+
+class Property(ListingColumns, db.Model):
     photos = db.relationship('PropertyPhoto', backref='property', lazy=True, cascade="all, delete-orphan")
+    mediator = db.relationship('Mediator')
+    feature_tags = db.relationship('FeatureTag', secondary=property_feature, lazy=True)
+
+    @declared_attr.directive
+    def __mapper_args__(cls):
+        return {'version_id_col': cls.__table__.c.version}
+
+    __table_args__ = (
+        db.Index('ix_property_active_created_at', 'deleted_at', 'created_at',
+                 sqlite_where=db.text('deleted_at IS NULL'), postgresql_where=db.text('deleted_at IS NULL')),
+        # Archived listings keep their ids, so they must never be handed out again
+        {'sqlite_autoincrement': True},
+    )
+
+def resolve_mediator(name, contact):
+    phone, clean_name = normalize_phone(contact), normalize_name(name)
+    if phone:
+        mediator = Mediator.query.filter_by(phone=phone).first()
+        if mediator is None:
+            mediator = Mediator(name=clean_name, phone=phone)
+            db.session.add(mediator)
+        elif mediator.name is None:
+            mediator.name = clean_name
+        return mediator
+    if clean_name:
+        candidates = Mediator.query.filter_by(name=clean_name).all()
+        name_only = [candidate for candidate in candidates if candidate.phone is None]
+        if name_only:
+            return name_only[0]
+        if len(candidates) == 1:
+            return candidates[0]
+        mediator = Mediator(name=clean_name)
+        db.session.add(mediator)
+        return mediator
+    return None
 
-class PropertyPhoto(db.Model):
+def sync_feature_tags(prop):
+    names = parse_features(prop.features)
+    tags = FeatureTag.query.filter(FeatureTag.name.in_(names)).all() if names else []
+    missing = set(names) - {tag.name for tag in tags}
+    for name in sorted(missing):
+        tag = FeatureTag(name=name)
+        db.session.add(tag)
+        tags.append(tag)
+    prop.feature_tags = tags
+
+def active_properties():
+    return Property.query.filter(Property.deleted_at.is_(None))
+
+class PhotoColumns:
     id = db.Column(db.Integer, primary_key=True)
-    property_id = db.Column(db.Integer, db.ForeignKey('property.id'), nullable=False)
-    image_data = db.Column(LONGBLOB, nullable=False)
     mimetype = db.Column(db.String(50), nullable=False)
+    placeholder = db.Column(db.Text, nullable=True)
+    width = db.Column(db.Integer, nullable=True)
+    height = db.Column(db.Integer, nullable=True)
+    orientation = db.Column(db.SmallInteger, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.now)
 
+    @declared_attr
+    def image_data(cls):
+        return db.deferred(db.Column(db.LargeBinary().with_variant(LONGBLOB(), 'mysql'), nullable=False))
+
+class PropertyPhoto(PhotoColumns, db.Model):
+    property_id = db.Column(db.Integer, db.ForeignKey('property.id'), nullable=False, index=True)
+    dhash = db.Column(db.String(16), nullable=True, index=True)
+    dhash_band_0 = db.Column(db.Integer, nullable=True, index=True)
+    dhash_band_1 = db.Column(db.Integer, nullable=True, index=True)
+    dhash_band_2 = db.Column(db.Integer, nullable=True, index=True)
+    dhash_band_3 = db.Column(db.Integer, nullable=True, index=True)
+
+    __table_args__ = ({'sqlite_autoincrement': True},)
+
+    def set_dhash(self, value):
+        self.dhash = f'{value:016x}' if value is not None else None
+        bands = hash_bands(value) if value is not None else [None] * BAND_COUNT
+        for band, band_value in enumerate(bands):
+            setattr(self, f'dhash_band_{band}', band_value)
+
+# Cold storage for listings that left the market. Rows keep their hot ids, so
+# photo URLs and /properties/<id> links stay valid after archiving.
+class ArchivedProperty(ListingColumns, db.Model):
+    archived_at = db.Column(db.DateTime, nullable=False, index=True)
+    photos = db.relationship('ArchivedPropertyPhoto', backref='property', lazy=True)
+    __table_args__ = (db.Index('ix_archived_property_created_at', 'created_at'),)
+
+class ArchivedPropertyPhoto(PhotoColumns, db.Model):
+    property_id = db.Column(db.Integer, db.ForeignKey('archived_property.id'), nullable=False, index=True)
+
+archived_property_feature = db.Table(
+    'archived_property_feature',
+    db.Column('tag_id', db.Integer, db.ForeignKey('feature_tag.id'), primary_key=True),
+    db.Column('property_id', db.Integer, db.ForeignKey('archived_property.id'), primary_key=True, index=True),
+)
+
+class UploadSession(db.Model):
+    id = db.Column(db.String(32), primary_key=True)
+    filename = db.Column(db.String(255), nullable=False)
+    mimetype = db.Column(db.String(50), nullable=False)
+    total_size = db.Column(db.BigInteger, nullable=False)
+    chunk_size = db.Column(db.Integer, nullable=False)
+    completed_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+
+    @property
+    def chunk_count(self):
+        return chunked_uploads.chunk_count(self.total_size, self.chunk_size)
+
+# Append-only change feed; the id doubles as the sequence number clients resume from.
+# Rows outlive their listing (purged or archived), and ids are never handed out again.
+class ListingChange(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    property_id = db.Column(db.Integer, nullable=False, index=True)
+    action = db.Column(db.String(10), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    property = db.relationship('Property', primaryjoin='foreign(ListingChange.property_id) == Property.id')
+
+    __table_args__ = ({'sqlite_autoincrement': True},)
+
+# Append-only; (property_id, changed_at) keeps each listing's history contiguous and in time order
+class PriceChange(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    property_id = db.Column(db.Integer, db.ForeignKey('property.id'), nullable=False)
+    price = db.Column(db.Float, nullable=True)
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    property = db.relationship('Property')
+    __table_args__ = (db.Index('ix_price_change_property_changed_at', 'property_id', 'changed_at'),)
+
+class ArchivedPriceChange(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    property_id = db.Column(db.Integer, db.ForeignKey('archived_property.id'), nullable=False)
+    price = db.Column(db.Float, nullable=True)
+    changed_at = db.Column(db.DateTime, nullable=False)
+    __table_args__ = (db.Index('ix_archived_price_change_property_changed_at', 'property_id', 'changed_at'),)
+
+# Monthly asking prices per locality, rebuilt by the build-price-index job
+class LocalityPriceIndex(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    city = db.Column(db.String(100), nullable=False)
+    locality = db.Column(db.String(100), nullable=False, default='')
+    period = db.Column(db.Date, nullable=False)
+    listing_count = db.Column(db.Integer, nullable=False, default=0)
+    price_sum = db.Column(db.Float, nullable=False, default=0.0)
+    price_per_sqft_count = db.Column(db.Integer, nullable=False, default=0)
+    price_per_sqft_sum = db.Column(db.Float, nullable=False, default=0.0)
+    __table_args__ = (db.UniqueConstraint('city', 'locality', 'period'),)
+
+class SavedSearch(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    email = db.Column(db.String(120), nullable=False, index=True)
+    criteria = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+
+# Each search is filed under the keys of its most selective dimension (see saved_searches.search_keys)
+saved_search_key = db.Table(
+    'saved_search_key',
+    db.Column('key', db.String(120), primary_key=True),
+    db.Column('saved_search_id', db.Integer, db.ForeignKey('saved_search.id'), primary_key=True, index=True),
+)
+
+# Outbox of alerts; a sender marks rows sent_at after delivering them
+class SavedSearchNotification(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    saved_search_id = db.Column(db.Integer, db.ForeignKey('saved_search.id'), nullable=False, index=True)
+    property_id = db.Column(db.Integer, db.ForeignKey('property.id'), nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    sent_at = db.Column(db.DateTime, nullable=True, index=True)
+    __table_args__ = (db.UniqueConstraint('saved_search_id', 'property_id'),)
+
+class StatsColumns:
+    listing_count = db.Column(db.Integer, nullable=False, default=0)
+    price_count = db.Column(db.Integer, nullable=False, default=0)
+    price_sum = db.Column(db.Float, nullable=False, default=0.0)
+    price_per_sqft_count = db.Column(db.Integer, nullable=False, default=0)
+    price_per_sqft_sum = db.Column(db.Float, nullable=False, default=0.0)
+    listed_on_count = db.Column(db.Integer, nullable=False, default=0)
+    listed_on_sum = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def totals(self):
+        return {column: getattr(self, column) for column in listing_stats.STAT_COLUMNS}
+
+class LocationStats(StatsColumns, db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    city = db.Column(db.String(100), nullable=False)
+    locality = db.Column(db.String(100), nullable=False, default='')
+
+    key_columns = ('city', 'locality')
+    __table_args__ = (db.UniqueConstraint('city', 'locality'),)
+
+class MediatorStats(StatsColumns, db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    mediator_name = db.Column(db.String(100), nullable=False, unique=True)
+
+    key_columns = ('mediator_name',)
+
+STATS_MODELS = {'location': LocationStats, 'mediator': MediatorStats}
+STATS_SOURCE_COLUMNS = ('city', 'locality', 'mediator_name', 'price', 'area_value', 'area_unit',
+                        'listing_date', 'created_at', 'deleted_at')
+
+def property_stat_values(prop, old=False):
+    state = db.inspect(prop)
+    values = {}
+    for column in STATS_SOURCE_COLUMNS:
+        history = state.attrs[column].history
+        if old and (history.added or history.deleted):
+            values[column] = history.deleted[0] if history.deleted else None
+        else:
+            values[column] = getattr(prop, column)
+    return values
+
+def add_stat_deltas(deltas, values, sign):
+    contribution = listing_stats.listing_contribution(values)
+    if contribution is None:
+        return
+    for key in listing_stats.stat_keys(values):
+        row = deltas.setdefault(key, dict.fromkeys(listing_stats.STAT_COLUMNS, 0))
+        for column, amount in contribution.items():
+            row[column] += sign * amount
+
+@event.listens_for(RoutingSession, 'before_flush')
+def maintain_location_keys(db_session, flush_context, instances):
+    with db_session.no_autoflush:
+        for prop in list(db_session.new) + list(db_session.dirty):
+            if isinstance(prop, Property) and (prop in db_session.new or db_session.is_modified(prop)):
+                set_location_keys(prop)
+
+def set_location_keys(prop):
+    for field in locations.LOCATION_FIELDS:
+        key = locations.search_key(field, getattr(prop, field))
+        if getattr(prop, f'{field}_key') != key:
+            setattr(prop, f'{field}_key', key)
+
+@event.listens_for(RoutingSession, 'before_flush')
+def maintain_listing_stats(db_session, flush_context, instances):
+    deltas = {}
+    with db_session.no_autoflush:
+        for prop in db_session.new:
+            if isinstance(prop, Property):
+                add_stat_deltas(deltas, property_stat_values(prop), 1)
+        for prop in db_session.dirty:
+            if isinstance(prop, Property) and db_session.is_modified(prop):
+                add_stat_deltas(deltas, property_stat_values(prop, old=True), -1)
+                add_stat_deltas(deltas, property_stat_values(prop), 1)
+        for prop in db_session.deleted:
+            if isinstance(prop, Property):
+                add_stat_deltas(deltas, property_stat_values(prop, old=True), -1)
+        apply_stat_deltas(db_session, deltas)
+
+def apply_stat_deltas(db_session, deltas):
+    for (kind, key), delta in deltas.items():
+        if not any(delta.values()):
+            continue
+        model = STATS_MODELS[kind]
+        stats = db_session.query(model).filter_by(**dict(zip(model.key_columns, key))).first()
+        if stats is None:
+            db_session.add(model(**dict(zip(model.key_columns, key)), **delta))
+            continue
+        for column, amount in delta.items():
+            if amount:
+                setattr(stats, column, getattr(model, column) + amount)
+
+listing_changed = threading.Condition()
+
+@event.listens_for(RoutingSession, 'before_flush')
+def record_listing_changes(db_session, flush_context, instances):
+    # The change rows are flushed with the listing itself, so they commit or roll back together
+    changes = []
+    with db_session.no_autoflush:
+        for prop in db_session.new:
+            if isinstance(prop, Property):
+                changes.append((prop, 'created'))
+        for prop in db_session.dirty:
+            if isinstance(prop, Property) and db_session.is_modified(prop):
+                deleted_history = db.inspect(prop).attrs.deleted_at.history
+                was_deleted = deleted_history.deleted and deleted_history.deleted[0] is None and prop.deleted_at is not None
+                changes.append((prop, 'deleted' if was_deleted else 'updated'))
+    for prop, action in changes:
+        db_session.add(ListingChange(property=prop, action=action))
+    if changes:
+        db_session.info['listing_changed'] = True
+
+@event.listens_for(RoutingSession, 'before_flush')
+def record_price_changes(db_session, flush_context, instances):
+    changes = []
+    with db_session.no_autoflush:
+        for prop in db_session.new:
+            if isinstance(prop, Property) and prop.price is not None:
+                changes.append(PriceChange(property=prop, price=prop.price, changed_at=prop.created_at or datetime.now()))
+        for prop in db_session.dirty:
+            if isinstance(prop, Property):
+                history = db.inspect(prop).attrs.price.history
+                if history.added and history.added != history.deleted:
+                    changes.append(PriceChange(property=prop, price=prop.price, changed_at=datetime.now()))
+    db_session.add_all(changes)
+
+@event.listens_for(RoutingSession, 'after_commit')
+def notify_listing_waiters(db_session):
+    if db_session.info.pop('listing_changed', False):
+        with listing_changed:
+            listing_changed.notify_all()
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def forget_listing_changes(db_session):
+    db_session.info.pop('listing_changed', None)
+
 def get_image_data_and_mimetype(file):
     try:
         file.seek(0)
         image_data = file.read()
-        mimetype = file.mimetype
+        # Never serve bytes under a type they are not; unknown content stays opaque
+        mimetype = sniff_mimetype(image_data) or 'application/octet-stream'
         return image_data, mimetype
     except Exception as e:
         print(f"Error reading file for DB storage: {e}")
         return None, None
 
+def photo_url(photo_id, variant=None):
+    url = f"{request.url_root.rstrip('/')}/property_photos/{photo_id}"
+    if variant:
+        url += f"?w={PHOTO_VARIANT_WIDTHS[variant]}"
+    return url
+
 @app.route('/property_photos/<int:photo_id>')
 def serve_property_photo(photo_id):
     photo = PropertyPhoto.query.get(photo_id)
-    if photo and photo.image_data:
-        return Response(photo.image_data, mimetype=photo.mimetype)
+    if photo is None:
+        photo = db.session.get(ArchivedPropertyPhoto, photo_id)
+    if photo and photo.property.deleted_at is None and photo.image_data:
+        image_data, mimetype = photo.image_data, photo.mimetype
+        width = request.args.get('w', type=int)
+        if width in PHOTO_VARIANT_WIDTHS.values() and mimetype.startswith('image/'):
+            resized_data, resized_mimetype = resize_image(image_data, width)
+            if resized_data:
+                image_data, mimetype = resized_data, resized_mimetype
+        response = Response(image_data, mimetype=mimetype)
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response
     return jsonify({'error': 'Photo not found or data missing'}), 404
 
 @app.route('/')
@@ -121,19 +575,25 @@ def add_property():
             listing_date=listing_date,
             created_at=datetime.now()
         )
+        new_property.mediator = resolve_mediator(mediator_name, mediator_contact)
+        sync_feature_tags(new_property)
+
+        upload_ids = request.form.getlist('upload_ids')
+        uploaded_files = completed_upload_files(upload_ids)
+        if uploaded_files is None:
+            return jsonify({'error': 'Unknown or unfinished upload'}), 400
 
         db.session.add(new_property)
         db.session.flush()
+        queue_search_alerts(new_property)
 
-        if 'photos' in request.files:
-            photos = request.files.getlist('photos')
-            for photo_file in photos:
-                if photo_file and photo_file.filename != '':
-                    image_data, mimetype = get_image_data_and_mimetype(photo_file)
-                    if image_data and mimetype:
-                        new_photo = PropertyPhoto(property_id=new_property.id, image_data=image_data, mimetype=mimetype)
-                        db.session.add(new_photo)
+        try:
+            add_property_photos(new_property.id, request.files.getlist('photos') + uploaded_files)
+        finally:
+            close_upload_files(uploaded_files)
+        discard_uploads(upload_ids)
         db.session.commit()
+        remove_upload_files(upload_ids)
 
         return jsonify({'message': 'Property added successfully!', 'property_id': new_property.id}), 201
 
@@ -142,78 +602,747 @@ def add_property():
         print(f"Error adding property: {e}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/properties', methods=['GET'])
-def get_properties():
-    try:
-        query = Property.query
+def location_match(model, field, value):
+    # A substring of the text as typed, or the same key in any script or spelling
+    # (for addresses, the key's words starting at a word of the address key)
+    typed = getattr(model, field).ilike(f'%{value}%')
+    key = locations.search_key(field, value)
+    if not key:
+        return typed
+    key_column = getattr(model, f'{field}_key')
+    if field != 'address':
+        return db.or_(typed, key_column == key)
+    # Keys are only [a-z0-9 ], so they need no LIKE escaping
+    return db.or_(typed, key_column == key, key_column.like(f'{key} %'), key_column.like(f'% {key}%'))
 
-        property_type = request.args.get('property_type')
-        if property_type:
-            query = query.filter_by(property_type=property_type)
+def filter_properties(query, args, model=Property):
+    property_type = args.get('property_type')
+    if property_type:
+        query = query.filter(model.property_type == property_type)
 
-        min_price = request.args.get('min_price')
-        if min_price:
-            query = query.filter(Property.price >= float(min_price))
+    min_price = args.get('min_price')
+    if min_price:
+        query = query.filter(model.price >= float(min_price))
 
-        max_price = request.args.get('max_price')
-        if max_price:
-            query = query.filter(Property.price <= float(max_price))
+    max_price = args.get('max_price')
+    if max_price:
+        query = query.filter(model.price <= float(max_price))
 
-        city = request.args.get('city')
-        if city:
-            query = query.filter(Property.city.ilike(f'%{city}%'))
+    city = args.get('city')
+    if city:
+        query = query.filter(location_match(model, 'city', city))
+
+    locality = args.get('locality')
+    if locality:
+        query = query.filter(location_match(model, 'locality', locality))
+
+    address = args.get('address')
+    if address:
+        query = query.filter(location_match(model, 'address', address))
+
+    bedrooms = args.get('bedrooms')
+    if bedrooms:
+        query = query.filter(model.bedrooms >= int(bedrooms))
+
+    bathrooms = args.get('bathrooms')
+    if bathrooms:
+        query = query.filter(model.bathrooms >= int(bathrooms))
+
+    features = parse_features(args.get('features'))
+    if features:
+        postings = archived_property_feature if model is ArchivedProperty else property_feature
+
+        def posting_list(names):
+            return db.select(postings.c.property_id).join(
+                FeatureTag, FeatureTag.id == postings.c.tag_id).where(FeatureTag.name.in_(names))
+
+        if args.get('features_mode', 'all') == 'any':
+            query = query.filter(model.id.in_(posting_list(features)))
+        else:
+            for feature in features:
+                query = query.filter(model.id.in_(posting_list([feature])))
+
+    return query
+
+def serialize_property(prop, photos_data):
+    data = {
+        'id': prop.id,
+        'property_type': prop.property_type,
+        'address': prop.address,
+        'city': prop.city,
+        'locality': prop.locality,
+        'price': prop.price,
+        'area_value': prop.area_value,
+        'area_unit': prop.area_unit,
+        'bedrooms': prop.bedrooms,
+        'bathrooms': prop.bathrooms,
+        'description': prop.description,
+        'features': prop.features,
+        'status': prop.status,
+        'mediator_name': prop.mediator_name,
+        'mediator_contact': prop.mediator_contact,
+        'mediator_id': prop.mediator_id,
+        'listing_date': prop.listing_date.isoformat() if prop.listing_date else None,
+        'created_at': prop.created_at.isoformat(),
+        'version': prop.version,
+        'photos': photos_data
+    }
+    if isinstance(prop, ArchivedProperty):
+        data['archived_at'] = prop.archived_at.isoformat()
+    return data
+
+# In-process listing indexes: the class and the Property columns each one is built from
+LISTING_INDEXES = {
+    'search': (columnar.ColumnarIndex, (Property.id, Property.property_type, Property.city, Property.locality,
+                                        Property.price, Property.bedrooms, Property.bathrooms, Property.created_at)),
+    'similarity': (similarity.SimilarityIndex, (Property.id, Property.property_type, Property.city, Property.locality,
+                                                Property.price, Property.area_value, Property.area_unit,
+                                                Property.bedrooms, Property.bathrooms)),
+}
+listing_indexes = {}
+listing_indexes_lock = threading.Lock()
+
+# Change ids are handed out at insert, but concurrent transactions can commit out of
+# id order (on MySQL, id N+1 can be visible before N). Readers only advance past a gap
+# once it is EVENTS_GAP_SECONDS old; older gaps are ids of rolled-back transactions.
+FEED_HEAD_SCAN = 1000
+
+def settled_changes(changes, since):
+    # `changes` in id order, all after `since`: the prefix a cursor can safely move over
+    cutoff = datetime.now() - timedelta(seconds=app.config['EVENTS_GAP_SECONDS'])
+    settled = []
+    expected = since + 1
+    for change in changes:
+        if change.id != expected and change.created_at and change.created_at > cutoff:
+            break
+        settled.append(change)
+        expected = change.id + 1
+    return settled
 
-        locality = request.args.get('locality')
-        if locality:
-            query = query.filter(Property.locality.ilike(f'%{locality}%'))
+def listing_feed_head():
+    # The latest change id that no slower transaction can still commit below
+    recent = db.session.query(ListingChange.id, ListingChange.created_at).order_by(
+        ListingChange.id.desc()).limit(FEED_HEAD_SCAN).all()[::-1]
+    if not recent:
+        return 0
+    changes = settled_changes(recent[1:], recent[0].id)
+    return changes[-1].id if changes else recent[0].id
 
-        bedrooms = request.args.get('bedrooms')
-        if bedrooms:
-            query = query.filter(Property.bedrooms >= int(bedrooms))
+def refresh_listing_index(name):
+    # Built on first use, then kept current by replaying the listing change feed,
+    # which also picks up writes made by other processes. Call with the lock held.
+    index_class, columns = LISTING_INDEXES[name]
+    index = listing_indexes.get(name)
+    if index is None:
+        index = index_class()
+        index.sequence = listing_feed_head()
+        index.load(row._asdict() for row in active_properties().with_entities(*columns).yield_per(10000))
+        listing_indexes[name] = index
+    changes = db.session.query(ListingChange.id, ListingChange.property_id, ListingChange.created_at).filter(
+        ListingChange.id > index.sequence).order_by(ListingChange.id).all()
+    changes = settled_changes(changes, index.sequence)
+    if changes:
+        changed_ids = {change.property_id for change in changes}
+        rows = {row.id: row._asdict() for row in active_properties().with_entities(*columns).filter(
+            Property.id.in_(changed_ids))}
+        for property_id in changed_ids:
+            if property_id in rows:
+                index.upsert(rows[property_id])
+            else:
+                index.remove(property_id)
+        index.sequence = changes[-1].id
+    return index
 
-        bathrooms = request.args.get('bathrooms')
-        if bathrooms:
-            query = query.filter(Property.bathrooms >= int(bathrooms))
+def columnar_search(args):
+    # Matching ids from the in-process index, or None when the SQL path must be used
+    if not app.config['COLUMNAR_SEARCH'] or not columnar.supports(args):
+        return None
+    with listing_indexes_lock:
+        return refresh_listing_index('search').search(args)
 
-        properties = query.all()
+def properties_by_ids(property_ids, batch_size=500):
+    by_id = {}
+    for start in range(0, len(property_ids), batch_size):
+        batch = [int(property_id) for property_id in property_ids[start:start + batch_size]]
+        by_id.update((prop.id, prop) for prop in active_properties().filter(Property.id.in_(batch)))
+    return [by_id[property_id] for property_id in map(int, property_ids) if property_id in by_id]
+
+ARCHIVE_SCOPES = ('exclude', 'include', 'only')
+
+def archive_scope(args):
+    # Searches cover the hot table unless they opt into the archive with archived=include|only
+    scope = args.get('archived') or 'exclude'
+    return scope if scope in ARCHIVE_SCOPES else None
+
+def invalid_archive_scope():
+    return jsonify({'error': f"archived must be one of {', '.join(ARCHIVE_SCOPES)}"}), 400
+
+def archived_properties(args):
+    return filter_properties(ArchivedProperty.query, args, ArchivedProperty).order_by(ArchivedProperty.id).all()
+
+def listing_page(args, scope, offset, limit):
+    # Newest-first page across the hot and archive tables, as (total, listings)
+    selects = [filter_properties(db.select(ArchivedProperty.id, ArchivedProperty.created_at,
+                                           db.literal(True).label('archived')), args, ArchivedProperty)]
+    if scope == 'include':
+        selects.append(filter_properties(db.select(Property.id, Property.created_at, db.literal(False).label('archived'))
+                                         .where(Property.deleted_at.is_(None)), args))
+    listings = db.union_all(*selects).subquery()
+    total = db.session.scalar(db.select(db.func.count()).select_from(listings))
+    rows = db.session.execute(db.select(listings).order_by(listings.c.created_at.desc(), listings.c.id.desc())
+                              .offset(offset).limit(limit)).all()
+    hot = {prop.id: prop for prop in properties_by_ids([row.id for row in rows if not row.archived])}
+    cold = {prop.id: prop for prop in ArchivedProperty.query.filter(
+        ArchivedProperty.id.in_([row.id for row in rows if row.archived]))}
+    return total, [(cold if row.archived else hot)[row.id] for row in rows if row.id in (cold if row.archived else hot)]
+
+@app.route('/properties', methods=['GET'])
+def get_properties():
+    scope = archive_scope(request.args)
+    if scope is None:
+        return invalid_archive_scope()
+    try:
+        matched_ids = columnar_search(request.args) if scope != 'only' else None
+        if scope == 'only':
+            properties = []
+        elif matched_ids is not None:
+            properties = properties_by_ids(sorted(matched_ids))
+        else:
+            properties = filter_properties(active_properties(), request.args).all()
+        if scope != 'exclude':
+            properties += archived_properties(request.args)
 
         properties_list = []
         for prop in properties:
             photos_data = [{
                 'id': photo.id,
-                'image_url': f"{request.url_root.rstrip('/')}/property_photos/{photo.id}"
+                'image_url': photo_url(photo.id)
             } for photo in prop.photos]
 
-            properties_list.append({
-                'id': prop.id,
-                'property_type': prop.property_type,
-                'address': prop.address,
-                'city': prop.city,
-                'locality': prop.locality,
-                'price': prop.price,
-                'area_value': prop.area_value,
-                'area_unit': prop.area_unit,
-                'bedrooms': prop.bedrooms,
-                'bathrooms': prop.bathrooms,
-                'description': prop.description,
-                'features': prop.features,
-                'status': prop.status,
-                'mediator_name': prop.mediator_name,
-                'mediator_contact': prop.mediator_contact,
-                'listing_date': prop.listing_date.isoformat() if prop.listing_date else None,
-                'created_at': prop.created_at.isoformat(),
-                'photos': photos_data
-            })
+            properties_list.append(serialize_property(prop, photos_data))
         return jsonify(properties_list), 200
     except Exception as e:
         print(f"Error fetching properties: {e}")
         return jsonify({'error': str(e)}), 500
 
+def snapshot_photos(property_ids, photo_model=PropertyPhoto):
+    photos_by_property = {}
+    if property_ids:
+        photo_rows = db.session.query(
+            photo_model.id, photo_model.property_id, photo_model.mimetype, photo_model.placeholder,
+            photo_model.width, photo_model.height
+        ).filter(photo_model.property_id.in_(property_ids)).order_by(photo_model.id)
+        for photo in photo_rows:
+            is_image = photo.mimetype.startswith('image/')
+            photos_by_property.setdefault(photo.property_id, []).append({
+                'id': photo.id,
+                'mime_type': photo.mimetype,
+                'image_url': photo_url(photo.id),
+                'placeholder': photo.placeholder,
+                'width': photo.width,
+                'height': photo.height,
+                'variants': {variant: photo_url(photo.id, variant) for variant in PHOTO_VARIANT_WIDTHS} if is_image else {}
+            })
+    return photos_by_property
+
+def page_args(args):
+    page = max(args.get('page', 1, type=int), 1)
+    per_page = min(max(args.get('per_page', 20, type=int), 1), 100)
+    return page, per_page
+
+def search_page(args, scope, page, per_page):
+    # One newest-first page of search results, as (total, listings)
+    matched_ids = columnar_search(args) if scope == 'exclude' else None
+    if scope != 'exclude':
+        return listing_page(args, scope, (page - 1) * per_page, per_page)
+    if matched_ids is not None:
+        return len(matched_ids), properties_by_ids(matched_ids[(page - 1) * per_page:page * per_page])
+    query = filter_properties(active_properties(), args).order_by(Property.created_at.desc(), Property.id.desc())
+    return query.count(), query.offset((page - 1) * per_page).limit(per_page).all()
+
+def listing_photos(properties):
+    photos_by_property = snapshot_photos([prop.id for prop in properties if isinstance(prop, Property)])
+    photos_by_property.update(snapshot_photos([prop.id for prop in properties if isinstance(prop, ArchivedProperty)],
+                                              ArchivedPropertyPhoto))
+    return photos_by_property
+
+@app.route('/properties/snapshot', methods=['GET'])
+def get_properties_snapshot():
+    scope = archive_scope(request.args)
+    if scope is None:
+        return invalid_archive_scope()
+    try:
+        page, per_page = page_args(request.args)
+        total, properties = search_page(request.args, scope, page, per_page)
+        photos_by_property = listing_photos(properties)
+
+        return jsonify({
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'has_more': page * per_page < total,
+            'properties': [serialize_property(prop, photos_by_property.get(prop.id, [])) for prop in properties]
+        }), 200
+    except Exception as e:
+        print(f"Error fetching properties snapshot: {e}")
+        return jsonify({'error': str(e)}), 500
+
+fragment_cache = fragments.FragmentCache(app.config['FRAGMENT_CACHE_SIZE'])
+
+# Stored property_type and status values, listed here so pybabel extracts them for the pages
+LISTING_LABELS = {
+    'Apartment': _l('Apartment'), 'House': _l('House'), 'Land': _l('Land'), 'Commercial': _l('Commercial'),
+    'Available': _l('Available'), 'Under Agreement': _l('Under Agreement'), 'Sold/Rented': _l('Sold/Rented'),
+}
+
+@app.template_filter('label')
+def listing_label(value):
+    return LISTING_LABELS.get(value, value)
+
+def render_fragments(template, properties, photos_for):
+    # Per-listing HTML from the fragment cache. Photos are looked up only for
+    # the listings that miss, so a fully cached page costs just the search query.
+    locale = get_locale()
+    keys = [fragments.fragment_key(template, prop.id, prop.version, prop.updated_at, locale,
+                                   isinstance(prop, ArchivedProperty)) for prop in properties]
+    cached = fragment_cache.get_many(keys)
+    missing = [(prop, key) for prop, key in zip(properties, keys) if key not in cached]
+    if missing:
+        photos_by_property = photos_for([prop for prop, _key in missing])
+        for prop, key in missing:
+            cached[key] = render_template(template, prop=prop, photos=photos_by_property.get(prop.id, []),
+                                          variant_widths=PHOTO_VARIANT_WIDTHS)
+            fragment_cache.set(key, cached[key])
+    return [Markup(cached[key]) for key in keys]
+
+def html_page(template, **context):
+    response = make_response(render_template(template, locale=str(get_locale()),
+                                             languages=app.config['LANGUAGES'], **context))
+    response.vary.update(('Accept-Language', 'Cookie'))
+    return response
+
+def current_url(**changes):
+    return url_for(request.endpoint, **{**(request.view_args or {}), **request.args.to_dict(), **changes})
+
+@app.route('/listings', methods=['GET'])
+def listings_page():
+    scope = archive_scope(request.args)
+    if scope is None:
+        return invalid_archive_scope()
+    page, per_page = page_args(request.args)
+    total, properties = search_page(request.args, scope, page, per_page)
+    return html_page('listings/index.html', cards=render_fragments('listings/_card.html', properties, listing_photos),
+                     filters=request.args, page=page, total=total, has_more=page * per_page < total,
+                     current_url=current_url)
+
+@app.route('/listings/<int:property_id>', methods=['GET'])
+def listing_detail_page(property_id):
+    prop = find_listing(property_id)
+    body, = render_fragments('listings/_detail.html', [prop], listing_photos)
+    return html_page('listings/detail.html', prop=prop, body=body, current_url=current_url)
+
+def listing_changes_since(sequence, limit):
+    changes = settled_changes(
+        ListingChange.query.filter(ListingChange.id > sequence).order_by(ListingChange.id).limit(limit).all(), sequence)
+    if not changes:
+        return []
+    # Carry the listing's current state so clients can apply the delta without refetching
+    property_ids = {change.property_id for change in changes}
+    properties = {prop.id: prop for prop in active_properties().filter(Property.id.in_(property_ids))}
+    photos_by_property = snapshot_photos(list(properties))
+    return [{
+        'sequence': change.id,
+        'property_id': change.property_id,
+        'action': change.action,
+        'created_at': change.created_at.isoformat() if change.created_at else None,
+        'property': serialize_property(properties[change.property_id], photos_by_property.get(change.property_id, []))
+        if change.property_id in properties else None
+    } for change in changes]
+
+def wait_for_listing_changes(sequence, timeout, limit):
+    deadline = time.monotonic() + timeout
+    while True:
+        events = listing_changes_since(sequence, limit)
+        remaining = deadline - time.monotonic()
+        if events or remaining <= 0:
+            return events
+        # Release the pooled connection while idle; commits from other processes are
+        # picked up by re-polling at least once a second
+        db.session.remove()
+        with listing_changed:
+            listing_changed.wait(min(remaining, 1.0))
+
+@app.route('/events', methods=['GET'])
+def get_listing_events():
+    since = request.args.get('since', type=int)
+    if since is None and request.headers.get('Last-Event-ID', '').isdigit():
+        since = int(request.headers['Last-Event-ID'])
+    if since is None:
+        # New subscribers start at the head of the feed rather than replaying history
+        since = listing_feed_head()
+    limit = app.config['EVENTS_BATCH_SIZE']
+    max_wait = app.config['EVENTS_WAIT_SECONDS']
+
+    if request.accept_mimetypes.best == 'text/event-stream':
+        def stream():
+            sequence = since
+            yield 'retry: 3000\n\n'
+            while True:
+                events = wait_for_listing_changes(sequence, max_wait, limit)
+                if not events:
+                    yield ': keep-alive\n\n'
+                for listing_event in events:
+                    sequence = listing_event['sequence']
+                    yield f"id: {sequence}\nevent: {listing_event['action']}\ndata: {json.dumps(listing_event)}\n\n"
+
+        return Response(stream_with_context(stream()), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    try:
+        timeout = min(max(request.args.get('timeout', max_wait, type=float), 0), max_wait)
+        events = wait_for_listing_changes(since, timeout, limit)
+        return jsonify({
+            'events': events,
+            'last_sequence': events[-1]['sequence'] if events else since
+        }), 200
+    except Exception as e:
+        print(f"Error fetching listing events: {e}")
+        return jsonify({'error': str(e)}), 500
+
+def find_similar_photos(hash_value, max_distance, exclude_property_id=None):
+    radius = max_distance // BAND_COUNT
+    band_filters = [
+        getattr(PropertyPhoto, f'dhash_band_{band}').in_(band_neighbours(band_value, radius))
+        for band, band_value in enumerate(hash_bands(hash_value))
+    ]
+    query = db.session.query(PropertyPhoto.id, PropertyPhoto.property_id, PropertyPhoto.dhash).join(Property).filter(
+        Property.deleted_at.is_(None), db.or_(*band_filters))
+    if exclude_property_id is not None:
+        query = query.filter(PropertyPhoto.property_id != exclude_property_id)
+    matches = []
+    for candidate in query:
+        distance = hamming(hash_value, int(candidate.dhash, 16))
+        if distance <= max_distance:
+            matches.append((candidate, distance))
+    return matches
+
+def add_property_photos(property_id, photo_files):
+    added = []
+    for photo_file in photo_files:
+        if photo_file and photo_file.filename != '':
+            image_data, mimetype = get_image_data_and_mimetype(photo_file)
+            if image_data and mimetype:
+                is_image = mimetype.startswith('image/')
+                width = height = orientation = None
+                if is_image:
+                    image_data, width, height, orientation = ingest_image(image_data, mimetype)
+                placeholder = make_placeholder(image_data) if is_image else None
+                new_photo = PropertyPhoto(property_id=property_id, image_data=image_data, mimetype=mimetype, placeholder=placeholder,
+                                          width=width, height=height, orientation=orientation)
+                new_photo.set_dhash(dhash(image_data) if is_image else None)
+                db.session.add(new_photo)
+                added.append(new_photo)
+    return added
+
+def completed_upload_files(upload_ids):
+    files = []
+    for upload_id in upload_ids:
+        upload = db.session.get(UploadSession, upload_id)
+        if upload is None or upload.completed_at is None:
+            close_upload_files(files)
+            return None
+        path = chunked_uploads.assembled_path(app.config['UPLOAD_SESSION_DIR'], upload_id)
+        files.append(FileStorage(stream=open(path, 'rb'), filename=upload.filename, content_type=upload.mimetype))
+    return files
+
+def close_upload_files(files):
+    for file in files:
+        file.close()
+
+def discard_uploads(upload_ids):
+    if upload_ids:
+        db.session.execute(UploadSession.__table__.delete().where(UploadSession.id.in_(upload_ids)))
+
+def remove_upload_files(upload_ids):
+    for upload_id in upload_ids:
+        chunked_uploads.discard(app.config['UPLOAD_SESSION_DIR'], upload_id)
+
+def serialize_upload(upload):
+    received = chunked_uploads.received_chunks(app.config['UPLOAD_SESSION_DIR'], upload.id)
+    return {
+        'upload_id': upload.id,
+        'filename': upload.filename,
+        'size': upload.total_size,
+        'chunk_size': upload.chunk_size,
+        'chunk_count': upload.chunk_count,
+        'received_chunks': received if upload.completed_at is None else list(range(upload.chunk_count)),
+        'completed': upload.completed_at is not None
+    }
+
+@app.route('/uploads', methods=['POST'])
+def create_upload():
+    data = request.get_json(silent=True) or {}
+    filename = data.get('filename')
+    mimetype = data.get('mimetype')
+    size = data.get('size')
+    if not filename or not mimetype or not isinstance(size, int) or size <= 0:
+        return jsonify({'error': 'filename, mimetype and a positive size are required'}), 400
+    if size > app.config['MAX_UPLOAD_BYTES']:
+        return jsonify({'error': 'File is too large'}), 413
+    try:
+        upload = UploadSession(id=uuid.uuid4().hex, filename=filename[:255], mimetype=mimetype[:50],
+                               total_size=size, chunk_size=app.config['UPLOAD_CHUNK_SIZE'])
+        db.session.add(upload)
+        db.session.commit()
+        return jsonify(serialize_upload(upload)), 201
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error creating upload session: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/uploads/<upload_id>', methods=['GET'])
+def get_upload(upload_id):
+    upload = db.get_or_404(UploadSession, upload_id)
+    return jsonify(serialize_upload(upload)), 200
+
+@app.route('/uploads/<upload_id>/chunks/<int:index>', methods=['PUT'])
+def put_upload_chunk(upload_id, index):
+    upload = db.get_or_404(UploadSession, upload_id)
+    if upload.completed_at is not None:
+        return jsonify({'error': 'Upload is already finalized'}), 409
+    if index >= upload.chunk_count:
+        return jsonify({'error': 'Chunk index out of range'}), 400
+    data = request.get_data(cache=False)
+    expected = chunked_uploads.expected_chunk_size(upload.total_size, upload.chunk_size, index)
+    if len(data) != expected:
+        return jsonify({'error': f'Chunk {index} must be {expected} bytes, got {len(data)}'}), 400
+    try:
+        chunked_uploads.write_chunk(app.config['UPLOAD_SESSION_DIR'], upload_id, index, data)
+        return jsonify({'upload_id': upload_id, 'index': index}), 200
+    except Exception as e:
+        print(f"Error storing upload chunk: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/uploads/<upload_id>/finalize', methods=['POST'])
+def finalize_upload(upload_id):
+    upload = db.get_or_404(UploadSession, upload_id)
+    if upload.completed_at is not None:
+        return jsonify(serialize_upload(upload)), 200
+    received = set(chunked_uploads.received_chunks(app.config['UPLOAD_SESSION_DIR'], upload_id))
+    missing = [index for index in range(upload.chunk_count) if index not in received]
+    if missing:
+        return jsonify({'error': 'Upload is missing chunks', 'missing_chunks': missing}), 409
+    try:
+        size = chunked_uploads.assemble(app.config['UPLOAD_SESSION_DIR'], upload_id, upload.chunk_count)
+        if size != upload.total_size:
+            chunked_uploads.discard(app.config['UPLOAD_SESSION_DIR'], upload_id)
+            return jsonify({'error': f'Assembled {size} bytes, expected {upload.total_size}'}), 409
+        upload.completed_at = datetime.now()
+        db.session.commit()
+        return jsonify(serialize_upload(upload)), 200
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error finalizing upload: {e}")
+        return jsonify({'error': str(e)}), 500
+
+def property_etag(prop):
+    return f'"{prop.id}-{prop.version}"'
+
+def property_photos_data(prop):
+    return [{
+        'id': photo.id,
+        'mime_type': photo.mimetype,
+        'image_url': photo_url(photo.id),
+        'width': photo.width,
+        'height': photo.height
+    } for photo in sorted(prop.photos, key=lambda photo: photo.id)]
+
+def find_listing(property_id):
+    # Hot listing first; archived listings stay readable by id but can no longer be edited
+    prop = active_properties().filter_by(id=property_id).first()
+    return prop or db.get_or_404(ArchivedProperty, property_id)
+
+@app.route('/properties/<int:property_id>', methods=['GET'])
+def get_property(property_id):
+    prop = find_listing(property_id)
+    response = jsonify(serialize_property(prop, property_photos_data(prop)))
+    response.headers['ETag'] = property_etag(prop)
+    return response, 200
+
+def parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+UPDATABLE_PROPERTY_FIELDS = {
+    'property_type': str,
+    'address': str,
+    'city': str,
+    'locality': str,
+    'price': float,
+    'area_value': float,
+    'area_unit': str,
+    'bedrooms': int,
+    'bathrooms': int,
+    'description': str,
+    'features': str,
+    'status': str,
+    'mediator_name': str,
+    'mediator_contact': str,
+    'listing_date': parse_date,
+}
+
+ESTIMATE_FIELDS = ('property_type', 'area_value', 'area_unit', 'bedrooms', 'bathrooms', 'city', 'locality')
+POSITIVE_ESTIMATE_FIELDS = ('area_value', 'bedrooms', 'bathrooms')
+price_models = {}
+
+def current_price_model():
+    # Memory-mapped from PRICE_MODEL_PATH, and mapped again when train-price-model replaces the file
+    path = app.config['PRICE_MODEL_PATH']
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    loaded = price_models.get(path)
+    if loaded is None or loaded[0] != signature:
+        loaded = price_models[path] = (signature, price_model.PriceModel.load(path))
+    return loaded[1]
+
+# Mapped at startup, so the first estimate doesn't open the file
+try:
+    current_price_model()
+except (OSError, ValueError) as e:
+    print(f"Error loading price model: {e}")
+
+@app.route('/properties/estimate', methods=['GET'])
+def estimate_property_price():
+    model = current_price_model()
+    if model is None:
+        return jsonify({'error': 'No price model has been trained yet'}), 503
+    try:
+        listing = {field: UPDATABLE_PROPERTY_FIELDS[field](request.args[field])
+                   for field in ESTIMATE_FIELDS if request.args.get(field)}
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    for field in POSITIVE_ESTIMATE_FIELDS:
+        if field in listing and not (math.isfinite(listing[field]) and listing[field] > 0):
+            return jsonify({'error': f'{field} must be a positive number'}), 400
+    return jsonify(model.estimate(listing)), 200
+
+@app.route('/properties/<int:property_id>', methods=['PATCH'])
+def update_property(property_id):
+    prop = active_properties().filter_by(id=property_id).first_or_404()
+    if_match = request.headers.get('If-Match')
+    current = compression.etag_variants(property_etag(prop))
+    if if_match and if_match != '*' and current.isdisjoint(tag.strip() for tag in if_match.split(',')):
+        return jsonify({'error': 'Property was modified by another request', 'etag': property_etag(prop)}), 412
+
+    data = (request.get_json(silent=True) or {}) if request.is_json else request.form
+    try:
+        for field, parser in UPDATABLE_PROPERTY_FIELDS.items():
+            if field not in data:
+                continue
+            value = data[field]
+            value = parser(value) if value not in (None, '') else None
+            if value is None and not Property.__table__.columns[field].nullable:
+                return jsonify({'error': f'{field} cannot be empty'}), 400
+            if getattr(prop, field) != value:
+                setattr(prop, field, value)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    remove_photo_ids = (data.get('remove_photo_ids') if request.is_json else data.getlist('remove_photo_ids')) or []
+    if not isinstance(remove_photo_ids, list) or not all(
+            type(photo_id) is int or (isinstance(photo_id, str) and photo_id.isdigit()) for photo_id in remove_photo_ids):
+        return jsonify({'error': 'remove_photo_ids must be a list of photo ids'}), 400
+    remove_photo_ids = [int(photo_id) for photo_id in remove_photo_ids]
+    if 'mediator_name' in data or 'mediator_contact' in data:
+        prop.mediator = resolve_mediator(prop.mediator_name, prop.mediator_contact)
+    if 'features' in data:
+        sync_feature_tags(prop)
+
+    try:
+        if remove_photo_ids:
+            db.session.execute(PropertyPhoto.__table__.delete().where(
+                PropertyPhoto.property_id == property_id, PropertyPhoto.id.in_(remove_photo_ids)))
+            db.session.expire(prop, ['photos'])
+        upload_ids = data.get('upload_ids') if request.is_json else data.getlist('upload_ids')
+        upload_ids = upload_ids or []
+        uploaded_files = completed_upload_files(upload_ids)
+        if uploaded_files is None:
+            db.session.rollback()
+            return jsonify({'error': 'Unknown or unfinished upload'}), 400
+        try:
+            added_photos = add_property_photos(property_id, request.files.getlist('photos') + uploaded_files)
+        finally:
+            close_upload_files(uploaded_files)
+        discard_uploads(upload_ids)
+
+        if (remove_photo_ids or added_photos) and not db.session.is_modified(prop):
+            prop.updated_at = datetime.now()
+        db.session.commit()
+        remove_upload_files(upload_ids)
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({'error': 'Property was modified by another request'}), 412
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error updating property: {e}")
+        return jsonify({'error': str(e)}), 500
+
+    response = jsonify(serialize_property(prop, property_photos_data(prop)))
+    response.headers['ETag'] = property_etag(prop)
+    return response, 200
+
+@app.route('/properties/<int:property_id>/similar', methods=['GET'])
+def get_similar_properties(property_id):
+    active_properties().filter_by(id=property_id).first_or_404()
+    try:
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+        with listing_indexes_lock:
+            neighbours = refresh_listing_index('similarity').similar(property_id, limit)
+        distances = dict(neighbours)
+        properties = properties_by_ids([neighbour_id for neighbour_id, _ in neighbours])
+        photos_by_property = snapshot_photos([prop.id for prop in properties])
+        return jsonify({
+            'property_id': property_id,
+            'similar': [{**serialize_property(prop, photos_by_property.get(prop.id, [])),
+                         'distance': round(distances[prop.id], 4)} for prop in properties]
+        }), 200
+    except Exception as e:
+        print(f"Error finding similar properties: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/properties/<int:property_id>/duplicates', methods=['GET'])
+def get_property_duplicates(property_id):
+    active_properties().filter_by(id=property_id).first_or_404()
+    try:
+        max_distance = min(max(request.args.get('max_distance', 6, type=int), 0), 15)
+
+        photos = db.session.query(PropertyPhoto.id, PropertyPhoto.dhash).filter(
+            PropertyPhoto.property_id == property_id, PropertyPhoto.dhash.isnot(None))
+        duplicates = {}
+        for photo in photos:
+            for candidate, distance in find_similar_photos(int(photo.dhash, 16), max_distance, property_id):
+                duplicates.setdefault(candidate.property_id, []).append({
+                    'photo_id': photo.id,
+                    'duplicate_photo_id': candidate.id,
+                    'distance': distance
+                })
+
+        duplicates_list = [{
+            'property_id': duplicate_property_id,
+            'matches': sorted(matches, key=lambda match: match['distance'])
+        } for duplicate_property_id, matches in duplicates.items()]
+        duplicates_list.sort(key=lambda item: (-len(item['matches']), item['property_id']))
+        return jsonify({'property_id': property_id, 'max_distance': max_distance, 'duplicates': duplicates_list}), 200
+    except Exception as e:
+        print(f"Error finding duplicates: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/properties/<int:property_id>', methods=['DELETE'])
 def delete_property(property_id):
+    property_to_delete = active_properties().filter_by(id=property_id).first_or_404()
     try:
-        property_to_delete = Property.query.get_or_404(property_id)
-        db.session.delete(property_to_delete)
+        property_to_delete.deleted_at = datetime.now()
         db.session.commit()
         return jsonify({'message': 'Property deleted successfully!'}), 200
     except Exception as e:
@@ -221,7 +1350,826 @@ def delete_property(property_id):
         print(f"Error deleting property: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.cli.command('backfill-placeholders')
+def backfill_placeholders():
+    ensure_photo_placeholder_schema()
+    photo_ids = [row.id for row in db.session.query(PropertyPhoto.id).filter(
+        PropertyPhoto.placeholder.is_(None), PropertyPhoto.mimetype.like('image/%'))]
+    for photo_id in photo_ids:
+        photo = PropertyPhoto.query.get(photo_id)
+        photo.placeholder = make_placeholder(photo.image_data)
+        db.session.commit()
+    print(f"Backfilled placeholders for {len(photo_ids)} photos")
+
+@app.cli.command('dedup-photos')
+@click.option('--max-distance', default=6, show_default=True, help='Maximum Hamming distance between photo hashes.')
+def dedup_photos(max_distance):
+    ensure_photo_hash_schema()
+    photo_ids = [row.id for row in db.session.query(PropertyPhoto.id).filter(
+        PropertyPhoto.dhash.is_(None), PropertyPhoto.mimetype.like('image/%'))]
+    for photo_id in photo_ids:
+        photo = PropertyPhoto.query.get(photo_id)
+        photo.set_dhash(dhash(photo.image_data))
+        db.session.commit()
+    print(f"Hashed {len(photo_ids)} photos")
+
+    tree = BKTree()
+    photos = db.session.query(PropertyPhoto.id, PropertyPhoto.property_id, PropertyPhoto.dhash).join(Property).filter(
+        Property.deleted_at.is_(None), PropertyPhoto.dhash.isnot(None)).order_by(PropertyPhoto.id).all()
+    listing_pairs = {}
+    for photo in photos:
+        hash_value = int(photo.dhash, 16)
+        for (other_id, other_property_id), distance in tree.search(hash_value, max_distance):
+            print(f"Photo {photo.id} (property {photo.property_id}) ~ photo {other_id} (property {other_property_id}), distance {distance}")
+            if other_property_id != photo.property_id:
+                pair = tuple(sorted((other_property_id, photo.property_id)))
+                listing_pairs[pair] = listing_pairs.get(pair, 0) + 1
+        tree.add(hash_value, (photo.id, photo.property_id))
+
+    for (first_id, second_id), shared in sorted(listing_pairs.items()):
+        print(f"Properties {first_id} and {second_id} share {shared} near-duplicate photos")
+    print(f"Scanned {tree.size} photos, found {len(listing_pairs)} near-duplicate listing pairs")
+
+def purge_deleted_properties(batch_size=20, pause=0.5):
+    purged = 0
+    property_ids = [row.id for row in db.session.query(Property.id).filter(Property.deleted_at.isnot(None))]
+    for property_id in property_ids:
+        while True:
+            photo_ids = [row.id for row in db.session.query(PropertyPhoto.id).filter_by(
+                property_id=property_id).limit(batch_size)]
+            if not photo_ids:
+                break
+            db.session.execute(PropertyPhoto.__table__.delete().where(PropertyPhoto.id.in_(photo_ids)))
+            db.session.commit()
+            time.sleep(pause)
+        db.session.execute(property_feature.delete().where(property_feature.c.property_id == property_id))
+        db.session.execute(PriceChange.__table__.delete().where(PriceChange.property_id == property_id))
+        db.session.execute(SavedSearchNotification.__table__.delete().where(
+            SavedSearchNotification.property_id == property_id))
+        db.session.execute(Property.__table__.delete().where(Property.id == property_id))
+        db.session.commit()
+        purged += 1
+    return purged
+
+def copy_to_archive(hot, cold, where, **extra):
+    # INSERT ... SELECT, so photo blobs move inside the database instead of through Python
+    columns = [column.name for column in cold.columns if column.name in hot.columns]
+    values = [hot.columns[name] for name in columns] + [db.literal(value).label(name) for name, value in extra.items()]
+    db.session.execute(cold.insert().from_select(columns + list(extra), db.select(*values).where(where)))
+
+def archive_inactive_properties(older_than_days, batch_size=20, pause=0.5):
+    # Moves listings that left the market (ARCHIVE_STATUSES, untouched for older_than_days)
+    # and their photos, feature postings and price history to the archive tables
+    cutoff = datetime.fromtimestamp(time.time() - older_than_days * 86400)
+    archived = 0
+    while True:
+        columns = [Property.id] + [getattr(Property, column) for column in STATS_SOURCE_COLUMNS]
+        listings = active_properties().with_entities(*columns).filter(
+            Property.status.in_(app.config['ARCHIVE_STATUSES']), Property.updated_at < cutoff
+        ).order_by(Property.id).limit(batch_size).with_for_update().all()
+        if not listings:
+            return archived
+        property_ids = [listing.id for listing in listings]
+        copy_to_archive(Property.__table__, ArchivedProperty.__table__, Property.id.in_(property_ids),
+                        archived_at=datetime.now())
+        copy_to_archive(PropertyPhoto.__table__, ArchivedPropertyPhoto.__table__, PropertyPhoto.property_id.in_(property_ids))
+        copy_to_archive(property_feature, archived_property_feature, property_feature.c.property_id.in_(property_ids))
+        copy_to_archive(PriceChange.__table__, ArchivedPriceChange.__table__, PriceChange.property_id.in_(property_ids))
+
+        db.session.execute(PropertyPhoto.__table__.delete().where(PropertyPhoto.property_id.in_(property_ids)))
+        db.session.execute(property_feature.delete().where(property_feature.c.property_id.in_(property_ids)))
+        db.session.execute(PriceChange.__table__.delete().where(PriceChange.property_id.in_(property_ids)))
+        db.session.execute(SavedSearchNotification.__table__.delete().where(
+            SavedSearchNotification.property_id.in_(property_ids)))
+        db.session.execute(Property.__table__.delete().where(Property.id.in_(property_ids)))
+        # Feed consumers and the in-process indexes drop the listing on its 'archived' change
+        db.session.execute(ListingChange.__table__.insert(), [
+            {'property_id': property_id, 'action': 'archived', 'created_at': datetime.now()}
+            for property_id in property_ids])
+        db.session.info['listing_changed'] = True
+        # Archived listings leave the summaries, as they would on a rebuild-stats
+        deltas = {}
+        for listing in listings:
+            add_stat_deltas(deltas, listing._asdict(), -1)
+        apply_stat_deltas(db.session, deltas)
+        db.session.commit()
+        archived += len(property_ids)
+        time.sleep(pause)
+
+def run_periodically(name, interval, job, description):
+    def run():
+        while True:
+            with app.app_context():
+                try:
+                    job()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Error {description}: {e}")
+                finally:
+                    db.session.remove()
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    return thread
+
+def start_background_purger(interval, batch_size=20, pause=0.5):
+    return run_periodically('property-purger', interval, lambda: purge_deleted_properties(batch_size, pause),
+                            'purging deleted properties')
+
+def start_background_archiver(interval, batch_size=20, pause=0.5):
+    return run_periodically('property-archiver', interval, lambda: archive_inactive_properties(
+        app.config['ARCHIVE_AFTER_DAYS'], batch_size, pause), 'archiving inactive properties')
+
+def serialize_mediator(mediator):
+    return {'id': mediator.id, 'name': mediator.name, 'phone': mediator.phone}
+
+@app.route('/mediators/<int:mediator_id>/properties', methods=['GET'])
+def get_mediator_properties(mediator_id):
+    mediator = db.get_or_404(Mediator, mediator_id)
+    try:
+        properties = active_properties().filter_by(mediator_id=mediator_id).order_by(
+            Property.created_at.desc(), Property.id.desc()).all()
+        return jsonify({
+            'mediator': serialize_mediator(mediator),
+            'properties': [serialize_property(prop, property_photos_data(prop)) for prop in properties]
+        }), 200
+    except Exception as e:
+        print(f"Error fetching mediator properties: {e}")
+        return jsonify({'error': str(e)}), 500
+
+def stats_response(rows, key_columns):
+    stats_list = []
+    for row in rows:
+        totals = {column: getattr(row, column) or 0 for column in listing_stats.STAT_COLUMNS}
+        if totals['listing_count'] > 0:
+            stats_list.append({**{column: getattr(row, column) for column in key_columns}, **listing_stats.summarize(totals)})
+    return stats_list
+
+@app.route('/stats/locations', methods=['GET'])
+def get_location_stats():
+    try:
+        city = request.args.get('city')
+        if city:
+            rows = LocationStats.query.filter_by(city=listing_stats.normalize_key(city)).order_by(LocationStats.locality).all()
+            return jsonify(stats_response(rows, ('city', 'locality'))), 200
+
+        sums = [db.func.sum(getattr(LocationStats, column)).label(column) for column in listing_stats.STAT_COLUMNS]
+        rows = db.session.query(LocationStats.city, *sums).group_by(LocationStats.city).order_by(LocationStats.city).all()
+        return jsonify(stats_response(rows, ('city',))), 200
+    except Exception as e:
+        print(f"Error fetching location stats: {e}")
+        return jsonify({'error': str(e)}), 500
+
+location_index = None
+location_index_lock = threading.Lock()
+
+def current_location_index():
+    # Built from the location summaries, so it covers active listings only, and
+    # refreshed once it is LOCATION_INDEX_TTL seconds old
+    global location_index
+    with location_index_lock:
+        if location_index is None or time.monotonic() - location_index.loaded_at >= app.config['LOCATION_INDEX_TTL']:
+            counts = {}
+            for city, locality, listing_count in db.session.execute(db.select(
+                    LocationStats.city, LocationStats.locality, LocationStats.listing_count).where(
+                    LocationStats.listing_count > 0)):
+                counts[('city', city, None)] = counts.get(('city', city, None), 0) + listing_count
+                if locality:
+                    counts[('locality', locality, city)] = listing_count
+            rows = [(kind, name, city, count) for (kind, name, city), count in counts.items()]
+            if location_index is None or not location_index.update_counts(rows):
+                location_index = locations.LocationIndex()
+                location_index.load(rows)
+            location_index.loaded_at = time.monotonic()
+        return location_index
+
+@app.route('/locations/suggest', methods=['GET'])
+def suggest_locations():
+    kind = request.args.get('kind') or None
+    if kind is not None and kind not in locations.LOCATION_KINDS:
+        return jsonify({'error': f"kind must be one of {', '.join(locations.LOCATION_KINDS)}"}), 400
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 25)
+    suggestions = current_location_index().suggest(request.args.get('q', ''), limit, kind=kind,
+                                                   city=request.args.get('city'))
+    return jsonify(suggestions), 200
+
+@app.route('/stats/mediators', methods=['GET'])
+def get_mediator_stats():
+    try:
+        rows = MediatorStats.query.order_by(MediatorStats.mediator_name).all()
+        return jsonify(stats_response(rows, ('mediator_name',))), 200
+    except Exception as e:
+        print(f"Error fetching mediator stats: {e}")
+        return jsonify({'error': str(e)}), 500
+
+def queue_search_alerts(prop):
+    listing = {
+        'property_type': prop.property_type,
+        'city': prop.city,
+        'locality': prop.locality,
+        'price': prop.price,
+        'bedrooms': prop.bedrooms,
+        'bathrooms': prop.bathrooms,
+        'features': parse_features(prop.features),
+    }
+    candidates = db.session.query(SavedSearch.id, SavedSearch.criteria).join(
+        saved_search_key, saved_search_key.c.saved_search_id == SavedSearch.id).filter(
+        saved_search_key.c.key.in_(saved_searches.listing_keys(listing)))
+    matched = [candidate.id for candidate in candidates
+               if saved_searches.matches(json.loads(candidate.criteria), listing)]
+    if matched:
+        db.session.execute(SavedSearchNotification.__table__.insert(), [
+            {'saved_search_id': search_id, 'property_id': prop.id, 'created_at': datetime.now()}
+            for search_id in matched])
+    return matched
+
+def serialize_saved_search(saved_search):
+    return {
+        'id': saved_search.id,
+        'email': saved_search.email,
+        'filters': json.loads(saved_search.criteria),
+        'created_at': saved_search.created_at.isoformat() if saved_search.created_at else None
+    }
+
+@app.route('/saved_searches', methods=['POST'])
+def create_saved_search():
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    if not data.get('email'):
+        return jsonify({'error': 'email is required'}), 400
+    if not isinstance(data['email'], str):
+        return jsonify({'error': 'email must be a string'}), 400
+    filters = data.get('filters') or {}
+    if not isinstance(filters, dict):
+        return jsonify({'error': 'filters must be an object'}), 400
+    try:
+        criteria = saved_searches.compile_search(filters)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid filters: {e}'}), 400
+    try:
+        saved_search = SavedSearch(email=data['email'], criteria=json.dumps(criteria), created_at=datetime.now())
+        db.session.add(saved_search)
+        db.session.flush()
+        db.session.execute(saved_search_key.insert(), [
+            {'key': key, 'saved_search_id': saved_search.id} for key in saved_searches.search_keys(criteria)])
+        db.session.commit()
+        return jsonify(serialize_saved_search(saved_search)), 201
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error saving search: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/saved_searches/<int:search_id>', methods=['DELETE'])
+def delete_saved_search(search_id):
+    saved_search = SavedSearch.query.get_or_404(search_id)
+    try:
+        db.session.execute(saved_search_key.delete().where(saved_search_key.c.saved_search_id == search_id))
+        db.session.execute(SavedSearchNotification.__table__.delete().where(
+            SavedSearchNotification.saved_search_id == search_id))
+        db.session.delete(saved_search)
+        db.session.commit()
+        return jsonify({'message': 'Saved search deleted successfully!'}), 200
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error deleting saved search: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/saved_searches/<int:search_id>/notifications', methods=['GET'])
+def get_saved_search_notifications(search_id):
+    saved_search = SavedSearch.query.get_or_404(search_id)
+    try:
+        notifications = SavedSearchNotification.query.filter_by(saved_search_id=search_id).order_by(
+            SavedSearchNotification.id).all()
+        return jsonify({
+            'saved_search': serialize_saved_search(saved_search),
+            'notifications': [{
+                'id': notification.id,
+                'property_id': notification.property_id,
+                'created_at': notification.created_at.isoformat() if notification.created_at else None,
+                'sent_at': notification.sent_at.isoformat() if notification.sent_at else None
+            } for notification in notifications]
+        }), 200
+    except Exception as e:
+        print(f"Error fetching notifications: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.cli.command('send-search-alerts')
+@click.option('--batch-size', default=100, show_default=True, help='Notifications to deliver per batch.')
+def send_search_alerts(batch_size):
+    sent = 0
+    while True:
+        pending = db.session.query(SavedSearchNotification, SavedSearch.email).join(SavedSearch).join(
+            Property, Property.id == SavedSearchNotification.property_id).filter(
+            SavedSearchNotification.sent_at.is_(None), Property.deleted_at.is_(None)).order_by(
+            SavedSearchNotification.id).limit(batch_size).all()
+        if not pending:
+            break
+        for notification, email in pending:
+            # Delivery hook: hand off to the mail provider here
+            print(f"Alert to {email}: property {notification.property_id} matches saved search {notification.saved_search_id}")
+            notification.sent_at = datetime.now()
+        db.session.commit()
+        sent += len(pending)
+    print(f"Sent {sent} saved search alerts")
+
+def rebuild_listing_stats():
+    listings = [{column: getattr(prop, column) for column in STATS_SOURCE_COLUMNS} for prop in active_properties()]
+    db.session.execute(LocationStats.__table__.delete())
+    db.session.execute(MediatorStats.__table__.delete())
+    for (kind, key), totals in listing_stats.aggregate(listings).items():
+        model = STATS_MODELS[kind]
+        db.session.add(model(**dict(zip(model.key_columns, key)), **totals))
+    db.session.commit()
+
+@app.route('/properties/<int:property_id>/price_history', methods=['GET'])
+def get_price_history(property_id):
+    model = ArchivedPriceChange if isinstance(find_listing(property_id), ArchivedProperty) else PriceChange
+    try:
+        query = model.query.filter_by(property_id=property_id)
+        if request.args.get('from'):
+            query = query.filter(model.changed_at >= parse_date(request.args['from']))
+        if request.args.get('to'):
+            query = query.filter(model.changed_at < parse_date(request.args['to']))
+        changes = query.order_by(model.changed_at, model.id).all()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'property_id': property_id,
+        'history': [{'price': change.price, 'changed_at': change.changed_at.isoformat()} for change in changes]
+    }), 200
+
+def photo_chunks(photo_model, photo_id, size):
+    chunk_size = app.config['MEDIA_ZIP_CHUNK_SIZE']
+    connection = db.session.connection(bind_arguments={'mapper': photo_model.__mapper__})
+    driver_connection = connection.connection.driver_connection
+    if connection.dialect.name == 'sqlite' and hasattr(driver_connection, 'blobopen'):
+        # SQLite materialises the whole value for every substr(), so slicing a large
+        # blob is quadratic; the incremental blob API reads it in place
+        with driver_connection.blobopen(photo_model.__tablename__, 'image_data', photo_id, readonly=True) as blob:
+            while chunk := blob.read(chunk_size):
+                yield chunk
+    else:
+        for offset in range(0, size, chunk_size):
+            yield bytes(db.session.scalar(db.select(db.func.substr(photo_model.image_data, offset + 1, chunk_size))
+                                          .where(photo_model.id == photo_id)))
+    # Don't hold a pooled connection while the client drains the next entry
+    db.session.remove()
+
+def media_filename(property_id, photo_id, mimetype):
+    extension = mimetypes.guess_extension(mimetype or '') or '.bin'
+    return f'property-{property_id}/photo-{photo_id}{extension}'
+
+@app.route('/properties/<int:property_id>/media.zip', methods=['GET'])
+def download_property_media(property_id):
+    prop = find_listing(property_id)
+    photo_model = ArchivedPropertyPhoto if isinstance(prop, ArchivedProperty) else PropertyPhoto
+    photos = db.session.query(photo_model.id, photo_model.mimetype, photo_model.created_at,
+                              db.func.length(photo_model.image_data).label('size')).filter(
+        photo_model.property_id == prop.id, photo_model.image_data.isnot(None)).order_by(photo_model.id).all()
+    entries = [zipstream.ZipEntry(
+        media_filename(prop.id, photo.id, photo.mimetype), photo.size, photo.created_at,
+        lambda photo_id=photo.id, size=photo.size: photo_chunks(photo_model, photo_id, size)) for photo in photos]
+    try:
+        zipstream.check_limits(entries)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 413
+    # Stored entries, so the length is known up front and clients get a real progress bar
+    return Response(stream_with_context(zipstream.stream_zip(entries)), mimetype='application/zip', headers={
+        'Content-Length': str(zipstream.archive_size(entries)),
+        'Content-Disposition': f'attachment; filename="property-{prop.id}-media.zip"',
+        'Cache-Control': 'no-store'})
+
+@app.route('/price_index', methods=['GET'])
+def get_price_index():
+    city = request.args.get('city')
+    if not city:
+        return jsonify({'error': 'city is required'}), 400
+    try:
+        sums = [db.func.sum(getattr(LocalityPriceIndex, column)).label(column) for column in
+                ('listing_count', 'price_sum', 'price_per_sqft_count', 'price_per_sqft_sum')]
+        query = db.session.query(LocalityPriceIndex.period, *sums).filter(
+            LocalityPriceIndex.city == listing_stats.normalize_key(city))
+        if request.args.get('locality'):
+            query = query.filter(LocalityPriceIndex.locality == listing_stats.normalize_key(request.args['locality']))
+        if request.args.get('from'):
+            query = query.filter(LocalityPriceIndex.period >= price_index.parse_month(request.args['from']))
+        if request.args.get('to'):
+            query = query.filter(LocalityPriceIndex.period <= price_index.parse_month(request.args['to']))
+        rows = query.group_by(LocalityPriceIndex.period).order_by(LocalityPriceIndex.period).all()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify([{
+        'period': row.period.strftime('%Y-%m'),
+        'listing_count': row.listing_count,
+        'avg_price': row.price_sum / row.listing_count if row.listing_count else None,
+        'avg_price_per_sqft': row.price_per_sqft_sum / row.price_per_sqft_count if row.price_per_sqft_count else None
+    } for row in rows]), 200
+
+@app.cli.command('backfill-price-history')
+def backfill_price_history():
+    tracked = db.session.query(PriceChange.property_id).distinct()
+    listings = db.session.query(Property.id, Property.price, Property.created_at).filter(
+        Property.price.isnot(None), Property.id.not_in(tracked)).all()
+    if listings:
+        db.session.execute(PriceChange.__table__.insert(), [
+            {'property_id': listing.id, 'price': listing.price, 'changed_at': listing.created_at or datetime.now()}
+            for listing in listings])
+        db.session.commit()
+    print(f"Backfilled price history for {len(listings)} properties")
+
+@app.cli.command('build-price-index')
+@click.option('--since', default=None, help='First month to rebuild, as YYYY-MM (default: all history).')
+def build_price_index(since):
+    history = {}
+    for model in (PriceChange, ArchivedPriceChange):
+        for change in db.session.query(model.property_id, model.changed_at, model.price).order_by(
+                model.property_id, model.changed_at, model.id).yield_per(10000):
+            history.setdefault(change.property_id, []).append((change.changed_at, change.price))
+    if not history:
+        print("No price history to index")
+        return
+    first_month = price_index.parse_month(since) if since else price_index.month_start(
+        min(changes[0][0] for changes in history.values()))
+    last_month = price_index.month_start(datetime.now())
+    # An archived listing left the market when it was archived
+    listings = (row._asdict() for row in db.session.query(
+        Property.id, Property.city, Property.locality, Property.area_value, Property.area_unit, Property.deleted_at
+    ).union_all(db.session.query(
+        ArchivedProperty.id, ArchivedProperty.city, ArchivedProperty.locality, ArchivedProperty.area_value,
+        ArchivedProperty.area_unit, ArchivedProperty.archived_at)))
+    series = price_index.locality_series(listings, history, first_month, last_month)
+
+    db.session.execute(LocalityPriceIndex.__table__.delete().where(LocalityPriceIndex.period >= first_month))
+    if series:
+        db.session.execute(LocalityPriceIndex.__table__.insert(), [
+            {'city': city, 'locality': locality, 'period': month, **totals}
+            for (city, locality, month), totals in series.items()])
+    db.session.commit()
+    print(f"Built {len(series)} locality price index points from {first_month:%Y-%m} to {last_month:%Y-%m}")
+
+def add_missing_columns(table, columns):
+    # For databases created before a column existed; returns the names it added
+    existing = {column['name'] for column in db.inspect(db.engine).get_columns(table)}
+    added = [(name, column_type) for name, column_type in columns if name not in existing]
+    for name, column_type in added:
+        db.session.execute(db.text(f'ALTER TABLE {table} ADD COLUMN {name} {column_type}'))
+    db.session.commit()
+    return [name for name, _ in added]
+
+def ensure_photo_placeholder_schema():
+    add_missing_columns('property_photo', [('placeholder', 'TEXT')])
+
+def ensure_photo_hash_schema():
+    hash_columns = [('dhash', 'VARCHAR(16)')] + [(f'dhash_band_{band}', 'INTEGER') for band in range(4)]
+    for name in add_missing_columns('property_photo', hash_columns):
+        db.session.execute(db.text(f'CREATE INDEX ix_property_photo_{name} ON property_photo ({name})'))
+    db.session.commit()
+
+def ensure_soft_delete_schema():
+    datetime_type = Property.__table__.c.deleted_at.type.compile(dialect=db.engine.dialect)
+    if add_missing_columns('property', [('deleted_at', datetime_type)]):
+        index = next(index for index in Property.__table__.indexes if index.name == 'ix_property_active_created_at')
+        index.create(db.session.connection())
+        db.session.commit()
+
+def ensure_version_schema():
+    # Rows written before optimistic locking all start at version 1
+    add_missing_columns('property', [('version', 'INTEGER NOT NULL DEFAULT 1')])
+
+def ensure_mediator_schema():
+    Mediator.__table__.create(db.engine, checkfirst=True)
+    columns = {column['name'] for column in db.inspect(db.engine).get_columns('property')}
+    if 'mediator_id' not in columns:
+        db.session.execute(db.text('ALTER TABLE property ADD COLUMN mediator_id INTEGER REFERENCES mediator (id)'))
+        db.session.execute(db.text('CREATE INDEX ix_property_mediator_id ON property (mediator_id)'))
+        db.session.commit()
+
+def ensure_photo_metadata_schema():
+    columns = {column['name'] for column in db.inspect(db.engine).get_columns('property_photo')}
+    for name, column_type in (('width', 'INTEGER'), ('height', 'INTEGER'), ('orientation', 'SMALLINT')):
+        if name not in columns:
+            db.session.execute(db.text(f'ALTER TABLE property_photo ADD COLUMN {name} {column_type}'))
+    db.session.commit()
+
+def ensure_location_key_schema():
+    for table in ('property', 'archived_property'):
+        columns = {column['name'] for column in db.inspect(db.engine).get_columns(table)}
+        for name, column_type in (('city_key', 'VARCHAR(100)'), ('locality_key', 'VARCHAR(100)'),
+                                  ('address_key', 'VARCHAR(200)')):
+            if name not in columns:
+                db.session.execute(db.text(f'ALTER TABLE {table} ADD COLUMN {name} {column_type}'))
+    db.session.commit()
+
+def ensure_schema():
+    for ensure in (ensure_photo_placeholder_schema, ensure_photo_hash_schema, ensure_soft_delete_schema,
+                   ensure_version_schema, ensure_mediator_schema, ensure_photo_metadata_schema,
+                   ensure_location_key_schema):
+        ensure()
+
+@app.cli.command('upgrade-schema')
+def upgrade_schema():
+    ensure_schema()
+    print("Schema is up to date")
+
+@app.cli.command('strip-photo-metadata')
+def strip_photo_metadata():
+    ensure_photo_metadata_schema()
+    photo_ids = [row.id for row in db.session.query(PropertyPhoto.id).filter(PropertyPhoto.width.is_(None))]
+    before = after = 0
+    for photo_id in photo_ids:
+        photo = db.session.get(PropertyPhoto, photo_id)
+        mimetype = sniff_mimetype(photo.image_data) or 'application/octet-stream'
+        if mimetype.startswith('image/'):
+            image_data, photo.width, photo.height, photo.orientation = ingest_image(photo.image_data, mimetype)
+            before += len(photo.image_data)
+            after += len(image_data)
+            if image_data != photo.image_data:
+                photo.image_data = image_data
+        photo.mimetype = mimetype
+        db.session.commit()
+    print(f"Processed {len(photo_ids)} photos, image bytes {before} -> {after}")
+
+@app.cli.command('migrate-mediators')
+def migrate_mediators():
+    ensure_mediator_schema()
+    listings = db.session.query(Property.id, Property.mediator_name, Property.mediator_contact).filter(
+        Property.mediator_id.is_(None)).all()
+    created = linked = 0
+    for group in group_listings(listings):
+        if group['phone']:
+            mediator = Mediator.query.filter_by(phone=group['phone']).first()
+        else:
+            mediator = Mediator.query.filter_by(name=group['name'], phone=None).first()
+        if mediator is None:
+            mediator = Mediator(name=group['name'], phone=group['phone'])
+            db.session.add(mediator)
+            db.session.flush()
+            created += 1
+        db.session.execute(Property.__table__.update().where(
+            Property.id.in_(group['listing_ids'])).values(mediator_id=mediator.id))
+        db.session.commit()
+        linked += len(group['listing_ids'])
+    print(f"Linked {linked} listings, created {created} mediators")
+
+@app.cli.command('index-features')
+def index_features():
+    property_ids = [row.id for row in db.session.query(Property.id).filter(Property.features.isnot(None))]
+    for property_id in property_ids:
+        sync_feature_tags(db.session.get(Property, property_id))
+        db.session.commit()
+    print(f"Indexed features for {len(property_ids)} properties across {FeatureTag.query.count()} tags")
+
+@app.cli.command('train-price-model')
+@click.option('--output', default=None, help='Model file to write (default: PRICE_MODEL_PATH).')
+def train_price_model(output):
+    started = time.perf_counter()
+    columns = ('property_type', 'city', 'locality', 'price', 'area_value', 'area_unit', 'bedrooms', 'bathrooms')
+    listings = []
+    # Archived listings are priced too, and keep localities that are sold out today
+    for model, query in ((Property, active_properties()), (ArchivedProperty, ArchivedProperty.query)):
+        listings.extend(row._asdict() for row in query.with_entities(
+            *[getattr(model, column) for column in columns]).filter(model.price > 0).yield_per(10000))
+    if not listings:
+        raise click.ClickException('No priced listings to train on')
+    trained = price_model.train(listings)
+    path = output or app.config['PRICE_MODEL_PATH']
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    trained.save(path)
+    print(f"Trained on {trained.header['listings']} listings across {len(trained.header['localities'])} localities "
+          f"in {time.perf_counter() - started:.1f}s, median error {trained.header['median_error']:.0%}; "
+          f"wrote {os.path.getsize(path)} bytes to {path}")
+
+def import_listing_batch(batch, model, flag_ratio):
+    # Listings go through the ORM so stats, search keys, feature tags, the change feed and
+    # saved-search alerts are maintained; the batch is scored in one vectorized call
+    estimates = model.estimate_many([values for _, values in batch]) if model is not None else [None] * len(batch)
+    flagged = 0
+    properties = []
+    for (line, values), estimate in zip(batch, estimates):
+        prop = Property(**values, created_at=datetime.now())
+        prop.mediator = resolve_mediator(prop.mediator_name, prop.mediator_contact)
+        sync_feature_tags(prop)
+        db.session.add(prop)
+        properties.append(prop)
+        if estimate is not None and prop.price and not 1 / flag_ratio <= prop.price / estimate <= flag_ratio:
+            print(f"Line {line}: price {prop.price:,.0f} is {prop.price / estimate:.2f}x the estimate {estimate:,.0f}")
+            flagged += 1
+    db.session.flush()
+    for prop in properties:
+        queue_search_alerts(prop)
+    db.session.commit()
+    return flagged
+
+@app.cli.command('import-listings')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', default=500, show_default=True, help='Listings inserted per transaction.')
+@click.option('--flag-ratio', default=3.0, show_default=True,
+              help='Report prices more than this many times above or below the model estimate.')
+def import_listings(path, batch_size, flag_ratio):
+    model = current_price_model()
+    if model is None:
+        print("No price model has been trained; prices will not be checked")
+    imported = flagged = skipped = 0
+    batch = []
+    with open(path, newline='', encoding='utf-8-sig') as csv_file:
+        for line, row in enumerate(csv.DictReader(csv_file), start=2):
+            try:
+                values = {field: parser(row[field]) for field, parser in UPDATABLE_PROPERTY_FIELDS.items()
+                          if row.get(field) not in (None, '')}
+                missing = [field for field in ('property_type', 'address', 'city', 'status') if field not in values]
+                if missing:
+                    raise ValueError(f"missing {', '.join(missing)}")
+            except ValueError as e:
+                print(f"Line {line}: skipped, {e}")
+                skipped += 1
+                continue
+            batch.append((line, values))
+            if len(batch) == batch_size:
+                flagged += import_listing_batch(batch, model, flag_ratio)
+                imported += len(batch)
+                batch = []
+    if batch:
+        flagged += import_listing_batch(batch, model, flag_ratio)
+        imported += len(batch)
+    print(f"Imported {imported} listings, skipped {skipped}, flagged {flagged} prices")
+
+@app.cli.command('index-locations')
+@click.option('--batch-size', default=500, show_default=True, help='Listings updated per transaction.')
+@click.option('--all', 'reindex_all', is_flag=True,
+              help='Also recompute keys that are already set, e.g. after the key format changes.')
+def index_locations(batch_size, reindex_all):
+    ensure_location_key_schema()
+    indexed = 0
+    for model in (Property, ArchivedProperty):
+        columns = [model.id] + [getattr(model, field) for field in locations.LOCATION_FIELDS]
+        query = db.session.query(*columns)
+        listings = (query if reindex_all else query.filter(model.city_key.is_(None))).all()
+        statement = model.__table__.update().where(model.id == db.bindparam('listing_id'))
+        for start in range(0, len(listings), batch_size):
+            db.session.execute(statement, [
+                {'listing_id': listing.id, **{f'{field}_key': locations.search_key(field, getattr(listing, field))
+                                              for field in locations.LOCATION_FIELDS}}
+                for listing in listings[start:start + batch_size]])
+            db.session.commit()
+        indexed += len(listings)
+    print(f"Indexed location keys for {indexed} listings")
+
+@app.cli.command('rebuild-stats')
+def rebuild_stats():
+    rebuild_listing_stats()
+    print(f"Rebuilt {LocationStats.query.count()} location and {MediatorStats.query.count()} mediator summary rows")
+
+@app.cli.command('purge-uploads')
+@click.option('--older-than-hours', default=24, show_default=True, help='Age of abandoned upload sessions to remove.')
+def purge_uploads(older_than_hours):
+    cutoff = datetime.fromtimestamp(time.time() - older_than_hours * 3600)
+    upload_ids = [row.id for row in db.session.query(UploadSession.id).filter(UploadSession.created_at < cutoff)]
+    discard_uploads(upload_ids)
+    db.session.commit()
+    remove_upload_files(upload_ids)
+    print(f"Removed {len(upload_ids)} abandoned upload sessions")
+
+@app.cli.command('purge-deleted')
+@click.option('--batch-size', default=20, show_default=True, help='Photos deleted per transaction.')
+@click.option('--pause', default=0.5, show_default=True, help='Seconds to sleep between batches.')
+def purge_deleted(batch_size, pause):
+    purged = purge_deleted_properties(batch_size, pause)
+    print(f"Purged {purged} deleted properties")
+
+@app.cli.command('archive-listings')
+@click.option('--older-than-days', default=None, type=int, help='Days since the last edit (default: ARCHIVE_AFTER_DAYS).')
+@click.option('--batch-size', default=20, show_default=True, help='Listings moved per transaction.')
+@click.option('--pause', default=0.5, show_default=True, help='Seconds to sleep between batches.')
+def archive_listings(older_than_days, batch_size, pause):
+    if older_than_days is None:
+        older_than_days = app.config['ARCHIVE_AFTER_DAYS']
+    archived = archive_inactive_properties(older_than_days, batch_size, pause)
+    print(f"Archived {archived} inactive properties")
+
+def admin_required(view):
+    @functools.wraps(view)
+    def check_admin_token(*args, **kwargs):
+        token = app.config['ADMIN_TOKEN']
+        if not token:
+            return jsonify({'error': 'Not found'}), 404
+        if not hmac.compare_digest(request.headers.get('Authorization', '').encode(), f'Bearer {token}'.encode()):
+            return jsonify({'error': 'Admin token required'}), 401, {'WWW-Authenticate': 'Bearer'}
+        return view(*args, **kwargs)
+    return check_admin_token
+
+def profile_window():
+    seconds = request.args.get('seconds', 10, type=float)
+    if not math.isfinite(seconds):
+        return None
+    return min(max(seconds, 0), app.config['PROFILE_MAX_SECONDS'])
+
+@app.route('/admin/profile/cpu', methods=['POST'])
+@admin_required
+def profile_cpu():
+    seconds = profile_window()
+    if seconds is None:
+        return jsonify({'error': 'seconds must be a finite number'}), 400
+    interval = request.args.get('interval', app.config['PROFILE_SAMPLE_INTERVAL'], type=float)
+    output_format = request.args.get('format', 'collapsed')
+    if output_format not in ('collapsed', 'speedscope'):
+        return jsonify({'error': 'format must be collapsed or speedscope'}), 400
+    if not math.isfinite(interval) or interval < 0.001:
+        return jsonify({'error': 'interval must be at least 0.001 seconds'}), 400
+    try:
+        profiler.start(interval, all_threads=request.args.get('threads') == 'all')
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 409
+    try:
+        # Samples the other worker threads while this one waits out the window
+        time.sleep(seconds)
+    finally:
+        profiler.stop()
+    if output_format == 'speedscope':
+        return Response(profiler.speedscope(f'{seconds:g}s window'), mimetype='application/json')
+    return Response(profiler.collapsed(), mimetype='text/plain')
+
+@app.route('/admin/profile/memory', methods=['POST'])
+@admin_required
+def profile_memory():
+    seconds = profile_window()
+    if seconds is None:
+        return jsonify({'error': 'seconds must be a finite number'}), 400
+    if not memory_profile_lock.acquire(blocking=False):
+        return jsonify({'error': 'A memory profile is already running'}), 409
+    try:
+        memory_diff = profiling.MemoryDiff(frames=request.args.get('frames', 1, type=int))
+        memory_diff.start()
+        time.sleep(seconds)
+        result = memory_diff.stop(limit=request.args.get('limit', 25, type=int))
+    finally:
+        memory_profile_lock.release()
+    return jsonify({'seconds': seconds, **result}), 200
+
+def parse_fields(values, option):
+    fields = {}
+    for value in values:
+        name, separator, field = value.partition('=')
+        if not separator:
+            raise click.BadParameter(f'expected name=value, got {value!r}', param_hint=option)
+        fields[name] = field
+    return fields
+
+@app.cli.command('profile-requests')
+@click.argument('path')
+@click.option('--method', default='GET', show_default=True, help='HTTP method to send.')
+@click.option('--count', default=100, show_default=True, help='Requests to send per pass.')
+@click.option('--form', 'form_fields', multiple=True, help='Form field to send, as name=value.')
+@click.option('--file', 'file_fields', multiple=True, help='File to upload, as field=path.')
+@click.option('--interval', default=None, type=float, help='Seconds between samples (default: PROFILE_SAMPLE_INTERVAL).')
+@click.option('--format', 'output_format', default='collapsed', show_default=True,
+              type=click.Choice(['collapsed', 'speedscope']), help='CPU profile output format.')
+@click.option('--output', default=None, help='File to write the CPU profile to (default: stdout).')
+@click.option('--memory', is_flag=True, help='Add a second pass under tracemalloc and print the allocation diff.')
+def profile_requests(path, method, count, form_fields, file_fields, interval, output_format, output, memory):
+    form = parse_fields(form_fields, '--form')
+    uploads = {field: (open(file_path, 'rb').read(), os.path.basename(file_path))
+               for field, file_path in parse_fields(file_fields, '--file').items()}
+
+    def send_requests():
+        statuses = Counter()
+        with app.test_client() as client:
+            for _ in range(count):
+                data = {**form, **{field: (BytesIO(content), name) for field, (content, name) in uploads.items()}}
+                response = client.open(path, method=method, data=data or None)
+                statuses[response.status_code] += 1
+                response.close()
+        return ', '.join(f'{times} x {status}' for status, times in sorted(statuses.items()))
+
+    profiler.start(interval or app.config['PROFILE_SAMPLE_INTERVAL'])
+    started = time.perf_counter()
+    try:
+        statuses = send_requests()
+    finally:
+        profiler.stop()
+    elapsed = time.perf_counter() - started
+    profile = profiler.speedscope(f'{method} {path}') if output_format == 'speedscope' else profiler.collapsed()
+    if output:
+        with open(output, 'w') as output_file:
+            output_file.write(profile)
+    else:
+        click.echo(profile, nl=False)
+    click.echo(f"{method} {path}: {count} requests in {elapsed:.2f}s ({statuses}), "
+               f"{profiler.sample_count} samples", err=True)
+
+    if memory:
+        memory_diff = profiling.MemoryDiff()
+        memory_diff.start()
+        send_requests()
+        click.echo(profiling.format_memory_diff(memory_diff.stop()), err=True)
+
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
+        ensure_schema()
+    if app.config['PURGE_INTERVAL_SECONDS'] and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_purger(app.config['PURGE_INTERVAL_SECONDS'])
+    if app.config['ARCHIVE_INTERVAL_SECONDS'] and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_archiver(app.config['ARCHIVE_INTERVAL_SECONDS'])
     app.run(debug=True)
@@ -0,0 +1,193 @@
+import json
+import random
+import asyncio
+from urllib.parse import parse_qs
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app import (app, ArchivedProperty, ArchivedPropertyPhoto, Property, PropertyPhoto, archive_scope,
+                 filter_properties, serialize_property)
+from imaging import PHOTO_VARIANT_WIDTHS, resize_image
+import compression
+
+ASYNC_DRIVERS = {
+    'mysql+pymysql': 'mysql+aiomysql',
+    'mysql+mysqlconnector': 'mysql+aiomysql',
+    'mysql': 'mysql+aiomysql',
+    'sqlite': 'sqlite+aiosqlite',
+}
+STREAM_CHUNK_SIZE = 256 * 1024
+
+
+def async_database_uri(uri):
+    driver, separator, rest = uri.partition('://')
+    return ASYNC_DRIVERS.get(driver, driver) + separator + rest
+
+
+class AsyncListingApp:
+    # ASGI variant of GET /properties and GET /property_photos/<id>. Reads go to
+    # a replica when DATABASE_REPLICA_URLS is set, like the sync RoutingSession.
+
+    def __init__(self, database_uri=None, replica_uris=None, chunk_size=STREAM_CHUNK_SIZE):
+        self.database_uri = database_uri or app.config['SQLALCHEMY_DATABASE_URI']
+        self.replica_uris = replica_uris if replica_uris is not None else app.config['SQLALCHEMY_REPLICA_URIS']
+        self.chunk_size = chunk_size
+        self.sessionmakers = None
+
+    def sessionmaker(self):
+        # A replica for one request; its sessions all read from the same database
+        if self.sessionmakers is None:
+            uris = self.replica_uris or [self.database_uri]
+            self.sessionmakers = [async_sessionmaker(create_async_engine(async_database_uri(uri)))
+                                  for uri in uris]
+        return random.choice(self.sessionmakers)
+
+    def session(self):
+        return self.sessionmaker()()
+
+    async def dispose(self):
+        for sessionmaker in self.sessionmakers or []:
+            await sessionmaker.kw['bind'].dispose()
+        self.sessionmakers = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    await self.dispose()
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+
+        if scope['method'] not in ('GET', 'HEAD'):
+            return await self.send_json(send, {'error': 'Method not allowed'}, 405)
+
+        path = scope['path'].rstrip('/')
+        args = {key: values[0] for key, values in parse_qs(scope['query_string'].decode('latin-1')).items()}
+        try:
+            if path == '/properties':
+                return await self.get_properties(scope, send, args)
+            if path.startswith('/property_photos/') and path.rsplit('/', 1)[1].isdigit():
+                return await self.serve_property_photo(scope, send, int(path.rsplit('/', 1)[1]), args)
+        except Exception as e:
+            print(f"Error serving {path}: {e}")
+            return await self.send_json(send, {'error': str(e)}, 500)
+        return await self.send_json(send, {'error': 'Not found'}, 404)
+
+    def url_root(self, scope):
+        headers = dict(scope['headers'])
+        host = headers.get(b'host', b'localhost').decode('latin-1')
+        return f"{scope.get('scheme', 'http')}://{host}"
+
+    async def get_properties(self, scope, send, args):
+        archived = archive_scope(args)
+        if archived is None:
+            return await self.send_json(send, {'error': 'archived must be one of exclude, include, only'}, 400)
+        sources = []
+        if archived != 'only':
+            sources.append((filter_properties(select(Property).where(Property.deleted_at.is_(None)), args), PropertyPhoto))
+        if archived != 'exclude':
+            sources.append((filter_properties(select(ArchivedProperty), args, ArchivedProperty)
+                            .order_by(ArchivedProperty.id), ArchivedPropertyPhoto))
+
+        properties_list = []
+        async with self.session() as db_session:
+            for query, photo_model in sources:
+                properties = (await db_session.execute(query)).scalars().all()
+
+                photos_by_property = {}
+                if properties:
+                    photo_rows = await db_session.execute(
+                        select(photo_model.id, photo_model.property_id)
+                        .where(photo_model.property_id.in_([prop.id for prop in properties]))
+                        .order_by(photo_model.id))
+                    for photo in photo_rows:
+                        photos_by_property.setdefault(photo.property_id, []).append({
+                            'id': photo.id,
+                            'image_url': f"{self.url_root(scope)}/property_photos/{photo.id}"
+                        })
+
+                properties_list += [serialize_property(prop, photos_by_property.get(prop.id, [])) for prop in properties]
+        await self.send_json(send, properties_list, 200, scope)
+
+    async def serve_property_photo(self, scope, send, photo_id, args):
+        # The replica is chosen once, so a photo is never stitched together from replicas
+        # at different replication points; each read is still on a short-lived connection
+        sessionmaker = self.sessionmaker()
+        photo_model = PropertyPhoto
+        width = int(args['w']) if args.get('w', '').isdigit() else None
+        image_data = None
+        async with sessionmaker() as db_session:
+            photo = (await db_session.execute(
+                select(PropertyPhoto.mimetype, func.length(PropertyPhoto.image_data).label('size'))
+                .join(Property)
+                .where(PropertyPhoto.id == photo_id, Property.deleted_at.is_(None)))).first()
+            if photo is None:
+                photo_model = ArchivedPropertyPhoto
+                photo = (await db_session.execute(
+                    select(ArchivedPropertyPhoto.mimetype, func.length(ArchivedPropertyPhoto.image_data).label('size'))
+                    .where(ArchivedPropertyPhoto.id == photo_id))).first()
+            if photo is not None and photo.size and width in PHOTO_VARIANT_WIDTHS.values() \
+                    and photo.mimetype.startswith('image/'):
+                image_data = (await db_session.execute(
+                    select(photo_model.image_data).where(photo_model.id == photo_id))).scalar()
+        if photo is None or not photo.size:
+            return await self.send_json(send, {'error': 'Photo not found or data missing'}, 404)
+
+        if image_data:
+            resized_data, resized_mimetype = await asyncio.to_thread(resize_image, image_data, width)
+            if resized_data:
+                await self.start_response(send, 200, resized_mimetype, len(resized_data))
+                return await send({'type': 'http.response.body', 'body': b'' if scope['method'] == 'HEAD' else resized_data})
+
+        await self.start_response(send, 200, photo.mimetype, photo.size)
+        if scope['method'] == 'HEAD':
+            return await send({'type': 'http.response.body', 'body': b''})
+        # Read the blob in slices, each on its own connection, so a slow client holds neither
+        # the whole blob in memory nor a pooled connection between chunks
+        for offset in range(0, photo.size, self.chunk_size):
+            async with sessionmaker() as db_session:
+                chunk = (await db_session.execute(
+                    select(func.substr(photo_model.image_data, offset + 1, self.chunk_size))
+                    .where(photo_model.id == photo_id))).scalar()
+            if not chunk:
+                # Deleted mid-stream: end the body short of Content-Length rather than fail
+                return await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+            await send({'type': 'http.response.body', 'body': bytes(chunk),
+                        'more_body': offset + self.chunk_size < photo.size})
+
+    async def start_response(self, send, status, mimetype, length):
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [
+                (b'content-type', mimetype.encode('latin-1')),
+                (b'content-length', str(length).encode('latin-1')),
+                (b'cache-control', b'public, max-age=31536000, immutable'),
+                (b'access-control-allow-origin', b'*'),
+            ]
+        })
+
+    async def send_json(self, send, payload, status, scope=None):
+        body = json.dumps(payload).encode('utf-8')
+        headers = [(b'content-type', b'application/json'), (b'access-control-allow-origin', b'*')]
+        if scope is not None and len(body) >= app.config['COMPRESS_MIN_SIZE']:
+            headers.append((b'vary', b'Accept-Encoding'))
+            encoding = compression.choose_encoding(dict(scope['headers']).get(b'accept-encoding', b'').decode('latin-1'))
+            if encoding:
+                body = await asyncio.to_thread(compression.compress, body, encoding, app.config['COMPRESS_GZIP_LEVEL'],
+                                               app.config['COMPRESS_BROTLI_LEVEL'])
+                headers.append((b'content-encoding', encoding.encode('latin-1')))
+        headers.append((b'content-length', str(len(body)).encode('latin-1')))
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': headers
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+
+application = AsyncListingApp()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark of listing search latency before and after archiving sold/rented listings.
+300k listings, 70% of them sold or rented more than ARCHIVE_AFTER_DAYS ago, each
+with a small photo row. The same /properties/snapshot searches are timed with
+everything in the hot table, then again after archive-listings has moved the
+inactive listings out (default scope, then archived=include).
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+ROWS = 300_000
+BATCH = 50_000
+SOLD_SHARE = 0.7
+REPEAT = 5
+CITIES = ['Hyderabad', 'Bengaluru', 'Mysuru', 'Vijayawada', 'Guntur', 'Warangal', 'Tirupati', 'Nellore']
+TYPES = ['Apartment', 'Land', 'House', 'Commercial']
+SEARCHES = ['', 'city=Guntur', 'property_type=House&min_price=2000000&max_price=6000000',
+            'city=hyd&bedrooms=3', 'page=20&per_page=50']
+
+temp_dir = tempfile.mkdtemp(prefix="bench_archival_")
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(temp_dir, 'bench.db')}")
+from app import app, db, Property, PropertyPhoto, archive_inactive_properties
+
+
+def seed(rng):
+    now = datetime.now()
+    for start in range(1, ROWS + 1, BATCH):
+        listings, photos = [], []
+        for n in range(start, start + BATCH):
+            sold = rng.random() < SOLD_SHARE
+            created_at = now - timedelta(days=rng.randrange(200, 1500) if sold else rng.randrange(0, 400))
+            listings.append({'id': n, 'property_type': rng.choice(TYPES), 'address': f'{n} Main Road',
+                             'city': rng.choice(CITIES), 'price': rng.randrange(500_000, 20_000_000, 10_000),
+                             'bedrooms': rng.randint(0, 5), 'status': 'Sold/Rented' if sold else 'Available',
+                             'created_at': created_at, 'updated_at': created_at + timedelta(days=60), 'version': 1})
+            photos.append({'property_id': n, 'image_data': b'\xff\xd8' + bytes(512), 'mimetype': 'image/jpeg'})
+        db.session.execute(Property.__table__.insert(), listings)
+        db.session.execute(PropertyPhoto.__table__.insert(), photos)
+        db.session.commit()
+
+
+def search_ms(client, suffix=''):
+    timings = {}
+    for search in SEARCHES:
+        path = f'/properties/snapshot?{search}{suffix}'
+        client.get(path)
+        started = time.perf_counter()
+        for _ in range(REPEAT):
+            assert client.get(path).status_code == 200
+        timings[search or '(no filters)'] = 1000 * (time.perf_counter() - started) / REPEAT
+    return timings
+
+
+def main():
+    rng = random.Random(42)
+    app.config['TESTING'] = True
+    try:
+        with app.app_context():
+            db.create_all()
+            seed(rng)
+            with app.test_client() as client:
+                before = search_ms(client)
+
+                started = time.perf_counter()
+                archived = archive_inactive_properties(app.config['ARCHIVE_AFTER_DAYS'], batch_size=1000, pause=0)
+                elapsed = time.perf_counter() - started
+                hot = db.session.query(db.func.count(Property.id)).scalar()
+                print(f"{ROWS} listings; archived {archived} in {elapsed:.1f}s, {hot} left in the hot table")
+
+                after = search_ms(client)
+                combined = search_ms(client, '&archived=include')
+
+            print(f"{'search':55} {'before':>9} {'after':>9} {'include':>9}")
+            for search in before:
+                print(f"{search:55} {before[search]:7.1f}ms {after[search]:7.1f}ms {combined[search]:7.1f}ms")
+            db.drop_all()
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    main()
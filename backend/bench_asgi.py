@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark of concurrent slow-client media downloads held by one server process.
+Sync: the Flask app on a single-threaded WSGI server (one sync worker).
+Async: asgi.application on uvicorn (one event loop).
+Each client requests the same 4 MB photo and reads it at ~400 KB/s.
+"""
+
+import os
+import sys
+import time
+import shutil
+import socket
+import tempfile
+import threading
+import subprocess
+import sqlalchemy as sa
+from datetime import datetime
+
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+from app import db, Property, PropertyPhoto
+
+CLIENTS = 100
+WINDOW_SECONDS = 5
+PHOTO_BYTES = 4 * 1024 * 1024
+READ_BYTES = 8 * 1024
+READ_PAUSE = 0.02
+
+SERVERS = {
+    'sync (WSGI, 1 worker)': [sys.executable, '-c',
+                              "from app import app; from werkzeug.serving import run_simple; "
+                              "run_simple('127.0.0.1', {port}, app, threaded=False)"],
+    'async (ASGI, 1 process)': [sys.executable, '-m', 'uvicorn', 'asgi:application',
+                                '--port', '{port}', '--log-level', 'warning'],
+}
+
+
+def seed(uri):
+    engine = sa.create_engine(uri)
+    db.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(Property.__table__.insert().values(
+            property_type='House', address='9 Ring Road', city='Kurnool', status='Available',
+            version=1, created_at=datetime.now()))
+        connection.execute(PropertyPhoto.__table__.insert().values(
+            property_id=1, image_data=os.urandom(PHOTO_BYTES), mimetype='video/mp4'))
+    engine.dispose()
+
+
+def wait_for_port(port):
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+def slow_client(port, deadline, first_bytes):
+    sock = socket.socket()
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, READ_BYTES)
+    sock.settimeout(0.5)
+    try:
+        sock.connect(('127.0.0.1', port))
+        sock.sendall(f"GET /property_photos/1 HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nConnection: close\r\n\r\n".encode())
+        while time.monotonic() < deadline:
+            try:
+                data = sock.recv(READ_BYTES)
+            except socket.timeout:
+                continue
+            if not data:
+                break
+            first_bytes.append(time.monotonic())
+            break
+        while time.monotonic() < deadline and sock.recv(READ_BYTES):
+            time.sleep(READ_PAUSE)
+    except OSError:
+        pass
+    finally:
+        sock.close()
+
+
+def run(name, command, port, uri):
+    env = dict(os.environ, DATABASE_URL=uri, PURGE_INTERVAL_SECONDS='0')
+    server = subprocess.Popen([part.format(port=port) for part in command], env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(port)
+        started = time.monotonic()
+        deadline = started + WINDOW_SECONDS
+        first_bytes = []
+        threads = [threading.Thread(target=slow_client, args=(port, deadline, first_bytes)) for _ in range(CLIENTS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        served = len(first_bytes)
+        median = sorted(first_bytes)[served // 2] - started if served else float('nan')
+        print(f"{name:24}: {served}/{CLIENTS} slow clients receiving within {WINDOW_SECONDS}s, "
+              f"median time to first byte {median:.2f}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    temp_dir = tempfile.mkdtemp(prefix="bench_asgi_")
+    uri = f"sqlite:///{os.path.join(temp_dir, 'bench.db')}"
+    seed(uri)
+    try:
+        for port, (name, command) in enumerate(SERVERS.items(), start=5101):
+            run(name, command, port, uri)
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the columnar search engine against the SQL path at 1M listings.
+SQL: filter_properties on active_properties(), newest first, ids only.
+Columnar: ColumnarIndex.search over the same filters.
+Also reports index build time and the memory held by the arrays.
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+ROWS = 1_000_000
+BATCH = 50_000
+REPEATS = 3
+CITIES = ['Hyderabad', 'Bengaluru', 'Mysuru', 'Vijayawada', 'Guntur', 'Warangal', 'Tirupati', 'Nellore',
+          'Kurnool', 'Hubballi', 'Mangaluru', 'Belagavi', 'Kakinada', 'Rajahmundry', 'Secunderabad']
+LOCALITIES = [f'Sector {n}' for n in range(200)]
+TYPES = ['Apartment', 'Land', 'House', 'Commercial']
+QUERIES = [
+    {'city': 'Hyderabad'},
+    {'min_price': '3000000', 'max_price': '6000000'},
+    {'property_type': 'Apartment', 'bedrooms': '3', 'city': 'bad'},
+    {'locality': 'Sector 17', 'max_price': '9000000'},
+    {'property_type': 'House', 'min_price': '20000000', 'bathrooms': '3'},
+]
+
+temp_dir = tempfile.mkdtemp(prefix="bench_columnar_")
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(temp_dir, 'bench.db')}")
+from app import app, db, Property, active_properties, filter_properties, listing_indexes, refresh_listing_index
+
+
+def seed(rng):
+    started = datetime(2020, 1, 1)
+    for start in range(0, ROWS, BATCH):
+        db.session.execute(Property.__table__.insert(), [{
+            'property_type': rng.choice(TYPES), 'address': f'{n} Main Road', 'city': rng.choice(CITIES),
+            'locality': rng.choice(LOCALITIES), 'price': rng.randrange(500_000, 50_000_000, 10_000),
+            'bedrooms': rng.randint(0, 5), 'bathrooms': rng.randint(0, 4), 'status': 'Available', 'version': 1,
+            'created_at': started + timedelta(minutes=n)} for n in range(start, start + BATCH)])
+        db.session.commit()
+
+
+def best_of(function):
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    rng = random.Random(41)
+    try:
+        with app.app_context():
+            db.create_all()
+            seed(rng)
+
+            started = time.perf_counter()
+            index = refresh_listing_index('search')
+            build = time.perf_counter() - started
+            print(f"{ROWS} listings; index built in {build:.1f}s, arrays hold {index.nbytes / 1024 / 1024:.1f} MiB")
+
+            for args in QUERIES:
+                sql_time, sql_ids = best_of(lambda: [row.id for row in filter_properties(active_properties(), args)
+                                                     .with_entities(Property.id)
+                                                     .order_by(Property.created_at.desc(), Property.id.desc())])
+                engine_time, engine_ids = best_of(lambda: index.search(args))
+                assert sql_ids == engine_ids.tolist()
+                query = '&'.join(f'{name}={value}' for name, value in args.items())
+                print(f"  {query:55} {len(sql_ids):>7} ids  SQL {1000 * sql_time:7.1f} ms  "
+                      f"columnar {1000 * engine_time:6.1f} ms  ({sql_time / engine_time:.0f}x)")
+            db.session.remove()
+            listing_indexes.clear()
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark of bytes on the wire for listing JSON with negotiated compression.
+Seeds 500 listings with realistic text fields, three photos each, and measures
+GET /properties (all 500) and GET /properties/snapshot?per_page=100 sent as
+identity, gzip and brotli at the configured levels.
+"""
+
+import os
+import sys
+import time
+import random
+from datetime import datetime, timedelta
+from io import BytesIO
+from PIL import Image
+
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+from app import app, db, Property, PropertyPhoto
+from imaging import make_placeholder
+
+LISTINGS = 500
+PHOTOS_PER_LISTING = 3
+CITIES = {'Hyderabad': ['Madhapur', 'Kondapur', 'Gachibowli'], 'Bengaluru': ['Whitefield', 'Jayanagar', 'Hebbal'],
+          'Vijayawada': ['Benz Circle', 'Patamata', 'Gunadala'], 'Mysuru': ['Kuvempunagar', 'Vijayanagar']}
+TYPES = ['Apartment', 'Land', 'House', 'Commercial']
+FEATURES = ['Parking', 'Lift', 'Gym', 'Power back up', 'Security', 'Garden', 'East facing', 'Corner plot']
+ENCODINGS = {'identity': 'identity', 'gzip': 'gzip', 'brotli': 'br'}
+
+
+def placeholder(rng):
+    buffer = BytesIO()
+    Image.effect_noise((64, 48), rng.randrange(20, 60)).convert('RGB').save(buffer, format='JPEG')
+    return make_placeholder(buffer.getvalue())
+
+
+def seed(rng):
+    for index in range(LISTINGS):
+        city = rng.choice(list(CITIES))
+        prop = Property(
+            property_type=rng.choice(TYPES), address=f'{rng.randint(1, 400)}, {rng.choice(["Main", "Cross", "Temple"])} Road',
+            city=city, locality=rng.choice(CITIES[city]), price=rng.randrange(1_500_000, 30_000_000, 50_000),
+            area_value=rng.randrange(600, 3000, 10), area_unit='sqft', bedrooms=rng.randint(1, 4),
+            bathrooms=rng.randint(1, 3), status='Available',
+            description=f'{rng.randint(1, 4)} BHK with {rng.choice(["covered", "open"])} parking, '
+                        f'{rng.randint(1, 20)} minutes from the bus stand. Ready to move.',
+            features=', '.join(rng.sample(FEATURES, 3)), mediator_name=f'Mediator {rng.randint(1, 40)}',
+            mediator_contact=f'98{rng.randrange(10**7, 10**8)}', listing_date=(datetime.now() - timedelta(days=rng.randint(0, 90))).date(),
+            created_at=datetime.now())
+        prop.photos = [PropertyPhoto(image_data=b'\xff\xd8', mimetype='image/jpeg', placeholder=placeholder(rng))
+                       for _ in range(PHOTOS_PER_LISTING)]
+        db.session.add(prop)
+    db.session.commit()
+
+
+def measure(client, path):
+    sizes = {}
+    for name, accept in ENCODINGS.items():
+        started = time.perf_counter()
+        response = client.get(path, headers={'Accept-Encoding': accept})
+        elapsed = time.perf_counter() - started
+        assert response.status_code == 200
+        assert response.headers.get('Content-Encoding', 'identity') == accept
+        sizes[name] = (len(response.data), elapsed)
+    identity = sizes['identity'][0]
+    print(f"{path}")
+    for name, (size, elapsed) in sizes.items():
+        print(f"  {name:9}: {size / 1024:7.1f} KiB ({100 * size / identity:5.1f}%), {1000 * elapsed:6.1f} ms per request")
+
+
+def main():
+    rng = random.Random(39)
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            seed(rng)
+            print(f"gzip level {app.config['COMPRESS_GZIP_LEVEL']}, brotli quality {app.config['COMPRESS_BROTLI_LEVEL']}")
+            measure(client, '/properties')
+            measure(client, '/properties/snapshot?per_page=100')
+            db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
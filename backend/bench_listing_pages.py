@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark of time to first byte and modelled first paint for the listing page.
+Server-rendered: GET /listings, cold fragment cache (first visit to each page)
+and warm (second visit). Client-rendered: the React shell, then the JS bundle,
+then GET /properties/snapshot before PropertyList.js can paint any card.
+Each listing has one photo with a placeholder. TTFB is measured over HTTP against
+a local threaded server. First paint is modelled on the tier-2 mobile link
+bench_snapshot.py uses, with gzip on. The bundle download and JS execution are
+left out of the client-rendered figure, so it is a lower bound.
+"""
+
+import os
+import sys
+import time
+import random
+import logging
+import threading
+import http.client
+from io import BytesIO
+from datetime import datetime, timedelta
+from statistics import median
+from PIL import Image
+from werkzeug.serving import make_server
+
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+from app import app, db, Property, PropertyPhoto
+from imaging import make_placeholder
+
+ROWS = 5000
+PAGES = 40
+PER_PAGE = 20
+PHOTO_SAMPLES = 37
+PORT = 5103
+RTT_SECONDS = 0.15
+BANDWIDTH_BYTES_PER_SECOND = 1.5e6 / 8
+SHELL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'frontend', 'public', 'index.html')
+CITIES = ['Hyderabad', 'Vijayawada', 'Guntur', 'Warangal', 'Tirupati', 'Nellore']
+TYPES = ['Apartment', 'Land', 'House', 'Commercial']
+
+
+def sample_photo(rng):
+    base = Image.new('RGB', (1200, 900), (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    noise = Image.effect_noise((1200, 900), 60).convert('RGB')
+    buffer = BytesIO()
+    Image.blend(base, noise, 0.4).save(buffer, format='JPEG', quality=80)
+    return buffer.getvalue()
+
+
+def seed(rng):
+    photos = [sample_photo(rng) for _ in range(PHOTO_SAMPLES)]
+    placeholders = [make_placeholder(photo) for photo in photos]
+    now = datetime.now()
+    db.session.execute(Property.__table__.insert(), [{
+        'id': n, 'property_type': rng.choice(TYPES), 'address': f'{n} Main Road', 'city': rng.choice(CITIES),
+        'locality': f'Sector {rng.randrange(30)}', 'price': rng.randrange(1_000_000, 20_000_000, 10_000),
+        'bedrooms': rng.randint(1, 5), 'bathrooms': rng.randint(1, 4), 'status': 'Available',
+        'description': 'Well ventilated, close to schools and the bus stand. ' * 3,
+        'created_at': now - timedelta(minutes=n), 'updated_at': now, 'version': 1} for n in range(1, ROWS + 1)])
+    db.session.execute(PropertyPhoto.__table__.insert(), [{
+        'property_id': n, 'image_data': photos[n % PHOTO_SAMPLES], 'mimetype': 'image/jpeg',
+        'placeholder': placeholders[n % PHOTO_SAMPLES],
+        'width': 1200, 'height': 900} for n in range(1, ROWS + 1)])
+    db.session.commit()
+
+
+def fetch(path):
+    connection = http.client.HTTPConnection('127.0.0.1', PORT)
+    started = time.perf_counter()
+    connection.request('GET', path, headers={'Accept-Encoding': 'gzip', 'Accept-Language': 'en'})
+    response = connection.getresponse()
+    first_byte = time.perf_counter() - started
+    body = response.read()
+    connection.close()
+    assert response.status == 200, path
+    return first_byte, len(body)
+
+
+def first_paint(ttfb, size):
+    return RTT_SECONDS + ttfb + size / BANDWIDTH_BYTES_PER_SECOND
+
+
+def main():
+    rng = random.Random(42)
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        seed(rng)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', PORT, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        paths = [f'/listings?page={page}&per_page={PER_PAGE}' for page in range(1, PAGES + 1)]
+        cold = [fetch(path) for path in paths]
+        warm = [fetch(path) for path in paths]
+        snapshot = [fetch(f'/properties/snapshot?page={page}&per_page={PER_PAGE}') for page in range(1, PAGES + 1)]
+        shell_bytes = len(open(SHELL_PATH, 'rb').read())
+
+        for name, results in (('SSR, cold fragments', cold), ('SSR, warm fragments', warm)):
+            ttfb, size = median(result[0] for result in results), median(result[1] for result in results)
+            print(f"{name:22}: TTFB {ttfb * 1000:6.1f} ms, {size / 1024:5.1f} KiB gzip, "
+                  f"modelled first paint {first_paint(ttfb, size):.2f} s")
+        ttfb, size = median(result[0] for result in snapshot), median(result[1] for result in snapshot)
+        paint = first_paint(0, shell_bytes) + RTT_SECONDS + first_paint(ttfb, size)
+        print(f"{'Client-rendered':22}: snapshot TTFB {ttfb * 1000:6.1f} ms, {size / 1024:5.1f} KiB gzip after the "
+              f"shell and bundle, modelled first paint >= {paint:.2f} s (bundle bytes excluded)")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark of location autocomplete at 200k listings in 5k localities.
+SQL: the distinct city and locality names matching ilike('%q%'), as a client
+would get them from the listing table without an index.
+Index: GET /locations/suggest, end to end through the Flask test client, for
+Latin prefixes, Telugu prefixes and misspellings.
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import logging
+import tempfile
+
+import numpy as np
+
+ROWS = 200_000
+BATCH = 50_000
+QUERIES = 300
+SYLLABLES = ['ka', 'ra', 'pa', 'li', 'gu', 'na', 'va', 'da', 'ma', 'la', 'ti', 'ru', 'pe', 'ko', 'ba', 'sri', 'che', 'ho']
+SUFFIXES = ['pur', 'abad', 'palli', 'nagar', 'peta', 'guda', 'ur', 'wada', 'colony', 'hills']
+# Real cities, half of whose listings are typed in Telugu
+TELUGU_CITIES = {'Hyderabad': 'హైదరాబాద్', 'Vijayawada': 'విజయవాడ', 'Guntur': 'గుంటూరు', 'Warangal': 'వరంగల్',
+                 'Tirupati': 'తిరుపతి', 'Nellore': 'నెల్లూరు', 'Kakinada': 'కాకినాడ', 'Secunderabad': 'సికింద్రాబాద్'}
+CITY_COUNT = 60
+LOCALITIES_PER_CITY = 80
+
+temp_dir = tempfile.mkdtemp(prefix="bench_locations_")
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(temp_dir, 'bench.db')}")
+from app import app, db, Property, current_location_index, rebuild_listing_stats
+import app as app_module
+from locations import location_key
+
+
+def place_name(rng):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).title() + rng.choice(SUFFIXES)
+
+
+def seed(rng):
+    cities = list(TELUGU_CITIES)
+    while len(cities) < CITY_COUNT:
+        name = place_name(rng)
+        if location_key(name) not in {location_key(city) for city in cities}:
+            cities.append(name)
+    localities = {city: [place_name(rng) for _ in range(LOCALITIES_PER_CITY)] for city in cities}
+    for start in range(0, ROWS, BATCH):
+        listings = []
+        for n in range(start, start + BATCH):
+            city = rng.choice(cities)
+            typed = TELUGU_CITIES[city] if city in TELUGU_CITIES and rng.random() < 0.5 else city
+            listings.append({'property_type': 'House', 'address': f'{n} Main Road', 'city': typed,
+                             'locality': rng.choice(localities[city]), 'status': 'Available', 'version': 1})
+        db.session.execute(Property.__table__.insert(), listings)
+        db.session.commit()
+    return cities, localities
+
+
+def queries(rng, cities, localities):
+    names = cities + [name for names in localities.values() for name in names]
+    batch = []
+    for _ in range(QUERIES):
+        kind = rng.random()
+        if kind < 0.4:
+            name = rng.choice(names)
+            batch.append(name[:rng.randint(2, 6)].lower())
+        elif kind < 0.7:
+            telugu = rng.choice(list(TELUGU_CITIES.values()))
+            batch.append(telugu[:rng.randint(2, len(telugu))])
+        else:
+            name = list(rng.choice(names).lower())
+            position = rng.randrange(1, len(name) - 1)
+            name[position], name[position + 1] = name[position + 1], name[position]
+            batch.append(''.join(name))
+    return batch
+
+
+def sql_suggest(text, limit=10):
+    names = []
+    for column in (Property.city, Property.locality):
+        names += db.session.query(column, db.func.count(Property.id)).filter(
+            Property.deleted_at.is_(None), column.ilike(f'%{text}%')).group_by(column).order_by(
+            db.func.count(Property.id).desc()).limit(limit).all()
+    return names[:limit]
+
+
+def main():
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    rng = random.Random(42)
+    try:
+        with app.app_context():
+            db.create_all()
+            cities, localities = seed(rng)
+            rebuild_listing_stats()
+            batch = queries(rng, cities, localities)
+
+            started = time.perf_counter()
+            index = current_location_index()
+            print(f"{ROWS} listings, {len(index.entries)} places; index built in "
+                  f"{1000 * (time.perf_counter() - started):.0f} ms")
+            index.loaded_at = 0
+            started = time.perf_counter()
+            current_location_index()
+            print(f"Refreshing counts after LOCATION_INDEX_TTL: {1000 * (time.perf_counter() - started):.1f} ms")
+
+            timings = []
+            for text in batch[:30]:
+                started = time.perf_counter()
+                sql_suggest(text)
+                timings.append(1000 * (time.perf_counter() - started))
+            print(f"SQL ilike : {np.median(timings):7.2f} ms median, {np.percentile(timings, 99):.2f} ms p99 "
+                  f"(Telugu queries never match Latin names)")
+
+            client = app.test_client()
+            timings = []
+            hits = 0
+            for text in batch:
+                started = time.perf_counter()
+                response = client.get('/locations/suggest', query_string={'q': text})
+                timings.append(1000 * (time.perf_counter() - started))
+                hits += bool(response.get_json())
+            print(f"Suggest   : {np.median(timings):7.2f} ms median, {np.percentile(timings, 99):.2f} ms p99 "
+                  f"per request; {hits}/{len(batch)} queries with suggestions")
+            db.session.remove()
+            app_module.location_index = None
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    main()
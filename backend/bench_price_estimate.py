@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark of batch-trained price estimates at 300k listings.
+Training: `flask train-price-model` end to end (reading the catalog, fitting,
+writing the file), then the file size and the time to memory-map it.
+Scoring: PriceModel.estimate per listing, estimate_many per row in a batch, and
+GET /properties/estimate through the Flask test client.
+Accuracy: median absolute error on a 10% holdout, against the median price of
+the same locality and type (comparing by hand with get_properties).
+"""
+
+import os
+import sys
+import math
+import time
+import random
+import shutil
+import logging
+import tempfile
+
+import numpy as np
+
+ROWS = 300_000
+BATCH = 50_000
+SCORED = 20_000
+REQUESTS = 500
+CITIES = ['Hyderabad', 'Bengaluru', 'Mysuru', 'Vijayawada', 'Guntur', 'Warangal', 'Tirupati', 'Nellore']
+LOCALITIES = [f'Sector {n}' for n in range(150)]
+TYPES = {'Apartment': 0.0, 'House': 0.25, 'Land': -0.6, 'Commercial': 0.4}
+UNITS = ['sqft', 'sqft', 'sqft', 'sqm', 'gunta']
+
+temp_dir = tempfile.mkdtemp(prefix="bench_price_estimate_")
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(temp_dir, 'bench.db')}")
+os.environ.setdefault('PRICE_MODEL_PATH', os.path.join(temp_dir, 'price_model.bin'))
+from app import app, db, Property
+from listing_stats import canonical_area_sqft
+import price_model
+
+
+def synthetic_listings(rng):
+    city_effects = {city: rng.gauss(0, 0.4) for city in CITIES}
+    locality_effects = {(city, locality): rng.gauss(0, 0.3) for city in CITIES for locality in LOCALITIES}
+    listings = []
+    for _ in range(ROWS):
+        city, locality, property_type = rng.choice(CITIES), rng.choice(LOCALITIES), rng.choice(list(TYPES))
+        unit = rng.choice(UNITS)
+        area_value = round(rng.uniform(400, 4000) / canonical_area_sqft(1, unit), 2)
+        bedrooms = rng.choice([None, 1, 2, 3, 4])
+        log_price = (13 + TYPES[property_type] + city_effects[city] + locality_effects[city, locality]
+                     + 0.85 * math.log(canonical_area_sqft(area_value, unit)) + 0.04 * (bedrooms or 2)
+                     + rng.gauss(0, 0.2))
+        listings.append({'property_type': property_type, 'address': 'Main Road', 'city': city, 'locality': locality,
+                         'price': round(math.exp(log_price), -3), 'area_value': area_value, 'area_unit': unit,
+                         'bedrooms': bedrooms, 'bathrooms': None, 'status': 'Available', 'version': 1})
+    return listings
+
+
+def holdout_errors(listings):
+    split = len(listings) * 9 // 10
+    train, test = listings[:split], listings[split:]
+    model = price_model.train(train)
+    prices = np.array([listing['price'] for listing in test])
+    model_error = np.median(np.abs(model.estimate_many(test) / prices - 1))
+
+    by_group = {}
+    for listing in train:
+        by_group.setdefault((listing['city'], listing['locality'], listing['property_type']), []).append(listing['price'])
+    medians = {group: np.median(group_prices) for group, group_prices in by_group.items()}
+    baseline = np.array([medians[listing['city'], listing['locality'], listing['property_type']] for listing in test])
+    return model_error, np.median(np.abs(baseline / prices - 1))
+
+
+def main():
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    rng = random.Random(42)
+    try:
+        listings = synthetic_listings(rng)
+        with app.app_context():
+            db.create_all()
+            for start in range(0, ROWS, BATCH):
+                db.session.execute(Property.__table__.insert(), listings[start:start + BATCH])
+                db.session.commit()
+
+            started = time.perf_counter()
+            result = app.test_cli_runner().invoke(args=['train-price-model'])
+            print(result.output.strip())
+            print(f"train-price-model: {time.perf_counter() - started:.1f}s end to end")
+
+            path = app.config['PRICE_MODEL_PATH']
+            started = time.perf_counter()
+            model = price_model.PriceModel.load(path)
+            print(f"Model file: {os.path.getsize(path) / 1024:.1f} KiB, mapped in "
+                  f"{1000 * (time.perf_counter() - started):.2f} ms")
+
+            sample = listings[:SCORED]
+            started = time.perf_counter()
+            for listing in sample:
+                model.estimate(listing)
+            print(f"estimate      : {1e6 * (time.perf_counter() - started) / SCORED:6.2f} us per listing")
+            started = time.perf_counter()
+            model.estimate_many(sample)
+            print(f"estimate_many : {1e6 * (time.perf_counter() - started) / SCORED:6.2f} us per listing")
+
+            client = app.test_client()
+            timings = []
+            for listing in sample[:REQUESTS]:
+                query = {field: listing[field] for field in ('property_type', 'area_value', 'area_unit', 'bedrooms',
+                                                             'city', 'locality') if listing[field] is not None}
+                started = time.perf_counter()
+                client.get('/properties/estimate', query_string=query)
+                timings.append(1000 * (time.perf_counter() - started))
+            print(f"GET /properties/estimate: {np.median(timings):.2f} ms median, "
+                  f"{np.percentile(timings, 99):.2f} ms p99")
+
+            model_error, baseline_error = holdout_errors(listings)
+            print(f"Holdout median error: model {model_error:.1%}, locality+type median price {baseline_error:.1%}")
+            db.session.remove()
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark of price time-series queries over 100k listings with ~6 price changes each.
+1. One listing's history in a date range: (property_id, changed_at) index versus
+   the same table without it.
+2. A city's monthly average price over three years: replaying raw history per
+   request versus reading the series precomputed by build-price-index.
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+ROWS = 100_000
+BATCH = 20_000
+QUERIES = 20
+START = datetime(2023, 1, 1)
+DAYS = 3 * 365
+CITIES = ['Hyderabad', 'Bengaluru', 'Mysuru', 'Vijayawada', 'Guntur', 'Warangal', 'Tirupati', 'Nellore']
+LOCALITIES = [f'Sector {n}' for n in range(40)]
+
+temp_dir = tempfile.mkdtemp(prefix="bench_price_index_")
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(temp_dir, 'bench.db')}")
+from app import app, db, Property, PriceChange, build_price_index
+import price_index
+
+
+def seed(rng):
+    for start in range(0, ROWS, BATCH):
+        listings, changes = [], []
+        for n in range(start + 1, start + BATCH + 1):
+            listings.append({'id': n, 'property_type': 'Flat', 'address': f'{n} Main Road', 'city': rng.choice(CITIES),
+                             'locality': rng.choice(LOCALITIES), 'area_value': rng.randrange(400, 3000),
+                             'area_unit': 'sqft', 'status': 'Available', 'version': 1})
+            price = rng.randrange(1_000_000, 20_000_000, 10_000)
+            changed_at = START + timedelta(days=rng.randrange(DAYS // 2))
+            while changed_at < START + timedelta(days=DAYS):
+                changes.append({'property_id': n, 'price': price, 'changed_at': changed_at})
+                price = round(price * rng.uniform(0.95, 1.08), -4)
+                changed_at += timedelta(days=rng.randrange(30, 180))
+        db.session.execute(Property.__table__.insert(), listings)
+        db.session.execute(PriceChange.__table__.insert(), changes)
+        db.session.commit()
+
+
+def timed(function, arguments):
+    started = time.perf_counter()
+    for argument in arguments:
+        function(argument)
+    return 1000 * (time.perf_counter() - started) / len(arguments)
+
+
+def history_range(property_id):
+    return db.session.query(PriceChange.price, PriceChange.changed_at).filter(
+        PriceChange.property_id == property_id, PriceChange.changed_at >= datetime(2024, 1, 1),
+        PriceChange.changed_at < datetime(2025, 1, 1)).order_by(PriceChange.changed_at).all()
+
+
+def raw_city_series(city):
+    listings = [row._asdict() for row in db.session.query(
+        Property.id, Property.city, Property.locality, Property.area_value, Property.area_unit,
+        Property.deleted_at).filter(Property.city == city)]
+    history = {}
+    for change in db.session.query(PriceChange.property_id, PriceChange.changed_at, PriceChange.price).join(
+            Property).filter(Property.city == city).order_by(PriceChange.property_id, PriceChange.changed_at):
+        history.setdefault(change.property_id, []).append((change.changed_at, change.price))
+    return price_index.locality_series(listings, history, price_index.month_start(START),
+                                       price_index.month_start(START + timedelta(days=DAYS - 1)))
+
+
+def main():
+    rng = random.Random(42)
+    try:
+        with app.app_context():
+            db.create_all()
+            seed(rng)
+            total = PriceChange.query.count()
+            print(f"{ROWS} listings, {total} price changes")
+
+            ids = [rng.randint(1, ROWS) for _ in range(QUERIES)]
+            indexed_ms = timed(history_range, ids)
+            db.session.execute(db.text('DROP INDEX ix_price_change_property_changed_at'))
+            scan_ms = timed(history_range, ids)
+            db.session.execute(db.text('CREATE INDEX ix_price_change_property_changed_at '
+                                       'ON price_change (property_id, changed_at)'))
+            db.session.commit()
+            print(f"History  : {scan_ms:.1f} ms without the index, {indexed_ms:.2f} ms with it "
+                  f"({scan_ms / indexed_ms:.0f}x faster)")
+
+            started = time.perf_counter()
+            app.test_cli_runner().invoke(build_price_index)
+            print(f"Batch    : build-price-index over the full history in {time.perf_counter() - started:.1f}s")
+
+            cities = [rng.choice(CITIES) for _ in range(5)]
+            raw_ms = timed(raw_city_series, cities)
+            with app.test_client() as client:
+                series_ms = timed(lambda city: client.get(f'/price_index?city={city}&from=2023-01&to=2025-12'), cities)
+            print(f"Series   : {raw_ms:.0f} ms replaying raw history, {series_ms:.1f} ms from /price_index "
+                  f"({raw_ms / series_ms:.0f}x faster)")
+            db.drop_all()
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the profilers' overhead on request throughput.
+Four client threads call GET /properties/snapshot and POST /properties (with a
+photo) over HTTP against a local threaded server for a fixed window: first with
+no profile running, then inside a CPU sampling window at 5 ms and 1 ms, then
+inside a tracemalloc window. Modes alternate over five rounds and the median is
+kept; the CPU the sampler thread spent walking stacks is reported alongside.
+"""
+
+import os
+import sys
+import time
+import random
+import logging
+import threading
+import http.client
+import uuid
+import shutil
+import tempfile
+from io import BytesIO
+from datetime import datetime, timedelta
+from statistics import median
+from PIL import Image
+from werkzeug.serving import make_server
+
+temp_dir = tempfile.mkdtemp(prefix="bench_profiling_")
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(temp_dir, 'bench.db')}")
+from app import app, db, profiler, rebuild_listing_stats, Property
+import profiling
+
+ROWS = 2000
+CLIENTS = 4
+WINDOW_SECONDS = 3
+RUNS = 5
+PORT = 5104
+CITIES = ['Hyderabad', 'Vijayawada', 'Guntur', 'Warangal', 'Tirupati', 'Nellore']
+TYPES = ['Apartment', 'Land', 'House', 'Commercial']
+
+
+def seed(rng):
+    now = datetime.now()
+    db.session.execute(Property.__table__.insert(), [{
+        'id': n, 'property_type': rng.choice(TYPES), 'address': f'{n} Main Road', 'city': rng.choice(CITIES),
+        'price': rng.randrange(1_000_000, 20_000_000, 10_000), 'bedrooms': rng.randint(1, 5), 'status': 'Available',
+        'created_at': now - timedelta(minutes=n), 'updated_at': now, 'version': 1} for n in range(1, ROWS + 1)])
+    db.session.commit()
+
+
+def sample_photo():
+    buffer = BytesIO()
+    Image.effect_noise((800, 600), 60).convert('RGB').save(buffer, format='JPEG', quality=80)
+    return buffer.getvalue()
+
+
+def upload_body(photo):
+    boundary = uuid.uuid4().hex
+    parts = [f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+             for name, value in (('property_type', 'House'), ('address', '7 Lake View'), ('city', 'Guntur'),
+                                 ('status', 'Available'))]
+    parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="photos"; filename="front.jpg"\r\n'
+                 f'Content-Type: image/jpeg\r\n\r\n'.encode() + photo + f'\r\n--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+def drive(method, path, body, content_type):
+    # Requests completed per second by CLIENTS threads over WINDOW_SECONDS
+    deadline = time.perf_counter() + WINDOW_SECONDS
+    counts = [0] * CLIENTS
+
+    def client(slot):
+        connection = http.client.HTTPConnection('127.0.0.1', PORT)
+        headers = {'Content-Type': content_type} if content_type else {}
+        while time.perf_counter() < deadline:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            assert response.status in (200, 201), response.status
+            counts[slot] += 1
+        connection.close()
+
+    threads = [threading.Thread(target=client, args=(slot,)) for slot in range(CLIENTS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / WINDOW_SECONDS
+
+
+def measure(modes, request):
+    # Modes take turns within each round so drift on the machine hits all of them
+    rates = {mode: [] for mode in modes}
+    sampler_share = {mode: [] for mode in modes}
+    for _ in range(RUNS):
+        for mode, (start, stop) in modes.items():
+            start()
+            try:
+                rates[mode].append(drive(*request))
+            finally:
+                stop()
+            if mode.startswith('CPU'):
+                sampler_share[mode].append(profiler.sampler_seconds / WINDOW_SECONDS)
+    return {mode: (median(rates[mode]), median(sampler_share[mode]) if sampler_share[mode] else None)
+            for mode in modes}
+
+
+def main():
+    rng = random.Random(42)
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        seed(rng)
+        # Summary rows must exist up front: concurrent first inserts for a new city race
+        rebuild_listing_stats()
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', PORT, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    memory_diff = profiling.MemoryDiff()
+    modes = {
+        'no profile': (lambda: None, lambda: None),
+        'CPU sampling, 5 ms': (lambda: profiler.start(0.005), profiler.stop),
+        'CPU sampling, 1 ms': (lambda: profiler.start(0.001), profiler.stop),
+        'tracemalloc window': (memory_diff.start, memory_diff.stop),
+    }
+    workloads = {
+        'GET /properties/snapshot': ('GET', '/properties/snapshot?per_page=20', None, None),
+        'POST /properties + photo': ('POST', '/properties', *upload_body(sample_photo())),
+    }
+    try:
+        for workload, request in workloads.items():
+            results = measure(modes, request)
+            baseline = results['no profile'][0]
+            for mode, (rate, sampler_share) in results.items():
+                sampler = f", sampler thread {100 * sampler_share:.1f}% of a core" if sampler_share is not None else ''
+                print(f"{workload:26} {mode:20}: {rate:7.1f} req/s ({100 * (rate / baseline - 1):+5.1f}%){sampler}")
+    finally:
+        server.shutdown()
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark of matching new listings against saved searches.
+Scan: evaluate every saved search predicate for each new listing.
+Indexed: queue_search_alerts, which only evaluates the searches filed under
+one of the listing's keys (city, price band, type, or match-all).
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import tempfile
+from datetime import datetime
+
+SEARCHES = 100_000
+LISTINGS = 50
+CITIES = ['Hyderabad', 'Bengaluru', 'Mysuru', 'Vijayawada', 'Guntur', 'Warangal', 'Tirupati', 'Nellore',
+          'Kurnool', 'Hubballi', 'Mangaluru', 'Belagavi', 'Kakinada', 'Rajahmundry', 'Ongole', 'Eluru',
+          'Anantapur', 'Kadapa', 'Davanagere', 'Ballari']
+TYPES = ['Apartment', 'Land', 'House', 'Commercial']
+
+temp_dir = tempfile.mkdtemp(prefix="bench_saved_searches_")
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(temp_dir, 'bench.db')}")
+from app import app, db, Property, SavedSearch, saved_search_key, queue_search_alerts
+from features import parse_features
+from saved_searches import compile_search, matches, search_keys
+
+
+def random_filters(rng):
+    # Most buyers pick a city; some shop by budget or type across cities
+    filters = {'bedrooms': rng.randint(1, 4)}
+    low = rng.randrange(1_000_000, 20_000_000, 500_000)
+    roll = rng.random()
+    if roll < 0.85:
+        filters['city'] = rng.choice(CITIES)
+        if rng.random() < 0.5:
+            filters['property_type'] = rng.choice(TYPES)
+        if rng.random() < 0.7:
+            filters.update(min_price=low, max_price=low * rng.choice([1.25, 1.5, 2]))
+    elif roll < 0.95:
+        filters.update(property_type=rng.choice(TYPES), min_price=low, max_price=low * rng.choice([1.25, 1.5, 2]))
+    else:
+        filters['property_type'] = rng.choice(TYPES)
+    return filters
+
+
+def seed(rng):
+    searches, keys = [], []
+    for search_id in range(1, SEARCHES + 1):
+        criteria = compile_search(random_filters(rng))
+        searches.append({'id': search_id, 'email': f'buyer{search_id}@example.com',
+                         'criteria': json.dumps(criteria), 'created_at': datetime.now()})
+        keys.extend({'key': key, 'saved_search_id': search_id} for key in search_keys(criteria))
+    db.session.execute(SavedSearch.__table__.insert(), searches)
+    db.session.execute(saved_search_key.insert(), keys)
+    db.session.commit()
+
+
+def new_listings(rng):
+    return [Property(property_type=rng.choice(TYPES), address=f'{index} Main Road', city=rng.choice(CITIES),
+                     status='Available', price=rng.randrange(1_000_000, 40_000_000, 100_000),
+                     bedrooms=rng.randint(1, 5), created_at=datetime.now()) for index in range(LISTINGS)]
+
+
+def scan_matches(prop):
+    listing = {'property_type': prop.property_type, 'city': prop.city, 'locality': prop.locality, 'price': prop.price,
+               'bedrooms': prop.bedrooms, 'bathrooms': prop.bathrooms, 'features': parse_features(prop.features)}
+    return [row.id for row in db.session.query(SavedSearch.id, SavedSearch.criteria)
+            if matches(json.loads(row.criteria), listing)]
+
+
+def main():
+    rng = random.Random(37)
+    try:
+        with app.app_context():
+            db.create_all()
+            seed(rng)
+            listings = new_listings(rng)
+            db.session.add_all(listings)
+            db.session.flush()
+
+            started = time.perf_counter()
+            scanned = [sorted(scan_matches(prop)) for prop in listings]
+            scan_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            indexed = [sorted(queue_search_alerts(prop)) for prop in listings]
+            indexed_seconds = time.perf_counter() - started
+            db.session.rollback()
+
+            assert scanned == indexed
+            total = sum(len(matched) for matched in indexed)
+            print(f"{SEARCHES} saved searches, {LISTINGS} new listings, {total} alerts ({total / LISTINGS:.0f} per listing)")
+            print(f"Scan     : {1000 * scan_seconds / LISTINGS:.1f} ms per listing")
+            print(f"Indexed  : {1000 * indexed_seconds / LISTINGS:.1f} ms per listing, including the outbox insert "
+                  f"({scan_seconds / indexed_seconds:.0f}x faster)")
+            db.session.remove()
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark of /properties/<id>/similar ranking at 500k listings.
+SQL: one ORDER BY <distance expression> LIMIT k scan per request, using the
+same features, weights and normalization as the index.
+Index: SimilarityIndex.similar over the precomputed feature matrix.
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+
+import numpy as np
+
+ROWS = 500_000
+BATCH = 50_000
+QUERIES = 20
+LIMIT = 10
+CITIES = ['Hyderabad', 'Bengaluru', 'Mysuru', 'Vijayawada', 'Guntur', 'Warangal', 'Tirupati', 'Nellore']
+LOCALITIES = [f'Sector {n}' for n in range(60)]
+TYPES = ['Apartment', 'Land', 'House', 'Commercial']
+UNITS = ['sqft', 'sqft', 'sqft', 'sqm', 'gunta']
+
+temp_dir = tempfile.mkdtemp(prefix="bench_similar_")
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(temp_dir, 'bench.db')}")
+from app import app, db, Property, listing_indexes, refresh_listing_index
+from listing_stats import SQFT_PER_UNIT
+from similarity import CITY_MISMATCH, FEATURE_WEIGHTS, LOCALITY_MISMATCH, TYPE_MISMATCH
+
+
+def seed(rng):
+    for start in range(0, ROWS, BATCH):
+        db.session.execute(Property.__table__.insert(), [{
+            'property_type': rng.choice(TYPES), 'address': f'{n} Main Road', 'city': rng.choice(CITIES),
+            'locality': rng.choice(LOCALITIES), 'price': rng.randrange(500_000, 50_000_000, 10_000) if rng.random() > 0.05 else None,
+            'area_value': rng.randrange(300, 4000), 'area_unit': rng.choice(UNITS), 'bedrooms': rng.randint(0, 5),
+            'bathrooms': rng.randint(0, 4), 'status': 'Available', 'version': 1} for n in range(start, start + BATCH)])
+        db.session.commit()
+
+
+def sql_similar(index, prop):
+    # The index's distance written as SQL, evaluated over every row
+    weights = np.sqrt(FEATURE_WEIGHTS)
+    area = db.case(*[(Property.area_unit == unit, Property.area_value * factor) for unit, factor in SQFT_PER_UNIT.items()])
+    columns = [db.func.ln(1 + Property.price), db.func.ln(1 + area), Property.bedrooms, Property.bathrooms]
+    target = index.matrix[index.rows[prop.id]]
+    distance = 0
+    for position, column in enumerate(columns):
+        scaled = db.func.coalesce((column - float(index.center[position])) * float(index.scale[position] * weights[position]), 0)
+        distance = distance + (scaled - float(target[position])) * (scaled - float(target[position]))
+    distance = (distance
+                + db.case((Property.property_type != prop.property_type, TYPE_MISMATCH), else_=0)
+                + db.case((db.func.lower(Property.city) != prop.city.lower(), CITY_MISMATCH), else_=0)
+                + db.case((db.func.lower(Property.locality) != prop.locality.lower(), LOCALITY_MISMATCH), else_=0))
+    return [row.id for row in db.session.query(Property.id).filter(
+        Property.deleted_at.is_(None), Property.id != prop.id).order_by(distance, Property.id).limit(LIMIT)]
+
+
+def main():
+    rng = random.Random(42)
+    try:
+        with app.app_context():
+            db.create_all()
+            seed(rng)
+
+            started = time.perf_counter()
+            index = refresh_listing_index('similarity')
+            print(f"{ROWS} listings; feature matrix built in {time.perf_counter() - started:.1f}s")
+
+            targets = [db.session.get(Property, rng.randint(1, ROWS)) for _ in range(QUERIES)]
+            started = time.perf_counter()
+            sql_results = [sql_similar(index, prop) for prop in targets]
+            sql_ms = 1000 * (time.perf_counter() - started) / QUERIES
+
+            index_results = []
+            timings = []
+            for prop in targets:
+                started = time.perf_counter()
+                index_results.append([property_id for property_id, _ in index.similar(prop.id, LIMIT)])
+                timings.append(1000 * (time.perf_counter() - started))
+
+            overlap = np.mean([len(set(a) & set(b)) / LIMIT for a, b in zip(sql_results, index_results)])
+            print(f"SQL scan : {sql_ms:7.1f} ms per top-{LIMIT} query")
+            print(f"Index    : {np.median(timings):7.1f} ms median, {max(timings):.1f} ms max per query "
+                  f"({sql_ms / np.median(timings):.0f}x); {overlap:.0%} of results identical to SQL (float32 ties)")
+            db.session.remove()
+            listing_indexes.clear()
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    main()
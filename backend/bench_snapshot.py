@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark comparing the legacy listing flow with the bundled snapshot endpoint.
+Legacy: GET /properties, then one full-size GET /property_photos/<id> per card.
+Snapshot: GET /properties/snapshot, cards paint from inline placeholders.
+Time to first meaningful paint is modelled on a tier-2 mobile link.
+"""
+
+import os
+import sys
+import time
+import random
+from io import BytesIO
+from PIL import Image
+
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+from app import app, db
+
+LISTINGS = 20
+PHOTOS_PER_LISTING = 4
+RTT_SECONDS = 0.15
+BANDWIDTH_BYTES_PER_SECOND = 1.5e6 / 8
+PARALLEL_CONNECTIONS = 6
+
+
+def make_photo(seed):
+    rng = random.Random(seed)
+    image = Image.new('RGB', (1600, 1200), (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    noise = Image.effect_noise((1600, 1200), 40).convert('RGB')
+    buffer = BytesIO()
+    Image.blend(image, noise, 0.3).save(buffer, format='JPEG', quality=85)
+    return buffer.getvalue()
+
+
+def transfer_time(requests_made, total_bytes):
+    rounds = -(-requests_made // PARALLEL_CONNECTIONS)
+    return rounds * RTT_SECONDS + total_bytes / BANDWIDTH_BYTES_PER_SECOND
+
+
+def seed(client):
+    for index in range(LISTINGS):
+        data = {
+            'property_type': 'Apartment',
+            'address': f'{index} Main Road',
+            'city': 'Guntur',
+            'price': str(2500000 + index * 10000),
+            'status': 'Available',
+            'photos': [(BytesIO(make_photo(index * 10 + n)), f'p{n}.jpg') for n in range(PHOTOS_PER_LISTING)]
+        }
+        client.post('/properties', data=data, content_type='multipart/form-data')
+
+
+def legacy_flow(client):
+    started = time.perf_counter()
+    listing = client.get('/properties')
+    card_bytes = 0
+    card_requests = 0
+    for prop in listing.get_json():
+        if prop['photos']:
+            card_bytes += len(client.get(prop['photos'][0]['image_url']).data)
+            card_requests += 1
+    elapsed = time.perf_counter() - started
+    paint = RTT_SECONDS + len(listing.data) / BANDWIDTH_BYTES_PER_SECOND + transfer_time(card_requests, card_bytes)
+    return 1 + card_requests, len(listing.data) + card_bytes, elapsed, paint
+
+
+def snapshot_flow(client):
+    started = time.perf_counter()
+    snapshot = client.get(f'/properties/snapshot?per_page={LISTINGS}')
+    thumb_bytes = 0
+    thumb_requests = 0
+    for prop in snapshot.get_json()['properties']:
+        if prop['photos']:
+            thumb_bytes += len(client.get(prop['photos'][0]['variants']['thumb']).data)
+            thumb_requests += 1
+    elapsed = time.perf_counter() - started
+    paint = RTT_SECONDS + len(snapshot.data) / BANDWIDTH_BYTES_PER_SECOND
+    sharp = paint + transfer_time(thumb_requests, thumb_bytes)
+    return 1, len(snapshot.data), thumb_bytes, elapsed, paint, sharp
+
+
+def main():
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            seed(client)
+
+            requests_made, total_bytes, elapsed, paint = legacy_flow(client)
+            print(f"Legacy   : {requests_made} requests, {total_bytes / 1024:.0f} KiB before cards paint, "
+                  f"server {elapsed * 1000:.0f} ms, modelled first paint {paint:.2f} s")
+
+            requests_made, total_bytes, thumb_bytes, elapsed, paint, sharp = snapshot_flow(client)
+            print(f"Snapshot : {requests_made} request, {total_bytes / 1024:.0f} KiB before cards paint, "
+                  f"server {elapsed * 1000:.0f} ms, modelled first paint {paint:.2f} s "
+                  f"(sharp thumbs +{thumb_bytes / 1024:.0f} KiB at {sharp:.2f} s)")
+            db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
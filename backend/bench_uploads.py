@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark of upload bytes and retry cost, before and after chunked uploads.
+1. Photo bytes: a 12 MP camera JPEG versus the 1920px re-encode AddPropertyForm.js
+   now does in the browser (simulated here with Pillow at the same size/quality).
+2. Retry cost: a 40 MB video whose connection drops 70% of the way through.
+   Legacy resends the whole multipart POST; the upload session resends one chunk.
+"""
+
+import os
+import sys
+import tempfile
+import shutil
+from io import BytesIO
+from PIL import Image
+
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+from app import app, db
+
+VIDEO_BYTES = 40 * 1024 * 1024
+DROP_AT = 0.7
+MAX_IMAGE_DIMENSION = 1920
+IMAGE_QUALITY = 82
+
+FORM = {'property_type': 'House', 'address': '8 Canal Road', 'city': 'Eluru', 'status': 'Available'}
+
+
+def camera_photo():
+    base = Image.radial_gradient('L').resize((4000, 3000)).convert('RGB')
+    noise = Image.effect_noise((4000, 3000), 25).convert('RGB')
+    buffer = BytesIO()
+    Image.blend(base, noise, 0.35).save(buffer, format='JPEG', quality=92)
+    return buffer.getvalue()
+
+
+def browser_downscale(image_data):
+    image = Image.open(BytesIO(image_data))
+    image.thumbnail((MAX_IMAGE_DIMENSION, MAX_IMAGE_DIMENSION))
+    buffer = BytesIO()
+    image.save(buffer, format='JPEG', quality=IMAGE_QUALITY)
+    return buffer.getvalue()
+
+
+def legacy_retry_bytes(client, video):
+    # The first attempt dies after DROP_AT of the body; the retry is the full form again
+    lost = int(len(video) * DROP_AT)
+    response = client.post('/properties', data={**FORM, 'photos': (BytesIO(video), 'tour.mp4')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 201
+    return lost + len(video)
+
+
+def chunked_retry_bytes(client, video):
+    session = client.post('/uploads', json={'filename': 'tour.mp4', 'mimetype': 'video/mp4', 'size': len(video)}).get_json()
+    upload_id, chunk_size = session['upload_id'], session['chunk_size']
+    sent = 0
+    drop_chunk = int(session['chunk_count'] * DROP_AT)
+    for index in range(drop_chunk):
+        chunk = video[index * chunk_size:(index + 1) * chunk_size]
+        client.put(f'/uploads/{upload_id}/chunks/{index}', data=chunk)
+        sent += len(chunk)
+    # The connection drops halfway through this chunk; the client resumes from the server's view
+    sent += chunk_size // 2
+    received = set(client.get(f'/uploads/{upload_id}').get_json()['received_chunks'])
+    for index in range(session['chunk_count']):
+        if index not in received:
+            chunk = video[index * chunk_size:(index + 1) * chunk_size]
+            client.put(f'/uploads/{upload_id}/chunks/{index}', data=chunk)
+            sent += len(chunk)
+    assert client.post(f'/uploads/{upload_id}/finalize').status_code == 200
+    assert client.post('/properties', data={**FORM, 'upload_ids': upload_id}).status_code == 201
+    return sent
+
+
+def main():
+    photo = camera_photo()
+    small = browser_downscale(photo)
+    print(f"Photo    : {len(photo) / 1024:.0f} KiB original -> {len(small) / 1024:.0f} KiB after browser downscale "
+          f"({100 * (1 - len(small) / len(photo)):.0f}% fewer upload bytes)")
+
+    temp_dir = tempfile.mkdtemp(prefix="bench_uploads_")
+    app.config['UPLOAD_SESSION_DIR'] = temp_dir
+    video = os.urandom(VIDEO_BYTES)
+    try:
+        with app.test_client() as client:
+            with app.app_context():
+                db.create_all()
+                legacy = legacy_retry_bytes(client, video)
+                chunked = chunked_retry_bytes(client, video)
+                db.drop_all()
+    finally:
+        shutil.rmtree(temp_dir)
+
+    mib = 1024 * 1024
+    print(f"Retry    : legacy sends {legacy / mib:.1f} MiB for a {VIDEO_BYTES / mib:.0f} MiB video dropped at "
+          f"{DROP_AT:.0%} ({(legacy - VIDEO_BYTES) / mib:.1f} MiB wasted); chunked sends {chunked / mib:.1f} MiB "
+          f"({(chunked - VIDEO_BYTES) / mib:.1f} MiB wasted)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import os
+import shutil
+
+
+def session_dir(base_dir, upload_id):
+    return os.path.join(base_dir, upload_id)
+
+
+def assembled_path(base_dir, upload_id):
+    return os.path.join(base_dir, f'{upload_id}.upload')
+
+
+def chunk_count(total_size, chunk_size):
+    return max(1, -(-total_size // chunk_size))
+
+
+def expected_chunk_size(total_size, chunk_size, index):
+    return min(chunk_size, total_size - index * chunk_size)
+
+
+def write_chunk(base_dir, upload_id, index, data):
+    directory = session_dir(base_dir, upload_id)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{index}.part')
+    # Write then rename, so a dropped connection never leaves a truncated chunk behind
+    with open(path + '.tmp', 'wb') as f:
+        f.write(data)
+    os.replace(path + '.tmp', path)
+
+
+def received_chunks(base_dir, upload_id):
+    directory = session_dir(base_dir, upload_id)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(int(name[:-len('.part')]) for name in os.listdir(directory) if name.endswith('.part'))
+
+
+def assemble(base_dir, upload_id, count):
+    directory = session_dir(base_dir, upload_id)
+    target = assembled_path(base_dir, upload_id)
+    with open(target + '.tmp', 'wb') as out:
+        for index in range(count):
+            with open(os.path.join(directory, f'{index}.part'), 'rb') as part:
+                shutil.copyfileobj(part, out)
+    os.replace(target + '.tmp', target)
+    shutil.rmtree(directory, ignore_errors=True)
+    return os.path.getsize(target)
+
+
+def discard(base_dir, upload_id):
+    shutil.rmtree(session_dir(base_dir, upload_id), ignore_errors=True)
+    for path in (assembled_path(base_dir, upload_id), assembled_path(base_dir, upload_id) + '.tmp'):
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,133 @@
+import numpy as np
+
+from locations import location_key
+
+SUPPORTED_FILTERS = {'property_type', 'min_price', 'max_price', 'city', 'locality', 'bedrooms', 'bathrooms'}
+IGNORED_ARGS = {'page', 'per_page', 'archived'}
+
+
+def supports(args):
+    # Anything else (features=, ...) is left to the SQL path
+    return all(name in SUPPORTED_FILTERS or name in IGNORED_ARGS or not value for name, value in args.items())
+
+
+class StringDictionary:
+    # Dictionary encoding: each distinct string gets a small integer code, -1 is NULL
+
+    def __init__(self, keyed=False):
+        self.codes = {}
+        self.lowered = []
+        # Location search keys per code, for names searched in any script
+        self.keys = [] if keyed else None
+
+    def encode(self, value):
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.lowered)
+            self.lowered.append(value.lower())
+            if self.keys is not None:
+                self.keys.append(location_key(value))
+        return code
+
+    def exact(self, value):
+        return np.array([self.codes.get(value, -2)])
+
+    def matching(self, text):
+        # Like location_match in the app: a case-insensitive substring (ilike('%...%'))
+        # or the same location key; scans distinct values only
+        key = location_key(text)
+        needle = text.lower()
+        return np.array([code for code, value in enumerate(self.lowered)
+                         if needle in value or (key and self.keys[code] == key)], dtype=np.int32)
+
+
+class ColumnarIndex:
+    # The filterable listing columns as NumPy arrays, one slot per property. Deleted
+    # listings are cleared from the live mask; their slot is reused on re-insert.
+
+    def __init__(self, capacity=1024):
+        self.size = 0
+        self.sequence = 0
+        self.rows = {}
+        self.property_types = StringDictionary()
+        self.cities = StringDictionary(keyed=True)
+        self.localities = StringDictionary(keyed=True)
+        self.allocate(capacity)
+
+    def allocate(self, capacity):
+        def grow(name, dtype, fill):
+            array = np.full(capacity, fill, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                array[:self.size] = old[:self.size]
+            setattr(self, name, array)
+
+        grow('ids', np.int64, 0)
+        grow('live', np.bool_, False)
+        grow('property_type', np.int16, -1)
+        grow('city', np.int32, -1)
+        grow('locality', np.int32, -1)
+        grow('price', np.float64, np.nan)
+        grow('bedrooms', np.float32, np.nan)
+        grow('bathrooms', np.float32, np.nan)
+        grow('created_at', np.int64, 0)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in ('ids', 'live', 'property_type', 'city', 'locality',
+                                                          'price', 'bedrooms', 'bathrooms', 'created_at'))
+
+    def upsert(self, listing):
+        row = self.rows.get(listing['id'])
+        if row is None:
+            if self.size == len(self.ids):
+                self.allocate(len(self.ids) * 2)
+            row = self.rows[listing['id']] = self.size
+            self.size += 1
+        self.ids[row] = listing['id']
+        self.live[row] = True
+        self.property_type[row] = self.property_types.encode(listing.get('property_type'))
+        self.city[row] = self.cities.encode(listing.get('city'))
+        self.locality[row] = self.localities.encode(listing.get('locality'))
+        self.price[row] = np.nan if listing.get('price') is None else listing['price']
+        self.bedrooms[row] = np.nan if listing.get('bedrooms') is None else listing['bedrooms']
+        self.bathrooms[row] = np.nan if listing.get('bathrooms') is None else listing['bathrooms']
+        created_at = listing.get('created_at')
+        self.created_at[row] = int(created_at.timestamp() * 1e6) if created_at else 0
+
+    def remove(self, property_id):
+        row = self.rows.get(property_id)
+        if row is not None:
+            self.live[row] = False
+
+    def load(self, listings):
+        for listing in listings:
+            self.upsert(listing)
+
+    def mask(self, args):
+        size = self.size
+        mask = self.live[:size].copy()
+        if args.get('property_type'):
+            mask &= np.isin(self.property_type[:size], self.property_types.exact(args['property_type']))
+        # Comparisons against NaN are False, matching SQL's NULL semantics
+        if args.get('min_price'):
+            mask &= self.price[:size] >= float(args['min_price'])
+        if args.get('max_price'):
+            mask &= self.price[:size] <= float(args['max_price'])
+        if args.get('city'):
+            mask &= np.isin(self.city[:size], self.cities.matching(args['city']))
+        if args.get('locality'):
+            mask &= np.isin(self.locality[:size], self.localities.matching(args['locality']))
+        if args.get('bedrooms'):
+            mask &= self.bedrooms[:size] >= int(args['bedrooms'])
+        if args.get('bathrooms'):
+            mask &= self.bathrooms[:size] >= int(args['bathrooms'])
+        return mask
+
+    def search(self, args):
+        # Matching ids, newest first (created_at desc, id desc) like the snapshot query
+        rows = np.flatnonzero(self.mask(args))
+        order = np.lexsort((-self.ids[rows], -self.created_at[rows]))
+        return self.ids[rows[order]]
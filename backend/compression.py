@@ -0,0 +1,45 @@
+import gzip
+
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ENCODINGS = ('br', 'gzip')
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/plain', 'text/html', 'text/css', 'text/csv',
+                          'application/javascript', 'image/svg+xml'}
+
+
+def choose_encoding(accept_encoding):
+    # Prefer brotli when the client accepts it and the module is installed
+    accepted = parse_accept_header(accept_encoding or '')
+    if brotli is not None and accepted.quality('br') > 0:
+        return 'br'
+    if accepted.quality('gzip') > 0:
+        return 'gzip'
+    return None
+
+
+def is_compressible(mimetype):
+    # JPEG, MP4 and other media are already compressed; only text formats shrink
+    return mimetype in COMPRESSIBLE_MIMETYPES
+
+
+def encoded_etag(tag, encoding):
+    # A compressed body is its own representation, so it can't share the identity
+    # body's strong validator: "12-3" becomes "12-3-gzip"
+    return f'{tag}-{encoding}'
+
+
+def etag_variants(etag):
+    # A quoted strong ETag in every form a response may have carried it
+    tag = etag.strip('"')
+    return {etag} | {f'"{encoded_etag(tag, encoding)}"' for encoding in ENCODINGS}
+
+
+def compress(body, encoding, gzip_level=6, brotli_level=5):
+    if encoding == 'br':
+        return brotli.compress(body, quality=brotli_level)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
@@ -0,0 +1,209 @@
+"""
+Shared pytest harness for the backend.
+
+The schema is created once per test session on a single connection, and every
+test runs inside a transaction (or a SAVEPOINT under a seeded dataset) that is
+rolled back afterwards. Application code that commits only releases a nested
+SAVEPOINT, so nothing survives a test and no test pays for create_all/drop_all.
+
+Tests that need data to really be committed - another thread or connection
+reading it, DDL, or code that goes through db.engine directly - are marked
+``@pytest.mark.commits``; they get a plain session and the schema is rebuilt
+after them.
+
+Large seeded datasets are generated once, cached as SQLite files under
+.pytest_cache/datasets (keyed by size, seed and schema), and copied into the
+test transaction by a class-scoped fixture.
+
+Each pytest-xdist worker is its own process with its own in-memory database, so
+the suite runs in parallel with ``python -m pytest -n auto``. Scripts that drive
+a server on localhost are only collected with ``--live-server``.
+"""
+
+import os
+import sys
+import random
+import sqlite3
+import hashlib
+from io import BytesIO
+from datetime import datetime, timedelta
+
+import pytest
+import sqlalchemy as sa
+from PIL import Image
+from sqlalchemy.schema import CreateTable
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+from app import app, db, Property, PropertyPhoto
+from imaging import make_placeholder
+from locations import LOCATION_FIELDS, search_key
+
+LIVE_SERVER_SCRIPTS = ['comprehensive_upload_test.py', 'test_upload_fallback.py', 'test_cloudinary_upload.py',
+                       'test_cloudinary_connection.py']
+LISTINGS_DATASET_SIZE = 20000
+PHOTO_EVERY = 20
+PHOTO_SAMPLES = 12
+CITIES = ['Hyderabad', 'Secunderabad', 'Vijayawada', 'Guntur', 'Warangal', 'Tirupati', 'Nellore', 'Kakinada']
+TYPES = ['Apartment', 'Land', 'House', 'Commercial']
+
+
+def pytest_addoption(parser):
+    parser.addoption('--live-server', action='store_true',
+                     help='Also collect the scripts that need the backend running on localhost:5000.')
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'commits: the test needs real commits instead of a rolled-back transaction')
+
+
+def pytest_ignore_collect(collection_path, config):
+    if collection_path.name in LIVE_SERVER_SCRIPTS and not config.getoption('--live-server'):
+        return True
+    return None
+
+
+def use_explicit_transactions(dbapi_connection, connection_record):
+    # pysqlite defers BEGIN until the first write, so SAVEPOINTs would open (and
+    # RELEASE would commit) the outer transaction; issue BEGIN ourselves instead
+    dbapi_connection.isolation_level = None
+
+
+def begin_explicitly(connection):
+    if not connection.connection.driver_connection.in_transaction:
+        connection.exec_driver_sql('BEGIN')
+
+
+@pytest.fixture(scope='session')
+def database():
+    """Create the schema once and hold the connection every test joins"""
+    app.config['TESTING'] = True
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            sa.event.listen(db.engine, 'connect', use_explicit_transactions)
+            sa.event.listen(db.engine, 'begin', begin_explicitly)
+            db.engine.dispose()
+        db.create_all()
+        connection = db.engine.connect()
+    yield connection
+    with app.app_context():
+        connection.close()
+        db.drop_all()
+
+
+@pytest.fixture
+def db_session(request, database):
+    """Run the test in a transaction that is rolled back afterwards"""
+    # A fresh app context per test, so g and the cached Babel locale don't leak between tests
+    with app.app_context():
+        if request.node.get_closest_marker('commits'):
+            yield db.session
+            db.session.remove()
+            db.drop_all()
+            db.create_all()
+            return
+
+        transaction = database.begin_nested() if database.in_transaction() else database.begin()
+        factory = db.session.session_factory
+        options = dict(factory.kw)
+        db.session.remove()
+        factory.configure(bind=database, join_transaction_mode='create_savepoint')
+        try:
+            yield db.session
+        finally:
+            db.session.remove()
+            factory.kw.clear()
+            factory.kw.update(options)
+            transaction.rollback()
+
+
+@pytest.fixture
+def client(db_session):
+    """Create a test client"""
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+def schema_fingerprint():
+    dialect = sa.dialects.sqlite.dialect()
+    ddl = ''.join(str(CreateTable(table).compile(dialect=dialect)) for table in db.metadata.sorted_tables)
+    return hashlib.sha1(ddl.encode()).hexdigest()[:12]
+
+
+def dataset_dir(config, tmp_path_factory):
+    # The pytest cache keeps the dataset between runs; with -p no:cacheprovider it is
+    # built once per session under the session's temporary directory
+    cache = getattr(config, 'cache', None)
+    if cache is not None:
+        return str(cache.mkdir('datasets'))
+    return str(tmp_path_factory.getbasetemp())
+
+
+def sample_photos(rng):
+    photos = []
+    for _ in range(PHOTO_SAMPLES):
+        buffer = BytesIO()
+        image = Image.new('RGB', (320, 240), (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+        image.save(buffer, format='JPEG', quality=80)
+        photos.append(buffer.getvalue())
+    return photos
+
+
+def build_listings_dataset(path, size, seed):
+    rng = random.Random(seed)
+    photos = sample_photos(rng)
+    placeholders = [make_placeholder(photo) for photo in photos]
+    started = datetime(2024, 1, 1)
+    listings = [{
+        'id': n, 'property_type': rng.choice(TYPES), 'address': f'{n} Main Road', 'city': rng.choice(CITIES),
+        'locality': f'Sector {rng.randrange(40)}', 'price': rng.choice([None, rng.randrange(500_000, 20_000_000, 10_000)]),
+        'area_value': rng.randrange(400, 4000), 'area_unit': 'sqft', 'bedrooms': rng.choice([None, 1, 2, 3, 4, 5]),
+        'bathrooms': rng.choice([None, 1, 2, 3]), 'status': rng.choice(['Available', 'Available', 'Sold/Rented']),
+        'created_at': started + timedelta(minutes=n), 'updated_at': started + timedelta(minutes=n), 'version': 1,
+    } for n in range(1, size + 1)]
+    # Bulk inserts skip the flush listener that fills the search keys
+    for listing in listings:
+        listing.update({f'{field}_key': search_key(field, listing[field]) for field in LOCATION_FIELDS})
+    listing_photos = [{
+        'property_id': n, 'image_data': photos[n % PHOTO_SAMPLES], 'mimetype': 'image/jpeg',
+        'placeholder': placeholders[n % PHOTO_SAMPLES], 'width': 320, 'height': 240,
+    } for n in range(1, size + 1, PHOTO_EVERY)]
+
+    # Written under a temporary name, so concurrent xdist workers never read a half-built file
+    partial = f'{path}.{os.getpid()}.tmp'
+    engine = sa.create_engine(f'sqlite:///{partial}')
+    db.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(Property.__table__.insert(), listings)
+        connection.execute(PropertyPhoto.__table__.insert(), listing_photos)
+    engine.dispose()
+    os.replace(partial, path)
+
+
+def load_dataset(connection, path):
+    source = sqlite3.connect(path)
+    try:
+        for table in db.metadata.sorted_tables:
+            columns = [column.name for column in table.columns]
+            rows = source.execute(f"SELECT {', '.join(columns)} FROM {table.name}").fetchall()
+            if rows:
+                connection.exec_driver_sql(
+                    f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", rows)
+    finally:
+        source.close()
+
+
+@pytest.fixture(scope='class')
+def seeded_listings(request, database, tmp_path_factory):
+    """Load LISTINGS_DATASET_SIZE listings (every PHOTO_EVERY-th with a photo) for the class"""
+    path = os.path.join(dataset_dir(request.config, tmp_path_factory),
+                        f'listings-{LISTINGS_DATASET_SIZE}-seed42-{schema_fingerprint()}.sqlite')
+    if not os.path.exists(path):
+        build_listings_dataset(path, LISTINGS_DATASET_SIZE, seed=42)
+    transaction = database.begin()
+    try:
+        load_dataset(database, path)
+        yield LISTINGS_DATASET_SIZE
+    finally:
+        transaction.rollback()
@@ -0,0 +1,22 @@
+import re
+
+FEATURE_SYNONYMS = {
+    'elevator': 'lift',
+    'car parking': 'parking',
+    'gymnasium': 'gym',
+    'swimming pool': 'pool',
+    'power backup': 'power back up',
+    '24x7 security': 'security',
+}
+
+
+def normalize_feature(feature):
+    feature = ' '.join(re.sub(r'[^\w\s-]', ' ', feature.lower()).split())
+    return FEATURE_SYNONYMS.get(feature, feature)
+
+
+def parse_features(text):
+    # "Parking, Lift; east facing" -> ['east facing', 'lift', 'parking']
+    if not text:
+        return []
+    return sorted({normalize_feature(part) for part in re.split(r'[,;\n|]', text)} - {''})
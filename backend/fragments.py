@@ -0,0 +1,44 @@
+import threading
+from collections import OrderedDict
+
+
+def fragment_key(template, listing_id, version, updated_at, locale, archived=False):
+    # A listing edit bumps version and updated_at, so it gets a new key; the
+    # stale fragment is never served again and simply ages out of the LRU
+    return (template, listing_id, version, updated_at.isoformat() if updated_at else None, archived, str(locale))
+
+
+class FragmentCache:
+    # Rendered HTML fragments, least recently used evicted first
+
+    def __init__(self, max_entries=5000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys):
+        found = {}
+        with self.lock:
+            for key in keys:
+                html = self.entries.get(key)
+                if html is None:
+                    self.misses += 1
+                    continue
+                self.entries.move_to_end(key)
+                found[key] = html
+                self.hits += 1
+        return found
+
+    def set(self, key, html):
+        with self.lock:
+            self.entries[key] = html
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
@@ -0,0 +1,152 @@
+import base64
+import struct
+from io import BytesIO
+
+from PIL import Image, ImageFilter, ImageOps
+
+PLACEHOLDER_SIZE = 16
+PHOTO_VARIANT_WIDTHS = {'thumb': 320, 'medium': 960}
+EXIF_ORIENTATION = 0x0112
+# JFIF, ICC colour profile and Adobe colour transform; every other APPn/COM segment is metadata
+JPEG_KEPT_SEGMENTS = {0xE0, 0xE2, 0xEE}
+PNG_METADATA_CHUNKS = {b'tEXt', b'zTXt', b'iTXt', b'eXIf', b'tIME'}
+FTYP_BRANDS = {b'qt  ': 'video/quicktime', b'3gp4': 'video/3gpp', b'3gp5': 'video/3gpp',
+               b'heic': 'image/heic', b'heix': 'image/heic', b'mif1': 'image/heif'}
+
+
+def sniff_mimetype(data):
+    # The real format from the leading bytes; the client-supplied type is not trusted
+    if data.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image/gif'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    if data[4:8] == b'ftyp':
+        return FTYP_BRANDS.get(data[8:12], 'video/mp4')
+    if data.startswith(b'\x1a\x45\xdf\xa3'):
+        return 'video/webm'
+    return None
+
+
+def open_image(image_data):
+    # Decoded and turned upright, so derived variants follow the EXIF orientation
+    try:
+        image = Image.open(BytesIO(image_data))
+        image.load()
+        image_format = image.format
+        image = ImageOps.exif_transpose(image)
+        image.format = image_format
+        return image
+    except Exception as e:
+        print(f"Error decoding image: {e}")
+        return None
+
+
+def orientation_exif(orientation):
+    # A minimal big-endian EXIF block holding only the Orientation tag
+    tiff = b'MM\x00\x2a' + struct.pack('>IH', 8, 1) + struct.pack('>HHIHH', EXIF_ORIENTATION, 3, 1, orientation, 0) + b'\x00' * 4
+    return b'Exif\x00\x00' + tiff
+
+
+def strip_jpeg_metadata(data, orientation=1):
+    # Drops APPn/COM segments at the marker level, leaving the entropy-coded data untouched
+    kept = [data[:2]]
+    offset = 2
+    while offset + 4 <= len(data) and data[offset] == 0xFF:
+        marker = data[offset + 1]
+        if marker == 0xDA:
+            break
+        length = struct.unpack('>H', data[offset + 2:offset + 4])[0]
+        segment = data[offset:offset + 2 + length]
+        if not (0xE0 <= marker <= 0xEF or marker == 0xFE) or marker in JPEG_KEPT_SEGMENTS:
+            kept.append(segment)
+        offset += 2 + length
+    else:
+        return data
+    if orientation != 1:
+        payload = orientation_exif(orientation)
+        kept.insert(2 if len(kept) > 1 and kept[1][1] == 0xE0 else 1, b'\xff\xe1' + struct.pack('>H', len(payload) + 2) + payload)
+    return b''.join(kept) + data[offset:]
+
+
+def strip_png_metadata(data):
+    kept = [data[:8]]
+    offset = 8
+    while offset + 8 <= len(data):
+        length = struct.unpack('>I', data[offset:offset + 4])[0]
+        chunk_type = data[offset + 4:offset + 8]
+        if chunk_type not in PNG_METADATA_CHUNKS:
+            kept.append(data[offset:offset + 12 + length])
+        offset += 12 + length
+    return b''.join(kept)
+
+
+def ingest_image(data, mimetype):
+    # Returns (data, width, height, orientation) with metadata stripped; width and
+    # height are the upright display size. JPEGs keep only their orientation tag,
+    # since turning them upright would mean a lossy re-encode.
+    try:
+        image = Image.open(BytesIO(data))
+        orientation = image.getexif().get(EXIF_ORIENTATION, 1)
+        width, height = image.size
+    except Exception as e:
+        print(f"Error reading image metadata: {e}")
+        return data, None, None, None
+    if orientation not in range(1, 9):
+        orientation = 1
+    if orientation >= 5:
+        width, height = height, width
+    if mimetype == 'image/jpeg':
+        data = strip_jpeg_metadata(data, orientation)
+    elif mimetype == 'image/png':
+        if orientation != 1:
+            # PNG is lossless, so the pixels can be turned upright
+            buffer = BytesIO()
+            upright = ImageOps.exif_transpose(image)
+            upright.info.pop('exif', None)
+            upright.save(buffer, format='PNG', optimize=True)
+            data, orientation = buffer.getvalue(), 1
+        data = strip_png_metadata(data)
+    return data, width, height, orientation
+
+
+def make_placeholder(image_data):
+    image = open_image(image_data)
+    if image is None:
+        return None
+    image = image.convert('RGB')
+    image.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    image = image.filter(ImageFilter.GaussianBlur(1))
+    buffer = BytesIO()
+    image.save(buffer, format='JPEG', quality=40, optimize=True)
+    return 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+def resize_image(image_data, width):
+    image = open_image(image_data)
+    if image is None:
+        return None, None
+    if image.width <= width:
+        return image_data, Image.MIME.get(image.format)
+    height = max(1, round(image.height * width / image.width))
+    resized = image.convert('RGB').resize((width, height), Image.LANCZOS)
+    buffer = BytesIO()
+    resized.save(buffer, format='JPEG', quality=80, optimize=True, progressive=True)
+    return buffer.getvalue(), 'image/jpeg'
+
+
+def dhash(image_data, hash_size=8):
+    image = open_image(image_data)
+    if image is None:
+        return None
+    pixels = list(image.convert('L').resize((hash_size + 1, hash_size), Image.LANCZOS).getdata())
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
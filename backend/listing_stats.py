@@ -0,0 +1,72 @@
+from datetime import date
+
+SQFT_PER_UNIT = {
+    'sqft': 1.0,
+    'sqm': 10.7639,
+    'acres': 43560.0,
+    'gunta': 1089.0,
+}
+STAT_COLUMNS = ('listing_count', 'price_count', 'price_sum', 'price_per_sqft_count', 'price_per_sqft_sum',
+                'listed_on_count', 'listed_on_sum')
+
+
+def canonical_area_sqft(area_value, area_unit):
+    if not area_value or area_unit not in SQFT_PER_UNIT:
+        return None
+    return area_value * SQFT_PER_UNIT[area_unit]
+
+
+def normalize_key(value):
+    return ' '.join(value.split()).title() if value and value.strip() else ''
+
+
+def listing_contribution(values):
+    # The amounts one active listing adds to every summary row it belongs to
+    if values.get('deleted_at') is not None:
+        return None
+    price = values.get('price')
+    area = canonical_area_sqft(values.get('area_value'), values.get('area_unit'))
+    listed_on = values.get('listing_date') or (values['created_at'].date() if values.get('created_at') else None)
+    return {
+        'listing_count': 1,
+        'price_count': 1 if price is not None else 0,
+        'price_sum': price or 0.0,
+        'price_per_sqft_count': 1 if price is not None and area else 0,
+        'price_per_sqft_sum': price / area if price is not None and area else 0.0,
+        'listed_on_count': 1 if listed_on else 0,
+        'listed_on_sum': listed_on.toordinal() if listed_on else 0,
+    }
+
+
+def stat_keys(values):
+    keys = []
+    city = normalize_key(values.get('city'))
+    if city:
+        keys.append(('location', (city, normalize_key(values.get('locality')))))
+    mediator = normalize_key(values.get('mediator_name'))
+    if mediator:
+        keys.append(('mediator', (mediator,)))
+    return keys
+
+
+def summarize(totals, today=None):
+    today = today or date.today()
+    return {
+        'listing_count': totals['listing_count'],
+        'average_price': totals['price_sum'] / totals['price_count'] if totals['price_count'] else None,
+        'average_price_per_sqft': totals['price_per_sqft_sum'] / totals['price_per_sqft_count'] if totals['price_per_sqft_count'] else None,
+        'average_days_on_market': today.toordinal() - totals['listed_on_sum'] / totals['listed_on_count'] if totals['listed_on_count'] else None,
+    }
+
+
+def aggregate(listings):
+    totals = {}
+    for values in listings:
+        contribution = listing_contribution(values)
+        if contribution is None:
+            continue
+        for key in stat_keys(values):
+            row = totals.setdefault(key, dict.fromkeys(STAT_COLUMNS, 0))
+            for column, amount in contribution.items():
+                row[column] += amount
+    return totals
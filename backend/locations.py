@@ -0,0 +1,235 @@
+import re
+import bisect
+import unicodedata
+from functools import lru_cache
+from itertools import islice
+from collections import Counter
+
+LOCATION_KINDS = ('city', 'locality')
+LOCATION_FIELDS = ('city', 'locality', 'address')
+# Fuzzy (trigram) matches below this Jaccard similarity are not suggested
+SIMILARITY_THRESHOLD = 0.3
+
+# Telugu (U+0C00) and Kannada (U+0C80) follow the same ISCII-derived layout, so
+# one table of offsets from the start of the block transliterates both scripts
+SCRIPT_BLOCKS = (0x0C00, 0x0C80)
+VOWELS = {
+    0x05: 'a', 0x06: 'aa', 0x07: 'i', 0x08: 'ii', 0x09: 'u', 0x0A: 'uu', 0x0B: 'ru', 0x0C: 'lu',
+    0x0E: 'e', 0x0F: 'ee', 0x10: 'ai', 0x12: 'o', 0x13: 'oo', 0x14: 'au', 0x60: 'ruu', 0x61: 'luu',
+}
+CONSONANTS = {
+    0x15: 'k', 0x16: 'kh', 0x17: 'g', 0x18: 'gh', 0x19: 'ng', 0x1A: 'ch', 0x1B: 'chh', 0x1C: 'j', 0x1D: 'jh',
+    0x1E: 'ny', 0x1F: 't', 0x20: 'th', 0x21: 'd', 0x22: 'dh', 0x23: 'n', 0x24: 't', 0x25: 'th', 0x26: 'd',
+    0x27: 'dh', 0x28: 'n', 0x2A: 'p', 0x2B: 'ph', 0x2C: 'b', 0x2D: 'bh', 0x2E: 'm', 0x2F: 'y', 0x30: 'r',
+    0x31: 'r', 0x32: 'l', 0x33: 'l', 0x34: 'l', 0x35: 'v', 0x36: 'sh', 0x37: 'sh', 0x38: 's', 0x39: 'h',
+    0x58: 'ts', 0x59: 'dz', 0x5A: 'r', 0x5E: 'l',
+}
+VOWEL_SIGNS = {
+    0x3E: 'aa', 0x3F: 'i', 0x40: 'ii', 0x41: 'u', 0x42: 'uu', 0x43: 'ru', 0x44: 'ruu', 0x46: 'e', 0x47: 'ee',
+    0x48: 'ai', 0x4A: 'o', 0x4B: 'oo', 0x4C: 'au', 0x62: 'lu', 0x63: 'luu',
+}
+VIRAMA = 0x4D
+ANUSVARA = 0x02
+SIGNS = {0x00: 'n', 0x01: 'n', 0x03: 'h'}
+LABIALS = {'p', 'ph', 'b', 'bh', 'm'}
+
+# Spelling differences that don't change how a place name sounds, applied in
+# order to one Latin word: Chittoor/Chitoor, Vijayawada/Vijayavada,
+# Hyderabad/Haidarabad, Gachibowli/Gachibauli, Secunderabad/Sikindrabad
+PHONETIC_RULES = [(re.compile(pattern), replacement) for pattern, replacement in (
+    (r'ch', 'C'),
+    (r'c(?=[eiy])', 's'),
+    (r'[cq]', 'k'),
+    (r'ph|f', 'p'),
+    (r'([bdgjklmnprstvz])h', r'\1'),
+    (r'w(?![aeiouy])', 'u'),
+    (r'w', 'v'),
+    (r'y(?![aeiou])', 'i'),
+    (r'z', 'j'),
+    (r'x', 'ks'),
+)]
+
+
+def script_offset(char):
+    code = ord(char)
+    for start in SCRIPT_BLOCKS:
+        if start <= code < start + 0x80:
+            return code - start
+    return None
+
+
+def transliterate(text):
+    # "హైదరాబాద్" -> "haidaraabaad"; anything outside Telugu and Kannada passes through
+    out = []
+    inherent = False
+    for position, char in enumerate(text):
+        offset = script_offset(char)
+        if offset is None:
+            out.append(char)
+            inherent = False
+            continue
+        if offset in CONSONANTS:
+            out.append(CONSONANTS[offset] + 'a')
+            inherent = True
+            continue
+        if inherent and (offset in VOWEL_SIGNS or offset == VIRAMA):
+            out[-1] = out[-1][:-1] + VOWEL_SIGNS.get(offset, '')
+        elif offset in VOWELS:
+            out.append(VOWELS[offset])
+        elif offset == ANUSVARA:
+            following = script_offset(text[position + 1]) if position + 1 < len(text) else None
+            out.append('n' if following is not None and CONSONANTS.get(following) not in LABIALS | {None} else 'm')
+        elif offset in SIGNS:
+            out.append(SIGNS[offset])
+        elif 0x66 <= offset <= 0x6F:
+            out.append(str(offset - 0x66))
+        inherent = False
+    return ''.join(out)
+
+
+# Place names repeat across listings and searches, so both keys are memoized
+@lru_cache(maxsize=65536)
+def latin_name(text):
+    # Lowercase ASCII words: scripts transliterated, accents and punctuation dropped
+    if not text:
+        return ''
+    if not text.isascii():
+        text = ''.join(char for char in transliterate(text) if unicodedata.category(char) != 'Cf')
+        text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode()
+    text = text.lower()
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', text).split())
+
+
+def phonetic_word(word):
+    if any(char.isdigit() for char in word):
+        return word
+    for pattern, replacement in PHONETIC_RULES:
+        word = pattern.sub(replacement, word)
+    word = re.sub(r'(.)\1+', r'\1', word.lower())
+    return ('a' if word[0] in 'aeiou' else word[0]) + re.sub(r'[aeiou]', '', word[1:])
+
+
+@lru_cache(maxsize=65536)
+def location_key(text):
+    # The stored search key: one consonant skeleton for every spelling and script
+    # of a name, e.g. Hyderabad, Hyderbad and హైదరాబాద్ are all "hdrbd"
+    return ''.join(phonetic_word(word) for word in latin_name(text).split()) or None
+
+
+@lru_cache(maxsize=65536)
+def address_key(text):
+    # Addresses are searched by word, so their key keeps the word breaks:
+    # "22 MG Road" is "22 mg rd", and "Road" never matches inside "Garden Road"'s "grdn"
+    return ' '.join(phonetic_word(word) for word in latin_name(text).split()) or None
+
+
+def search_key(field, text):
+    return address_key(text) if field == 'address' else location_key(text)
+
+
+def trigrams(text):
+    padded = f'  {text} '
+    return {padded[start:start + 3] for start in range(len(padded) - 2)}
+
+
+class LocationIndex:
+    # Autocomplete over distinct city and locality names, with a sorted prefix
+    # list and trigram postings for typos. Spellings that share a key (Hyderabad,
+    # హైదరాబాద్) are one entry, shown under the spelling with the most listings.
+
+    def __init__(self):
+        self.entries = []
+        self.sources = {}
+        self.terms = []
+        self.variants = []
+        self.postings = {}
+        self.loaded_at = 0
+
+    def load(self, locations):
+        # `locations` are (kind, name, city, listing_count); city is None for cities
+        groups = {}
+        for kind, name, city, listing_count in locations:
+            key = location_key(name)
+            self.sources[kind, name, city] = (kind, key, location_key(city)) if key else None
+            if not key:
+                continue
+            group = groups.setdefault(self.sources[kind, name, city], {'spellings': Counter(), 'cities': Counter()})
+            group['spellings'][name] += listing_count
+            if city:
+                group['cities'][city] += listing_count
+
+        def most_listed(counts):
+            return min(counts, key=lambda value: (-counts[value], value)) if counts else None
+
+        terms = []
+        positions = {}
+        for (kind, key, city_key), group in groups.items():
+            position = positions[kind, key, city_key] = len(self.entries)
+            self.entries.append({'kind': kind, 'name': most_listed(group['spellings']), 'key': key,
+                                 'city': most_listed(group['cities']), 'city_key': city_key,
+                                 'listing_count': sum(group['spellings'].values())})
+            terms.append((f'#{key}', position))
+            for spelling in group['spellings']:
+                latin = latin_name(spelling)
+                words = latin.split()
+                # Any word can start the query, so "hills" finds Banjara Hills
+                terms.extend((' '.join(words[start:]), position) for start in range(len(words)))
+                grams = trigrams(latin) | {f'#{gram}' for gram in trigrams(key)}
+                for gram in grams:
+                    self.postings.setdefault(gram, []).append(len(self.variants))
+                self.variants.append((position, len(grams)))
+        self.terms = sorted(set(terms))
+        self.sources = {source: positions.get(group) for source, group in self.sources.items()}
+
+    def update_counts(self, locations):
+        # Listing counts move on every write but new names are rare: refresh the
+        # counts in place, or return False when a name is new and load() is needed
+        totals = [0] * len(self.entries)
+        for kind, name, city, listing_count in locations:
+            if (kind, name, city) not in self.sources:
+                return False
+            position = self.sources[kind, name, city]
+            if position is not None:
+                totals[position] += listing_count
+        for entry, total in zip(self.entries, totals):
+            entry['listing_count'] = total
+        return True
+
+    def suggest(self, text, limit=10, kind=None, city=None):
+        latin, key = latin_name(text), location_key(text)
+        if not key:
+            return []
+        scores = {}
+        # Exact key first, then names (or words of names) starting with the query,
+        # compared as typed and as keys; key terms are tagged so the two never mix
+        for term in (latin, f'#{key}'):
+            start = bisect.bisect_left(self.terms, (term,))
+            for indexed, position in islice(self.terms, start, None):
+                if not indexed.startswith(term):
+                    break
+                scores[position] = max(scores.get(position, 0), 3 if self.entries[position]['key'] == key else 2)
+        grams = trigrams(latin) | {f'#{gram}' for gram in trigrams(key)}
+        shared = Counter(variant for gram in grams for variant in self.postings.get(gram, ()))
+        for variant, count in shared.items():
+            position, variant_grams = self.variants[variant]
+            similarity = count / (len(grams) + variant_grams - count)
+            if similarity >= SIMILARITY_THRESHOLD:
+                scores[position] = max(scores.get(position, 0), similarity)
+
+        city_key = location_key(city)
+        ranked = sorted(scores, key=lambda position: (-scores[position], -self.entries[position]['listing_count'],
+                                                      self.entries[position]['name']))
+        suggestions = []
+        for position in ranked:
+            entry = self.entries[position]
+            if entry['listing_count'] == 0 or (kind is not None and entry['kind'] != kind):
+                continue
+            if city_key is not None and entry['city_key'] != city_key:
+                continue
+            suggestion = {'kind': entry['kind'], 'name': entry['name'], 'listing_count': entry['listing_count']}
+            if entry['kind'] == 'locality':
+                suggestion['city'] = entry['city']
+            suggestions.append(suggestion)
+            if len(suggestions) == limit:
+                break
+        return suggestions
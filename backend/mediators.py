@@ -0,0 +1,47 @@
+import re
+
+from listing_stats import normalize_key
+
+COUNTRY_CODE = '91'
+NATIONAL_NUMBER_LENGTH = 10
+
+
+def normalize_phone(contact):
+    # "+91 98480-22338", "098480 22338" and "9848022338" all become "+919848022338"
+    digits = re.sub(r'\D', '', contact or '')
+    if len(digits) == NATIONAL_NUMBER_LENGTH + 1 and digits.startswith('0'):
+        digits = digits[1:]
+    elif len(digits) == NATIONAL_NUMBER_LENGTH + len(COUNTRY_CODE) and digits.startswith(COUNTRY_CODE):
+        digits = digits[len(COUNTRY_CODE):]
+    if len(digits) == NATIONAL_NUMBER_LENGTH:
+        return f'+{COUNTRY_CODE}{digits}'
+    return f'+{digits}' if len(digits) > NATIONAL_NUMBER_LENGTH else None
+
+
+def normalize_name(name):
+    return normalize_key(name) or None
+
+
+def group_listings(listings):
+    # Groups (listing_id, name, contact) rows into mediator identities: the phone
+    # number when there is one, otherwise the name. A name-only row joins the phone
+    # group carrying the same name when exactly one such group exists.
+    groups = {}
+    names_by_phone_group = {}
+    name_only = []
+    for listing_id, name, contact in listings:
+        phone, clean_name = normalize_phone(contact), normalize_name(name)
+        if phone:
+            group = groups.setdefault(('phone', phone), {'name': clean_name, 'phone': phone, 'listing_ids': []})
+            group['name'] = group['name'] or clean_name
+            group['listing_ids'].append(listing_id)
+        elif clean_name:
+            name_only.append((listing_id, clean_name))
+    for key, group in groups.items():
+        if group['name']:
+            names_by_phone_group.setdefault(group['name'], []).append(key)
+    for listing_id, clean_name in name_only:
+        phone_groups = names_by_phone_group.get(clean_name, [])
+        key = phone_groups[0] if len(phone_groups) == 1 else ('name', clean_name)
+        groups.setdefault(key, {'name': clean_name, 'phone': None, 'listing_ids': []})['listing_ids'].append(listing_id)
+    return list(groups.values())
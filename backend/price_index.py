@@ -0,0 +1,55 @@
+from datetime import date, datetime
+
+from listing_stats import canonical_area_sqft, normalize_key
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def parse_month(value):
+    # "2024-03" -> date(2024, 3, 1)
+    return datetime.strptime(value, '%Y-%m').date()
+
+
+def monthly_prices(changes, first_month, last_month, ended_at=None):
+    # Yields (month, price in effect at the end of that month) for one listing;
+    # `changes` is its (changed_at, price) history in time order
+    month = max(first_month, month_start(changes[0][0])) if changes else None
+    position = 0
+    price = None
+    while month is not None and month <= last_month:
+        month_end = datetime.combine(next_month(month), datetime.min.time())
+        if ended_at is not None and ended_at < month_end:
+            break
+        while position < len(changes) and changes[position][0] < month_end:
+            price = changes[position][1]
+            position += 1
+        if price is not None:
+            yield month, price
+        month = next_month(month)
+
+
+def locality_series(listings, history, first_month, last_month):
+    # Monthly totals per (city, locality) from every listing's price history.
+    # `listings` are dicts with id, city, locality, area_value, area_unit, deleted_at.
+    series = {}
+    for listing in listings:
+        changes = history.get(listing['id'])
+        if not changes:
+            continue
+        key = (normalize_key(listing.get('city')), normalize_key(listing.get('locality')))
+        area = canonical_area_sqft(listing.get('area_value'), listing.get('area_unit'))
+        for month, price in monthly_prices(changes, first_month, last_month, listing.get('deleted_at')):
+            totals = series.setdefault(key + (month,), {'listing_count': 0, 'price_sum': 0.0,
+                                                         'price_per_sqft_count': 0, 'price_per_sqft_sum': 0.0})
+            totals['listing_count'] += 1
+            totals['price_sum'] += price
+            if area:
+                totals['price_per_sqft_count'] += 1
+                totals['price_per_sqft_sum'] += price / area
+    return series
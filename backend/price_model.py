@@ -0,0 +1,206 @@
+import json
+import math
+import os
+import struct
+from datetime import datetime
+
+import numpy as np
+
+from listing_stats import canonical_area_sqft
+from locations import location_key
+
+MAGIC = b'PRICEMDL'
+VERSION = 2
+NUMERIC_FEATURES = ('log_area', 'bedrooms', 'bathrooms')
+# Ridge penalties, in listings: a locality with n priced listings keeps n / (n + LOCALITY_SHRINKAGE)
+# of its mean residual, the rest falls back to the city and then to the whole catalog
+LOCALITY_SHRINKAGE = 5.0
+CITY_SHRINKAGE = 20.0
+TYPE_PENALTY = 1.0
+# Keeps the system solvable when a feature is never (or always) missing
+MIN_PENALTY = 1e-3
+BACKFIT_ROUNDS = 10
+# Estimates come with the middle half of the training residuals as their range
+RANGE_QUANTILES = (0.25, 0.75)
+
+
+def listing_keys(listing):
+    # Location keys, so a locality typed in Telugu shares its effect with the English spelling
+    city = location_key(listing.get('city')) or ''
+    locality = location_key(listing.get('locality'))
+    return city, f'{city}/{locality}' if locality else None
+
+
+def numeric_values(listing):
+    area = canonical_area_sqft(listing.get('area_value'), listing.get('area_unit'))
+    return (math.log(area) if area and area > 0 else math.nan,
+            math.nan if listing.get('bedrooms') is None else float(listing['bedrooms']),
+            math.nan if listing.get('bathrooms') is None else float(listing['bathrooms']))
+
+
+def train(listings):
+    # Ridge regression of log price on property type, log canonical area, bedrooms and
+    # bathrooms (each centered, with a missing-value indicator), plus shrunken city and
+    # locality effects. The dense part is solved in closed form and the two location
+    # effects by backfitting over np.bincount sums, so the catalog is never one-hot encoded.
+    types, cities, localities = {}, {}, {}
+    type_codes, city_codes, locality_codes, numeric, prices = [], [], [], [], []
+    for listing in listings:
+        price = listing.get('price')
+        if not price or price <= 0:
+            continue
+        city, locality = listing_keys(listing)
+        type_codes.append(types.setdefault(listing.get('property_type'), len(types)))
+        city_codes.append(cities.setdefault(city, len(cities)))
+        locality_codes.append(localities.setdefault(locality, len(localities)) if locality else -1)
+        numeric.append(numeric_values(listing))
+        prices.append(price)
+    if not prices:
+        raise ValueError('No priced listings to train on')
+
+    y = np.log(np.array(prices))
+    values = np.array(numeric).reshape(-1, len(NUMERIC_FEATURES))
+    missing = np.isnan(values)
+    present = (~missing).sum(axis=0)
+    means = np.where(present > 0, np.where(missing, 0, values).sum(axis=0) / np.maximum(present, 1), 0)
+    # Scoring clamps numeric inputs to the range seen here, so a 1e300 sqft plot is
+    # priced like the largest listing in the catalog rather than extrapolated to overflow
+    ranges = np.stack([np.where(present > 0, np.where(missing, np.inf, values).min(axis=0), means),
+                       np.where(present > 0, np.where(missing, -np.inf, values).max(axis=0), means)], axis=1)
+    X = np.hstack([np.ones((len(y), 1)), np.eye(len(types))[type_codes],
+                   np.where(missing, 0, values - means), missing.astype(np.float64)])
+    penalty = np.full(X.shape[1], MIN_PENALTY)
+    penalty[0] = 0
+    penalty[1:1 + len(types)] = TYPE_PENALTY
+    gram = X.T @ X + np.diag(penalty)
+
+    city_codes = np.array(city_codes)
+    locality_codes = np.array(locality_codes)
+    has_locality = locality_codes >= 0
+    city_effects = np.zeros(len(cities))
+    locality_effects = np.zeros(len(localities))
+    city_counts = np.bincount(city_codes, minlength=len(cities))
+    locality_counts = np.bincount(locality_codes[has_locality], minlength=len(localities))
+
+    def locality_term():
+        term = np.zeros(len(y))
+        term[has_locality] = locality_effects[locality_codes[has_locality]]
+        return term
+
+    for _ in range(BACKFIT_ROUNDS):
+        beta = np.linalg.solve(gram, X.T @ (y - city_effects[city_codes] - locality_term()))
+        dense = X @ beta
+        city_effects = np.bincount(city_codes, y - dense - locality_term(), len(cities)) / (city_counts + CITY_SHRINKAGE)
+        residual = (y - dense - city_effects[city_codes])[has_locality]
+        locality_effects = np.bincount(locality_codes[has_locality], residual, len(localities)) / (
+            locality_counts + LOCALITY_SHRINKAGE)
+
+    residuals = y - X @ beta - city_effects[city_codes] - locality_term()
+    header = {
+        'version': VERSION,
+        'trained_at': datetime.now().isoformat(timespec='seconds'),
+        'listings': len(y),
+        'types': list(types),
+        'cities': list(cities),
+        'localities': list(localities),
+        'means': means.tolist(),
+        'ranges': ranges.tolist(),
+        'residual_range': np.quantile(residuals, RANGE_QUANTILES).tolist(),
+        'median_error': float(np.median(np.abs(np.expm1(residuals)))),
+        'coefficient_count': len(beta) + len(cities) + len(localities),
+    }
+    coefficients = np.concatenate([beta, city_effects, locality_effects]).astype('<f4')
+    return PriceModel(header, coefficients, locality_counts.astype('<f4'))
+
+
+class PriceModel:
+    # Coefficients laid out as [intercept, types..., numeric..., missing..., cities...,
+    # localities...], followed by each locality's training listing count. Scored with
+    # plain float arithmetic, so one estimate is a few dictionary lookups and a dot
+    # product of seven terms.
+
+    def __init__(self, header, coefficients, locality_counts):
+        self.header = header
+        self.coefficients = coefficients
+        self.locality_counts = locality_counts
+        self.types = {name: 1 + code for code, name in enumerate(header['types'])}
+        numeric_start = 1 + len(self.types)
+        self.numeric = [float(value) for value in coefficients[numeric_start:numeric_start + 2 * len(NUMERIC_FEATURES)]]
+        self.intercept = float(coefficients[0])
+        city_start = numeric_start + len(self.numeric)
+        self.cities = {key: city_start + code for code, key in enumerate(header['cities'])}
+        self.localities = {key: code for code, key in enumerate(header['localities'])}
+        self.locality_start = city_start + len(self.cities)
+        self.means = header['means']
+        self.ranges = header['ranges']
+        self.low, self.high = (math.exp(value) for value in header['residual_range'])
+
+    def predict_log(self, listing):
+        total = self.intercept
+        position = self.types.get(listing.get('property_type'))
+        if position is not None:
+            total += float(self.coefficients[position])
+        for feature, value in enumerate(numeric_values(listing)):
+            if math.isnan(value):
+                total += self.numeric[len(NUMERIC_FEATURES) + feature]
+            else:
+                low, high = self.ranges[feature]
+                total += self.numeric[feature] * (min(max(value, low), high) - self.means[feature])
+        city, locality = listing_keys(listing)
+        position = self.cities.get(city)
+        if position is not None:
+            total += float(self.coefficients[position])
+        code = self.localities.get(locality)
+        if code is not None:
+            total += float(self.coefficients[self.locality_start + code])
+        return total, code
+
+    def estimate(self, listing):
+        log_price, locality = self.predict_log(listing)
+        price = math.exp(log_price)
+        return {
+            'estimate': round(price, -3),
+            'low': round(price * self.low, -3),
+            'high': round(price * self.high, -3),
+            'locality_listings': int(self.locality_counts[locality]) if locality is not None else 0,
+            'trained_at': self.header['trained_at'],
+        }
+
+    def estimate_many(self, listings):
+        # Vectorized estimates for a batch, e.g. a bulk import: an array of prices
+        listings = list(listings)
+        values = np.array([numeric_values(listing) for listing in listings]).reshape(-1, len(NUMERIC_FEATURES))
+        missing = np.isnan(values)
+        values = np.clip(values, *np.array(self.ranges).T)
+        weights = np.array(self.numeric)
+        total = self.intercept + np.where(missing, weights[len(NUMERIC_FEATURES):],
+                                          weights[:len(NUMERIC_FEATURES)] * (values - self.means)).sum(axis=1)
+        keys = [listing_keys(listing) for listing in listings]
+        positions = np.array([[self.types.get(listing.get('property_type'), -1), self.cities.get(city, -1),
+                               self.locality_start + self.localities[locality] if locality in self.localities else -1]
+                              for listing, (city, locality) in zip(listings, keys)], dtype=np.int64).reshape(-1, 3)
+        effects = np.where(positions >= 0, self.coefficients[np.maximum(positions, 0)], 0)
+        return np.exp(total + effects.sum(axis=1))
+
+    def save(self, path):
+        # Written under a temporary name and renamed, so servers never map a partial file
+        header = json.dumps(self.header).encode()
+        header += b' ' * (-(len(MAGIC) + 4 + len(header)) % 8)
+        partial = f'{path}.{os.getpid()}.tmp'
+        with open(partial, 'wb') as model_file:
+            model_file.write(MAGIC + struct.pack('<I', len(header)) + header)
+            model_file.write(np.concatenate([self.coefficients, self.locality_counts]).astype('<f4').tobytes())
+        os.replace(partial, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as model_file:
+            if model_file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f'{path} is not a price model')
+            (length,) = struct.unpack('<I', model_file.read(4))
+            header = json.loads(model_file.read(length))
+        if header['version'] != VERSION:
+            raise ValueError(f"{path} is a version {header['version']} price model, expected {VERSION}")
+        data = np.memmap(path, dtype='<f4', mode='r', offset=len(MAGIC) + 4 + length)
+        count = header['coefficient_count']
+        return cls(header, data[:count], data[count:])
@@ -0,0 +1,54 @@
+import random
+
+import sqlalchemy as sa
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND_PREFIX = 'replica_'
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def replica_binds(uris):
+    return {f'{REPLICA_BIND_PREFIX}{index}': uri for index, uri in enumerate(uris)}
+
+
+class RoutingSession(Session):
+    # Sends ORM reads in GET requests to one replica per request and everything
+    # else to the primary. A session that has flushed, or a request flagged with
+    # g.pin_primary (a recent write by the same client), stays on the primary.
+
+    def __init__(self, db, **kwargs):
+        super().__init__(db, **kwargs)
+        self.pinned_to_primary = False
+
+    def flush(self, objects=None):
+        has_changes = bool(self.new or self.dirty or self.deleted)
+        super().flush(objects)
+        if has_changes:
+            self.pinned_to_primary = True
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and isinstance(self.bind, sa.engine.Connection):
+            # Joined to an outer transaction (the test harness); Flask-SQLAlchemy
+            # would otherwise pick the engine and bypass it
+            return self.bind
+        if bind is None and not isinstance(clause, sa.UpdateBase) and self.reads_from_replica():
+            replica = self.replica_engine()
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def reads_from_replica(self):
+        if self.pinned_to_primary or self._flushing or self.new or self.dirty or self.deleted:
+            return False
+        if not has_request_context() or request.method not in READ_METHODS:
+            return False
+        return not g.get('pin_primary', False)
+
+    def replica_engine(self):
+        replica_keys = sorted(key for key in self._db.engines if key and key.startswith(REPLICA_BIND_PREFIX))
+        if not replica_keys:
+            return None
+        if g.get('replica_key') not in replica_keys:
+            g.replica_key = random.choice(replica_keys)
+        return self._db.engines[g.replica_key]
@@ -0,0 +1,94 @@
+import math
+
+from features import parse_features
+
+PRICE_BAND_BASE = 100000
+MAX_PRICE_BANDS = 3
+MATCH_ALL_KEY = 'any'
+
+
+def normalize_text(value):
+    return ' '.join(value.lower().split()) if value and value.strip() else None
+
+
+def price_band(price):
+    # Doubling bands from 1 lakh: band 0 is < 2 lakh, band 1 is 2-4 lakh, ...
+    return int(math.log2(max(price, PRICE_BAND_BASE) / PRICE_BAND_BASE))
+
+
+def parse_price(value):
+    # Prices are banded on log2, which has no band for infinity, NaN or negatives
+    price = float(value)
+    if not math.isfinite(price) or price < 0:
+        raise ValueError(f'price must be a finite, non-negative number, got {value!r}')
+    return price
+
+
+def compile_search(filters):
+    # Same fields and meaning as filter_properties, except that city and locality
+    # match whole (case-insensitive) names so a search can be indexed by city
+    def number(name, cast):
+        value = filters.get(name)
+        return cast(value) if value not in (None, '') else None
+
+    criteria = {
+        'property_type': filters.get('property_type') or None,
+        'city': normalize_text(filters.get('city')),
+        'locality': normalize_text(filters.get('locality')),
+        'min_price': number('min_price', parse_price),
+        'max_price': number('max_price', parse_price),
+        'bedrooms': number('bedrooms', int),
+        'bathrooms': number('bathrooms', int),
+        'features': parse_features(filters.get('features')),
+        'features_mode': 'any' if filters.get('features_mode') == 'any' else 'all',
+    }
+    return {name: value for name, value in criteria.items() if value not in (None, [])}
+
+
+def search_keys(criteria):
+    # Index a search under its most selective dimension only; a new listing is
+    # then compared with the searches filed under one of its own keys
+    if 'city' in criteria:
+        return [f"city:{criteria['city']}"]
+    if 'max_price' in criteria:
+        low = price_band(criteria.get('min_price', 0))
+        high = price_band(criteria['max_price'])
+        if high - low < MAX_PRICE_BANDS:
+            return [f'band:{band}' for band in range(low, high + 1)]
+    if 'property_type' in criteria:
+        return [f"type:{criteria['property_type']}"]
+    return [MATCH_ALL_KEY]
+
+
+def listing_keys(listing):
+    keys = [MATCH_ALL_KEY]
+    city = normalize_text(listing.get('city'))
+    if city:
+        keys.append(f'city:{city}')
+    if listing.get('price') is not None and math.isfinite(listing['price']):
+        keys.append(f"band:{price_band(listing['price'])}")
+    if listing.get('property_type'):
+        keys.append(f"type:{listing['property_type']}")
+    return keys
+
+
+def matches(criteria, listing):
+    if 'property_type' in criteria and listing.get('property_type') != criteria['property_type']:
+        return False
+    for name in ('city', 'locality'):
+        if name in criteria and normalize_text(listing.get(name)) != criteria[name]:
+            return False
+    price = listing.get('price')
+    if 'min_price' in criteria and (price is None or price < criteria['min_price']):
+        return False
+    if 'max_price' in criteria and (price is None or price > criteria['max_price']):
+        return False
+    for name in ('bedrooms', 'bathrooms'):
+        if name in criteria and (listing.get(name) is None or listing[name] < criteria[name]):
+            return False
+    if 'features' in criteria:
+        tags = set(listing.get('features') or ())
+        found = tags.intersection(criteria['features'])
+        if not found or (criteria['features_mode'] == 'all' and len(found) < len(criteria['features'])):
+            return False
+    return True
@@ -0,0 +1,134 @@
+import math
+
+import numpy as np
+
+from listing_stats import canonical_area_sqft
+
+# Weights on standardized log price, log area, bedrooms and bathrooms
+FEATURE_WEIGHTS = np.array([1.0, 1.0, 0.5, 0.25], dtype=np.float32)
+# Flat penalties, in the same squared units, for differing categories
+TYPE_MISMATCH = 4.0
+CITY_MISMATCH = 9.0
+LOCALITY_MISMATCH = 1.0
+
+
+def listing_features(listing):
+    def log_or_nan(value):
+        return math.log1p(value) if value is not None and value > 0 else np.nan
+
+    area = canonical_area_sqft(listing.get('area_value'), listing.get('area_unit'))
+    return [log_or_nan(listing.get('price')), log_or_nan(area),
+            np.nan if listing.get('bedrooms') is None else listing['bedrooms'],
+            np.nan if listing.get('bathrooms') is None else listing['bathrooms']]
+
+
+def category_key(value):
+    return ' '.join(value.lower().split()) if value else None
+
+
+class SimilarityIndex:
+    # A standardized feature matrix with one row per listing. Missing values sit at
+    # the column mean (0 after standardization), so they neither help nor hurt.
+
+    def __init__(self, capacity=1024):
+        self.size = 0
+        self.sequence = 0
+        self.rows = {}
+        self.category_codes = {}
+        self.scaled_at = 0
+        self.center = np.zeros(4, dtype=np.float32)
+        self.scale = np.ones(4, dtype=np.float32)
+        self.allocate(capacity)
+
+    def allocate(self, capacity):
+        def grow(name, shape, dtype, fill):
+            array = np.full(shape, fill, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                array[:self.size] = old[:self.size]
+            setattr(self, name, array)
+
+        grow('ids', capacity, np.int64, 0)
+        grow('live', capacity, np.bool_, False)
+        grow('raw', (capacity, 4), np.float32, np.nan)
+        grow('matrix', (capacity, 4), np.float32, 0)
+        grow('property_type', capacity, np.int32, -1)
+        grow('city', capacity, np.int32, -1)
+        grow('locality', capacity, np.int32, -1)
+
+    def code(self, value):
+        key = category_key(value)
+        if key is None:
+            return -1
+        return self.category_codes.setdefault(key, len(self.category_codes))
+
+    def standardize(self, raw):
+        return np.nan_to_num((raw - self.center) * self.scale, nan=0.0) * np.sqrt(FEATURE_WEIGHTS)
+
+    def rescale(self):
+        # Recompute column statistics once the index has doubled since the last time
+        raw = self.raw[:self.size][self.live[:self.size]]
+        if len(raw):
+            self.center = np.nan_to_num(np.nanmean(raw, axis=0)).astype(np.float32)
+            spread = np.nan_to_num(np.nanstd(raw, axis=0))
+            self.scale = (1 / np.where(spread > 0, spread, 1)).astype(np.float32)
+        self.matrix[:self.size] = self.standardize(self.raw[:self.size])
+        self.scaled_at = self.size
+
+    def upsert(self, listing, rescale=True):
+        row = self.rows.get(listing['id'])
+        if row is None:
+            if self.size == len(self.ids):
+                self.allocate(len(self.ids) * 2)
+            row = self.rows[listing['id']] = self.size
+            self.size += 1
+        self.ids[row] = listing['id']
+        self.live[row] = True
+        self.raw[row] = listing_features(listing)
+        self.matrix[row] = self.standardize(self.raw[row])
+        self.property_type[row] = self.code(listing.get('property_type'))
+        self.city[row] = self.code(listing.get('city'))
+        # Locality names repeat across cities, so code them together with the city
+        self.locality[row] = self.code(f"{listing.get('city')}/{listing['locality']}") if listing.get('locality') else -1
+        if rescale and self.size >= 2 * max(self.scaled_at, 16):
+            self.rescale()
+
+    def remove(self, property_id):
+        row = self.rows.get(property_id)
+        if row is not None:
+            self.live[row] = False
+
+    def load(self, listings):
+        for listing in listings:
+            self.upsert(listing, rescale=False)
+        self.rescale()
+
+    def distances(self, row, candidates):
+        difference = self.matrix[candidates] - self.matrix[row]
+        distance = np.einsum('ij,ij->i', difference, difference)
+        distance += np.where(self.property_type[candidates] != self.property_type[row], np.float32(TYPE_MISMATCH), np.float32(0))
+        distance += np.where(self.city[candidates] != self.city[row], np.float32(CITY_MISMATCH), np.float32(0))
+        distance += np.where(self.locality[candidates] != self.locality[row], np.float32(LOCALITY_MISMATCH), np.float32(0))
+        return distance
+
+    def similar(self, property_id, limit=10):
+        # [(id, distance)] of the closest live listings, nearest first
+        row = self.rows.get(property_id)
+        if row is None or not self.live[row]:
+            return []
+        size = self.size
+        live = self.live[:size].copy()
+        live[row] = False
+        # Listings in another city are at least CITY_MISMATCH away, so when the same
+        # city already has `limit` closer listings the rest of the matrix is skipped
+        candidates = np.flatnonzero(live & (self.city[:size] == self.city[row]))
+        distance = self.distances(row, candidates)
+        if len(candidates) < limit or np.partition(distance, limit - 1)[limit - 1] > CITY_MISMATCH:
+            candidates = np.flatnonzero(live)
+            distance = self.distances(row, candidates)
+        limit = min(limit, len(candidates))
+        if limit <= 0:
+            return []
+        nearest = np.argpartition(distance, limit - 1)[:limit]
+        nearest = nearest[np.lexsort((self.ids[candidates[nearest]], distance[nearest]))]
+        return [(int(self.ids[candidates[index]]), float(distance[index])) for index in nearest]
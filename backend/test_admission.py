@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Pytest for rate limiting and upload admission control.
+This test suite includes:
+1. Token bucket refill, Retry-After hints and pruning
+2. 429 responses per client and route, including clients behind a proxy
+3. 503 responses when every upload slot is busy, and slot release
+"""
+
+import pytest
+import os
+
+# Import the Flask app and functions
+import sys
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+from werkzeug.middleware.proxy_fix import ProxyFix
+from app import app, rate_limiter, upload_slots
+from admission import TokenBucketLimiter, parse_rate
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket:
+    """Test class for the in-process token bucket"""
+
+    def test_parse_rate(self):
+        """Test the "<requests>/<seconds>" format"""
+        assert parse_rate('30/60') == (30, 0.5)
+        assert parse_rate('5') == (5, 5.0)
+
+    def test_bucket_refills(self):
+        """Test bursts up to capacity and refill over time"""
+        clock = FakeClock()
+        limiter = TokenBucketLimiter(clock=clock)
+        assert [limiter.acquire('a', 2, 0.5) for _ in range(3)] == [0, 0, 2.0]
+        assert limiter.acquire('b', 2, 0.5) == 0
+        clock.now = 2.0
+        assert limiter.acquire('a', 2, 0.5) == 0
+        assert limiter.acquire('a', 2, 0.5) == 2.0
+
+    def test_full_buckets_are_pruned(self):
+        """Test that idle clients do not grow the bucket table without bound"""
+        clock = FakeClock()
+        limiter = TokenBucketLimiter(clock=clock, max_buckets=3)
+        for client in range(3):
+            limiter.acquire(client, 2, 1.0)
+        clock.now = 10.0
+        limiter.acquire('new', 2, 1.0)
+        assert list(limiter.buckets) == ['new']
+
+    def test_pruning_uses_each_buckets_rate(self):
+        """Test that sweeps judge buckets by their own rate and run at most once per interval"""
+        clock = FakeClock()
+        limiter = TokenBucketLimiter(clock=clock, max_buckets=2, prune_interval=10.0)
+        limiter.acquire('slow', 2, 0.01)
+        limiter.acquire('fast', 2, 1.0)
+        clock.now = 10.0
+        limiter.acquire('other', 2, 1.0)
+        assert sorted(limiter.buckets) == ['other', 'slow']
+
+        limiter.acquire('idle', 2, 1.0)
+        clock.now = 15.0
+        limiter.acquire('late', 2, 1.0)
+        assert sorted(limiter.buckets) == ['idle', 'late', 'other', 'slow']
+        clock.now = 20.0
+        limiter.acquire('last', 2, 1.0)
+        assert sorted(limiter.buckets) == ['last', 'slow']
+
+
+class TestAdmissionControl:
+    """Test class for 429 and 503 responses"""
+
+    @pytest.fixture
+    def client(self, client, tmp_path):
+        """Create a test client with admission control switched on"""
+        app.config['TESTING'] = False
+        limits, upload_dir = app.config['RATE_LIMITS'], app.config['UPLOAD_SESSION_DIR']
+        app.config['UPLOAD_SESSION_DIR'] = str(tmp_path)
+        app.config['RATE_LIMITS'] = {**limits, 'add_property': '2/60', 'create_saved_search': '1/60'}
+        rate_limiter.reset()
+
+        yield client
+
+        app.config['RATE_LIMITS'], app.config['UPLOAD_SESSION_DIR'] = limits, upload_dir
+        app.config['TESTING'] = True
+        rate_limiter.reset()
+
+    def add_property(self, client, remote_addr='10.0.0.1'):
+        return client.post('/properties', data={
+            'property_type': 'House', 'address': '5 Temple Street', 'city': 'Tirupati', 'status': 'Available'
+        }, environ_base={'REMOTE_ADDR': remote_addr})
+
+    def test_rate_limit_per_client(self, client):
+        """Test that a client over its budget gets 429 while others are unaffected"""
+        assert [self.add_property(client).status_code for _ in range(3)] == [201, 201, 429]
+        response = self.add_property(client)
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == '30'
+        assert self.add_property(client, remote_addr='10.0.0.2').status_code == 201
+        assert client.get('/properties', environ_base={'REMOTE_ADDR': '10.0.0.1'}).status_code == 200
+
+    def test_writes_are_rate_limited(self, client):
+        """Test that edits, deletes, chunks and saved searches all have a budget"""
+        for endpoint in ('update_property', 'delete_property', 'put_upload_chunk', 'create_saved_search'):
+            assert app.config['RATE_LIMITS'][endpoint]
+        search = {'email': 'a@example.com', 'filters': {'city': 'Mysuru'}}
+        assert client.post('/saved_searches', json=search).status_code == 201
+        assert client.post('/saved_searches', json=search).status_code == 429
+
+    def test_clients_behind_proxy_get_own_buckets(self, client, monkeypatch):
+        """Test that with a trusted proxy the forwarded address picks the bucket"""
+        monkeypatch.setattr(app, 'wsgi_app', ProxyFix(app.wsgi_app, x_for=1))
+        statuses = [client.post('/properties', data={
+            'property_type': 'House', 'address': '5 Temple Street', 'city': 'Tirupati', 'status': 'Available'
+        }, headers={'X-Forwarded-For': forwarded}).status_code for forwarded in ('1.1.1.1', '1.1.1.1', '1.1.1.1', '2.2.2.2')]
+        assert statuses == [201, 201, 429, 201]
+
+    def test_upload_concurrency_cap(self, client):
+        """Test that uploads beyond the cap are shed with 503 and slots are released"""
+        session = client.post('/uploads', json={'filename': 'a.jpg', 'mimetype': 'image/jpeg', 'size': 3}).get_json()
+        held = 0
+        while upload_slots.try_acquire():
+            held += 1
+        try:
+            response = client.put(f"/uploads/{session['upload_id']}/chunks/0", data=b'abc')
+            assert response.status_code == 503
+            assert response.headers['Retry-After'] == '1'
+        finally:
+            for _ in range(held):
+                upload_slots.release()
+
+        assert client.put(f"/uploads/{session['upload_id']}/chunks/0", data=b'abc').status_code == 200
+        assert client.put(f"/uploads/{session['upload_id']}/chunks/5", data=b'abc').status_code == 400
+        assert all(upload_slots.try_acquire() for _ in range(upload_slots.limit))
+        for _ in range(upload_slots.limit):
+            upload_slots.release()
+
+
+def run_tests():
+    """Run all tests with pytest"""
+    pytest.main([__file__, "-v", "--tb=short"])
+
+
+if __name__ == "__main__":
+    # Run tests directly
+    run_tests()
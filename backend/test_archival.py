@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Pytest for hot/cold archival of sold and rented listings.
+This test suite includes:
+1. archive-listings moving old inactive listings with their photos, tags and price history
+2. Searches defaulting to the hot set, with archived=include|only opting in
+3. Archived listings, photos and price history staying readable by id
+4. The in-process search index dropping archived listings
+"""
+
+import pytest
+import os
+from io import BytesIO
+from datetime import datetime, timedelta
+from PIL import Image
+
+# Import the Flask app and functions
+import sys
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+import app as app_module
+from app import (app, db, Property, PropertyPhoto, PriceChange, ArchivedProperty, ArchivedPropertyPhoto,
+                 ArchivedPriceChange, archive_inactive_properties, archive_listings)
+
+
+def jpeg():
+    buffer = BytesIO()
+    Image.new('RGB', (40, 30), 'blue').save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+class TestArchival:
+    """Test class for the listing archive"""
+
+    @pytest.fixture
+    def client(self, client):
+        """Create a test client"""
+        app_module.listing_indexes.clear()
+
+        yield client
+
+        app.config['COLUMNAR_SEARCH'] = False
+        app_module.listing_indexes.clear()
+
+    def add_property(self, client, status='Available', age_days=0, **fields):
+        data = {'property_type': 'House', 'address': '6 Lake View', 'city': 'Kakinada', 'status': status,
+                'price': '4000000', **fields}
+        response = client.post('/properties', data=data, content_type='multipart/form-data')
+        assert response.status_code == 201
+        property_id = response.get_json()['property_id']
+        if age_days:
+            db.session.execute(Property.__table__.update().where(Property.id == property_id).values(
+                created_at=datetime.now() - timedelta(days=age_days),
+                updated_at=datetime.now() - timedelta(days=age_days)))
+            db.session.commit()
+        return property_id
+
+    def test_archive_moves_inactive_listings(self, client):
+        """Test that only old sold/rented listings move, taking their rows with them"""
+        sold_id = self.add_property(client, status='Sold/Rented', age_days=120, features='Parking',
+                                    photos=(BytesIO(jpeg()), 'front.jpg'))
+        client.patch(f'/properties/{sold_id}', json={'price': 3800000})
+        db.session.execute(Property.__table__.update().where(Property.id == sold_id).values(
+            updated_at=datetime.now() - timedelta(days=120)))
+        db.session.commit()
+        recent_id = self.add_property(client, status='Sold/Rented', age_days=10)
+        available_id = self.add_property(client, age_days=400)
+
+        result = app.test_cli_runner().invoke(archive_listings, ['--pause', '0'])
+        assert 'Archived 1 inactive properties' in result.output
+
+        assert db.session.get(Property, sold_id) is None
+        assert PropertyPhoto.query.filter_by(property_id=sold_id).count() == 0
+        assert PriceChange.query.filter_by(property_id=sold_id).count() == 0
+        archived = db.session.get(ArchivedProperty, sold_id)
+        assert archived.price == 3800000 and archived.archived_at is not None
+        assert [photo.image_data[:2] for photo in archived.photos] == [b'\xff\xd8']
+        assert ArchivedPriceChange.query.filter_by(property_id=sold_id).count() == 2
+        assert {db.session.get(Property, recent_id).id, db.session.get(Property, available_id).id} == {recent_id, available_id}
+
+        stats = client.get('/stats/locations').get_json()
+        assert stats[0]['listing_count'] == 2
+        assert archive_inactive_properties(older_than_days=0, pause=0) == 1
+
+    def test_search_scopes(self, client):
+        """Test that searches default to the hot set and opt into the archive"""
+        sold_id = self.add_property(client, status='Sold/Rented', age_days=200, features='Parking')
+        hot_id = self.add_property(client, age_days=100, features='Parking')
+        newest_id = self.add_property(client, city='Eluru')
+        archive_inactive_properties(older_than_days=90, pause=0)
+
+        assert [prop['id'] for prop in client.get('/properties').get_json()] == [hot_id, newest_id]
+        assert sorted(prop['id'] for prop in client.get('/properties?archived=include').get_json()) == [
+            sold_id, hot_id, newest_id]
+        only = client.get('/properties?archived=only&features=parking').get_json()
+        assert [prop['id'] for prop in only] == [sold_id]
+        assert only[0]['archived_at'] and 'archived_at' not in client.get('/properties').get_json()[0]
+
+        page = client.get('/properties/snapshot?archived=include&per_page=2').get_json()
+        assert page['total'] == 3 and page['has_more']
+        assert [prop['id'] for prop in page['properties']] == [newest_id, hot_id]
+        page = client.get('/properties/snapshot?archived=include&per_page=2&page=2&city=kaki').get_json()
+        assert [prop['id'] for prop in page['properties']] == []
+        page = client.get('/properties/snapshot?archived=include&per_page=1&page=2&city=kaki').get_json()
+        assert [prop['id'] for prop in page['properties']] == [sold_id]
+        assert client.get('/properties/snapshot').get_json()['total'] == 2
+
+        assert client.get('/properties?archived=all').status_code == 400
+        assert client.get('/properties/snapshot?archived=yes').status_code == 400
+
+    def test_archived_listing_stays_readable(self, client):
+        """Test detail, photo and price history lookups for an archived listing"""
+        sold_id = self.add_property(client, status='Sold/Rented', age_days=200, photos=(BytesIO(jpeg()), 'front.jpg'))
+        archive_inactive_properties(older_than_days=90, pause=0)
+
+        detail = client.get(f'/properties/{sold_id}')
+        assert detail.status_code == 200
+        photo = detail.get_json()['photos'][0]
+        assert db.session.get(ArchivedPropertyPhoto, photo['id']) is not None
+        response = client.get(f"/property_photos/{photo['id']}")
+        assert response.status_code == 200 and response.mimetype == 'image/jpeg'
+        history = client.get(f'/properties/{sold_id}/price_history').get_json()['history']
+        assert [change['price'] for change in history] == [4000000]
+
+        assert client.patch(f'/properties/{sold_id}', json={'price': 1}).status_code == 404
+        assert client.delete(f'/properties/{sold_id}').status_code == 404
+
+        # Ids of archived listings are never reused for new ones
+        assert self.add_property(client) > sold_id
+
+    def test_search_index_drops_archived(self, client):
+        """Test that archiving adds an 'archived' change, which the columnar index and feed pick up"""
+        app.config['COLUMNAR_SEARCH'] = True
+        sold_id = self.add_property(client, status='Sold/Rented', age_days=200)
+        hot_id = self.add_property(client)
+        assert [prop['id'] for prop in client.get('/properties/snapshot').get_json()['properties']] == [hot_id, sold_id]
+
+        archive_inactive_properties(older_than_days=90, pause=0)
+        page = client.get('/properties/snapshot').get_json()
+        assert page['total'] == 1
+        assert [prop['id'] for prop in page['properties']] == [hot_id]
+        events = client.get('/events?since=0&timeout=0').get_json()['events']
+        assert [(event['property_id'], event['action']) for event in events][-1] == (sold_id, 'archived')
+
+        # Listings added afterwards get new sequence numbers, so the index still sees them
+        new_id = self.add_property(client)
+        assert sorted(prop['id'] for prop in client.get('/properties').get_json()) == [hot_id, new_id]
+
+
+def run_tests():
+    """Run all tests with pytest"""
+    pytest.main([__file__, "-v", "--tb=short"])
+
+
+if __name__ == "__main__":
+    # Run tests directly
+    run_tests()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Pytest for the async (ASGI) listing and media routes.
+This test suite includes:
+1. GET /properties with filters on an aiosqlite engine
+2. Chunked streaming of photo data with Content-Length, from one replica, ending
+   cleanly if the photo is deleted mid-stream
+3. 404/405 handling and async driver selection
+"""
+
+import pytest
+import os
+import asyncio
+import tempfile
+import shutil
+import json
+import sqlalchemy as sa
+from datetime import datetime
+
+# Import the Flask app and functions
+import sys
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+from app import db, Property, PropertyPhoto
+from asgi import AsyncListingApp, async_database_uri
+
+
+async def call(application, path, method='GET', on_send=None):
+    path, _, query_string = path.partition('?')
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'scheme': 'http',
+        'query_string': query_string.encode('latin-1'), 'headers': [(b'host', b'testserver')]
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+        if on_send:
+            on_send(message)
+
+    await application(scope, receive, send)
+    await application.dispose()
+    return messages
+
+
+def request(application, path, method='GET', on_send=None):
+    messages = asyncio.run(call(application, path, method, on_send))
+    start, bodies = messages[0], messages[1:]
+    return start['status'], dict(start['headers']), bodies
+
+
+class TestAsgiRoutes:
+    """Test class for the ASGI listing app"""
+
+    @pytest.fixture
+    def database(self):
+        """Create a SQLite file with two listings, one soft-deleted"""
+        temp_dir = tempfile.mkdtemp(prefix="test_asgi_")
+        uri = f"sqlite:///{os.path.join(temp_dir, 'listings.db')}"
+        engine = sa.create_engine(uri)
+        db.metadata.create_all(bind=engine)
+        with engine.begin() as connection:
+            for city, deleted_at in (('Warangal', None), ('Karimnagar', datetime.now())):
+                connection.execute(Property.__table__.insert().values(
+                    property_type='House', address='3 Fort Road', city=city, status='Available', price=2000000,
+                    version=1, created_at=datetime.now(), deleted_at=deleted_at))
+            connection.execute(PropertyPhoto.__table__.insert().values(
+                property_id=1, image_data=bytes(range(256)) * 20, mimetype='video/mp4'))
+            connection.execute(PropertyPhoto.__table__.insert().values(
+                property_id=2, image_data=b'deleted listing photo', mimetype='image/jpeg'))
+        engine.dispose()
+        yield uri
+        shutil.rmtree(temp_dir)
+
+    def test_get_properties(self, database):
+        """Test that listings, photo URLs and filters match the sync route"""
+        application = AsyncListingApp(database, replica_uris=[])
+
+        status, headers, bodies = request(application, '/properties')
+        assert status == 200
+        assert headers[b'content-type'] == b'application/json'
+        listings = json.loads(bodies[0]['body'])
+        assert [prop['city'] for prop in listings] == ['Warangal']
+        assert listings[0]['photos'] == [{'id': 1, 'image_url': 'http://testserver/property_photos/1'}]
+
+        status, headers, bodies = request(application, '/properties?min_price=2500000')
+        assert json.loads(bodies[0]['body']) == []
+
+    def test_photo_is_streamed_in_chunks(self, database):
+        """Test that a photo is sent as several body messages adding up to Content-Length"""
+        application = AsyncListingApp(database, replica_uris=[], chunk_size=1000)
+
+        status, headers, bodies = request(application, '/property_photos/1')
+        assert status == 200
+        assert headers[b'content-type'] == b'video/mp4'
+        assert headers[b'content-length'] == b'5120'
+        assert len(bodies) == 6
+        assert [body['more_body'] for body in bodies] == [True] * 5 + [False]
+        assert b''.join(body['body'] for body in bodies) == bytes(range(256)) * 20
+
+    def test_photo_is_streamed_from_one_replica(self, database):
+        """Test that every slice of a photo comes from the same replica"""
+        replicas = {}
+        for name, data in (('first', bytes(range(256)) * 20), ('second', bytes(reversed(range(256))) * 20)):
+            path = database.replace('listings.db', f'{name}.db')
+            shutil.copy(database[len('sqlite:///'):], path[len('sqlite:///'):])
+            engine = sa.create_engine(path)
+            with engine.begin() as connection:
+                connection.execute(PropertyPhoto.__table__.update().where(PropertyPhoto.id == 1).values(image_data=data))
+            engine.dispose()
+            replicas[path] = data
+        application = AsyncListingApp(database, replica_uris=list(replicas), chunk_size=1000)
+
+        for _ in range(8):
+            status, headers, bodies = request(application, '/property_photos/1')
+            assert status == 200
+            assert b''.join(body['body'] for body in bodies) in replicas.values()
+
+    def test_photo_deleted_mid_stream(self, database):
+        """Test that the stream ends cleanly when the photo row disappears between slices"""
+        application = AsyncListingApp(database, replica_uris=[], chunk_size=1000)
+        engine = sa.create_engine(database)
+
+        def delete_after_first_slice(message):
+            if message['type'] == 'http.response.body' and message['body']:
+                with engine.begin() as connection:
+                    connection.execute(PropertyPhoto.__table__.delete().where(PropertyPhoto.id == 1))
+
+        status, headers, bodies = request(application, '/property_photos/1', on_send=delete_after_first_slice)
+        engine.dispose()
+        assert status == 200
+        assert [(len(body['body']), body['more_body']) for body in bodies] == [(1000, True), (0, False)]
+
+    def test_missing_and_unsupported(self, database):
+        """Test 404 for missing or deleted photos and 405 for writes"""
+        application = AsyncListingApp(database, replica_uris=[])
+
+        assert request(application, '/property_photos/2')[0] == 404
+        assert request(application, '/property_photos/99')[0] == 404
+        assert request(application, '/nowhere')[0] == 404
+        assert request(application, '/properties', method='POST')[0] == 405
+
+    def test_async_database_uri(self):
+        """Test mapping of sync drivers to their async counterparts"""
+        assert async_database_uri('mysql+pymysql://root:pw@localhost/real_estate_db') == 'mysql+aiomysql://root:pw@localhost/real_estate_db'
+        assert async_database_uri('sqlite:///primary.db') == 'sqlite+aiosqlite:///primary.db'
+
+
+def run_tests():
+    """Run all tests with pytest"""
+    pytest.main([__file__, "-v", "--tb=short"])
+
+
+if __name__ == "__main__":
+    # Run tests directly
+    run_tests()
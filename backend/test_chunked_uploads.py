@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Pytest for resumable chunked uploads.
+This test suite includes:
+1. Upload session creation, chunk PUTs and finalize
+2. Resuming after a dropped chunk and retrying a chunk idempotently
+3. Attaching finalized uploads to add_property and PATCH
+"""
+
+import pytest
+import os
+import tempfile
+import shutil
+
+# Import the Flask app and functions
+import sys
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+from app import app, db, PropertyPhoto, UploadSession
+
+
+class TestChunkedUploads:
+    """Test class for the upload session protocol"""
+
+    @pytest.fixture
+    def client(self, client):
+        """Create a test client with a small chunk size and a temporary chunk directory"""
+        temp_dir = tempfile.mkdtemp(prefix="test_upload_sessions_")
+        original = app.config['UPLOAD_SESSION_DIR'], app.config['UPLOAD_CHUNK_SIZE']
+        app.config['UPLOAD_SESSION_DIR'], app.config['UPLOAD_CHUNK_SIZE'] = temp_dir, 1000
+
+        yield client
+        app.config['UPLOAD_SESSION_DIR'], app.config['UPLOAD_CHUNK_SIZE'] = original
+        shutil.rmtree(temp_dir)
+
+    def upload(self, client, data, skip=()):
+        response = client.post('/uploads', json={'filename': 'walkthrough.mp4', 'mimetype': 'video/mp4', 'size': len(data)})
+        assert response.status_code == 201
+        session = response.get_json()
+        for index in range(session['chunk_count']):
+            if index not in skip:
+                chunk = data[index * 1000:(index + 1) * 1000]
+                assert client.put(f"/uploads/{session['upload_id']}/chunks/{index}", data=chunk).status_code == 200
+        return session['upload_id']
+
+    def test_full_upload_round_trip(self, client):
+        """Test that all chunks assemble into the original bytes on a new listing"""
+        # An MP4 ftyp box up front, so the stored type is sniffed as video/mp4
+        data = b'\x00\x00\x00\x20ftypisom' + os.urandom(3488)
+        upload_id = self.upload(client, data)
+
+        finalized = client.post(f'/uploads/{upload_id}/finalize').get_json()
+        assert finalized['completed'] is True
+        assert finalized['chunk_count'] == 4
+
+        response = client.post('/properties', data={
+            'property_type': 'House', 'address': '5 Hill Road', 'city': 'Kadapa', 'status': 'Available',
+            'upload_ids': upload_id
+        })
+        assert response.status_code == 201
+        photo = PropertyPhoto.query.one()
+        assert photo.mimetype == 'video/mp4'
+        assert client.get(f'/property_photos/{photo.id}').data == data
+        assert db.session.get(UploadSession, upload_id) is None
+        assert os.listdir(app.config['UPLOAD_SESSION_DIR']) == []
+
+    def test_resume_after_dropped_chunk(self, client):
+        """Test that finalize reports missing chunks and the client only resends those"""
+        data = os.urandom(3500)
+        upload_id = self.upload(client, data, skip={2})
+
+        response = client.post(f'/uploads/{upload_id}/finalize')
+        assert response.status_code == 409
+        assert response.get_json()['missing_chunks'] == [2]
+        assert client.get(f'/uploads/{upload_id}').get_json()['received_chunks'] == [0, 1, 3]
+
+        for _ in range(2):
+            assert client.put(f'/uploads/{upload_id}/chunks/2', data=data[2000:3000]).status_code == 200
+        assert client.post(f'/uploads/{upload_id}/finalize').status_code == 200
+
+    def test_invalid_chunks_and_sessions(self, client):
+        """Test validation of chunk sizes, indexes, session sizes and unfinished uploads"""
+        upload_id = self.upload(client, os.urandom(1500), skip={0, 1})
+
+        assert client.put(f'/uploads/{upload_id}/chunks/0', data=b'short').status_code == 400
+        assert client.put(f'/uploads/{upload_id}/chunks/5', data=b'x' * 1000).status_code == 400
+        assert client.put('/uploads/missing/chunks/0', data=b'x').status_code == 404
+        assert client.post('/uploads', json={'filename': 'a.jpg', 'mimetype': 'image/jpeg', 'size': 0}).status_code == 400
+        assert client.post('/uploads', json={'filename': 'a.mp4', 'mimetype': 'video/mp4', 'size': 10 ** 12}).status_code == 413
+
+        response = client.post('/properties', data={
+            'property_type': 'House', 'address': '5 Hill Road', 'city': 'Kadapa', 'status': 'Available',
+            'upload_ids': upload_id
+        })
+        assert response.status_code == 400
+
+    def test_patch_attaches_upload(self, client):
+        """Test that PATCH adds a finalized upload as a new photo"""
+        property_id = client.post('/properties', data={
+            'property_type': 'House', 'address': '5 Hill Road', 'city': 'Kadapa', 'status': 'Available'
+        }).get_json()['property_id']
+        data = os.urandom(2000)
+        upload_id = self.upload(client, data)
+        client.post(f'/uploads/{upload_id}/finalize')
+
+        response = client.patch(f'/properties/{property_id}', json={'upload_ids': [upload_id]})
+        assert response.status_code == 200
+        assert len(response.get_json()['photos']) == 1
+
+
+def run_tests():
+    """Run all tests with pytest"""
+    pytest.main([__file__, "-v", "--tb=short"])
+
+
+if __name__ == "__main__":
+    # Run tests directly
+    run_tests()
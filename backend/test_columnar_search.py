@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Pytest for the in-memory columnar search engine.
+This test suite includes:
+1. Vectorized filters, NULL semantics and newest-first ordering
+2. Same results as the SQL path for /properties and /properties/snapshot, also on a seeded 20k dataset
+3. Staying in sync with writes through the listing change feed
+"""
+
+import pytest
+import os
+from datetime import datetime, timedelta
+
+# Import the Flask app and functions
+import sys
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+import app as app_module
+from app import app
+from columnar import ColumnarIndex, supports
+
+
+class TestColumnarIndex:
+    """Test class for the NumPy index on its own"""
+
+    def listing(self, property_id, **fields):
+        return {'id': property_id, 'property_type': 'House', 'city': 'Hyderabad', 'locality': None, 'price': None,
+                'bedrooms': None, 'bathrooms': None, 'created_at': datetime(2024, 1, 1) + timedelta(days=property_id),
+                **fields}
+
+    def test_filters(self):
+        """Test each filter, including NULLs never matching a bound"""
+        index = ColumnarIndex(capacity=2)
+        index.load([
+            self.listing(1, price=3000000, bedrooms=2, locality='Madhapur'),
+            self.listing(2, price=5000000, bedrooms=3, property_type='Apartment'),
+            self.listing(3, city='Secunderabad', bathrooms=2),
+            self.listing(4, city='Warangal', price=2000000),
+        ])
+        assert list(index.search({})) == [4, 3, 2, 1]
+        assert list(index.search({'city': 'hyder'})) == [2, 1]
+        assert list(index.search({'city': 'bad'})) == [3, 2, 1]
+        assert list(index.search({'min_price': '2500000'})) == [2, 1]
+        assert list(index.search({'max_price': '3000000', 'city': ''})) == [4, 1]
+        assert list(index.search({'bedrooms': '3'})) == [2]
+        assert list(index.search({'bathrooms': '1'})) == [3]
+        assert list(index.search({'property_type': 'Apartment'})) == [2]
+        assert list(index.search({'property_type': 'Villa'})) == []
+        assert list(index.search({'locality': 'MADHA'})) == [1]
+
+        index.remove(2)
+        index.upsert(self.listing(1, price=9000000))
+        assert list(index.search({'min_price': '2500000'})) == [1]
+        assert index.size == 4
+
+    def test_supports(self):
+        """Test that unsupported filters fall back to SQL"""
+        assert supports({'city': 'Pune', 'page': '2'})
+        assert supports({'features': ''})
+        assert not supports({'features': 'parking'})
+
+
+class TestColumnarRoutes:
+    """Test class for the engine behind the listing endpoints"""
+
+    @pytest.fixture
+    def client(self, client):
+        """Create a test client with the columnar engine switched on"""
+        app.config['COLUMNAR_SEARCH'] = True
+        app_module.listing_indexes.clear()
+
+        yield client
+
+        app.config['COLUMNAR_SEARCH'] = False
+        app_module.listing_indexes.clear()
+
+    def add_property(self, client, **fields):
+        data = {'property_type': 'Apartment', 'address': '3 Ring Road', 'city': 'Hyderabad', 'status': 'Available', **fields}
+        response = client.post('/properties', data=data)
+        assert response.status_code == 201
+        return response.get_json()['property_id']
+
+    def both_paths(self, client, path):
+        engine = client.get(path).get_json()
+        app.config['COLUMNAR_SEARCH'] = False
+        sql = client.get(path).get_json()
+        app.config['COLUMNAR_SEARCH'] = True
+        return engine, sql
+
+    def test_matches_sql_path(self, client):
+        """Test that the engine and SQL agree on filters, order and paging"""
+        for index in range(12):
+            self.add_property(client, city=['Hyderabad', 'Warangal', 'Secunderabad'][index % 3],
+                              price=str(1000000 * (index + 1)), bedrooms=str(index % 4), features='Parking')
+        for query in ('', 'city=bad', 'min_price=4000000&max_price=9000000', 'bedrooms=2&city=hyd',
+                      'features=parking', 'property_type=House'):
+            engine, sql = self.both_paths(client, f'/properties?{query}')
+            assert sorted(prop['id'] for prop in engine) == sorted(prop['id'] for prop in sql)
+            engine, sql = self.both_paths(client, f'/properties/snapshot?per_page=5&page=2&{query}')
+            assert engine == sql
+
+    def test_follows_writes(self, client):
+        """Test that adds, edits and deletes show up in the next search"""
+        first_id = self.add_property(client, price='3000000')
+        assert [prop['id'] for prop in client.get('/properties?max_price=4000000').get_json()] == [first_id]
+
+        second_id = self.add_property(client, price='3500000')
+        client.patch(f'/properties/{first_id}', json={'price': 4500000})
+        assert [prop['id'] for prop in client.get('/properties?max_price=4000000').get_json()] == [second_id]
+
+        client.delete(f'/properties/{second_id}')
+        assert client.get('/properties?max_price=4000000').get_json() == []
+        assert app_module.listing_indexes['search'].sequence == 4
+
+
+class TestColumnarOnSeededListings:
+    """Test class for the engine against the cached 20k listing dataset"""
+
+    @pytest.fixture
+    def client(self, client):
+        """Create a test client with the columnar engine switched on"""
+        app.config['COLUMNAR_SEARCH'] = True
+        app_module.listing_indexes.clear()
+        yield client
+        app.config['COLUMNAR_SEARCH'] = False
+        app_module.listing_indexes.clear()
+
+    def test_matches_sql_at_scale(self, client, seeded_listings):
+        """Test that the engine and SQL agree on every page of common searches"""
+        for query in ('', 'city=nagar', 'city=Guntur&min_price=2000000&max_price=6000000', 'bedrooms=3&bathrooms=2',
+                      'property_type=Land&locality=sector 1', 'max_price=1000000'):
+            for page in (1, 7, 40):
+                path = f'/properties/snapshot?per_page=25&page={page}&{query}'
+                engine = client.get(path).get_json()
+                app.config['COLUMNAR_SEARCH'] = False
+                sql = client.get(path).get_json()
+                app.config['COLUMNAR_SEARCH'] = True
+                assert engine == sql
+        assert app_module.listing_indexes['search'].size == seeded_listings
+
+
+def run_tests():
+    """Run all tests with pytest"""
+    pytest.main([__file__, "-v", "--tb=short"])
+
+
+if __name__ == "__main__":
+    # Run tests directly
+    run_tests()
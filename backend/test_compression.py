@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Pytest for negotiated response compression.
+This test suite includes:
+1. Accept-Encoding negotiation and the compressible type list
+2. gzip and brotli JSON responses above the size threshold
+3. Small responses and media passing through unchanged
+4. Per-encoding ETags, each accepted by If-Match
+"""
+
+import pytest
+import os
+import gzip
+import json
+import brotli
+from io import BytesIO
+from PIL import Image
+
+# Import the Flask app and functions
+import sys
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+from app import app
+from compression import choose_encoding, is_compressible
+
+
+class TestNegotiation:
+    """Test class for encoding negotiation"""
+
+    def test_choose_encoding(self):
+        """Test that brotli is preferred and q=0 is respected"""
+        assert choose_encoding('gzip, deflate, br') == 'br'
+        assert choose_encoding('gzip, br;q=0') == 'gzip'
+        assert choose_encoding('identity') is None
+        assert choose_encoding('') is None
+        assert choose_encoding(None) is None
+
+    def test_is_compressible(self):
+        """Test that media types are skipped"""
+        assert is_compressible('application/json')
+        assert not is_compressible('image/jpeg')
+        assert not is_compressible('video/mp4')
+
+
+class TestCompressedResponses:
+    """Test class for compressed API responses"""
+
+    def add_listings(self, client, count):
+        for index in range(count):
+            client.post('/properties', data={
+                'property_type': 'Apartment', 'address': f'{index} Residency Road', 'city': 'Bengaluru',
+                'status': 'Available', 'description': 'Two bedroom apartment close to the metro station'
+            })
+
+    def test_large_json_is_compressed(self, client):
+        """Test gzip and brotli bodies decode to the same JSON"""
+        self.add_listings(client, 20)
+        plain = client.get('/properties')
+        assert 'Content-Encoding' not in plain.headers
+        assert 'Accept-Encoding' in plain.headers['Vary']
+
+        gzipped = client.get('/properties', headers={'Accept-Encoding': 'gzip'})
+        assert gzipped.headers['Content-Encoding'] == 'gzip'
+        assert json.loads(gzip.decompress(gzipped.data)) == plain.get_json()
+        assert len(gzipped.data) < len(plain.data) / 4
+
+        brotlied = client.get('/properties', headers={'Accept-Encoding': 'gzip, br'})
+        assert brotlied.headers['Content-Encoding'] == 'br'
+        assert json.loads(brotli.decompress(brotlied.data)) == plain.get_json()
+        assert int(brotlied.headers['Content-Length']) == len(brotlied.data)
+
+    def test_small_and_media_responses_pass_through(self, client):
+        """Test the size threshold and that photos are not recompressed"""
+        self.add_listings(client, 1)
+        response = client.get('/properties/1', headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in response.headers
+
+        buffer = BytesIO()
+        Image.new('RGB', (200, 200), 'white').save(buffer, format='PNG')
+        client.patch('/properties/1', data={'photos': (BytesIO(buffer.getvalue()), 'a.png')},
+                     content_type='multipart/form-data')
+        photo = client.get('/property_photos/1', headers={'Accept-Encoding': 'gzip'})
+        assert photo.status_code == 200
+        assert 'Content-Encoding' not in photo.headers
+
+    def test_encoded_responses_get_their_own_etag(self, client):
+        """Test that each encoding has a distinct strong ETag and any of them passes If-Match"""
+        self.add_listings(client, 1)
+        min_size = app.config['COMPRESS_MIN_SIZE']
+        app.config['COMPRESS_MIN_SIZE'] = 0
+        try:
+            plain = client.get('/properties/1')
+            gzipped = client.get('/properties/1', headers={'Accept-Encoding': 'gzip'})
+            brotlied = client.get('/properties/1', headers={'Accept-Encoding': 'br'})
+        finally:
+            app.config['COMPRESS_MIN_SIZE'] = min_size
+        assert [plain.headers['ETag'], gzipped.headers['ETag'], brotlied.headers['ETag']] == [
+            '"1-1"', '"1-1-gzip"', '"1-1-br"']
+
+        response = client.patch('/properties/1', json={'price': 4200000}, headers={'If-Match': gzipped.headers['ETag']})
+        assert response.status_code == 200
+        response = client.patch('/properties/1', json={'price': 4300000}, headers={'If-Match': brotlied.headers['ETag']})
+        assert response.status_code == 412
+
+
+def run_tests():
+    """Run all tests with pytest"""
+    pytest.main([__file__, "-v", "--tb=short"])
+
+
+if __name__ == "__main__":
+    # Run tests directly
+    run_tests()
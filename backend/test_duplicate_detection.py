@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Pytest for perceptual-hash duplicate listing and photo detection.
+This test suite includes:
+1. dHash stability under re-encoding and resizing
+2. BK-tree and multi-index band lookups agreeing with a brute-force scan
+3. The /properties/<id>/duplicates endpoint and the dedup-photos batch job
+"""
+
+import pytest
+import os
+import random
+from io import BytesIO
+from PIL import Image, ImageDraw
+
+# Import the Flask app and functions
+import sys
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+from app import app, db, PropertyPhoto, dedup_photos
+from dedup import BKTree, band_neighbours, hamming, hash_bands, BAND_COUNT
+from imaging import dhash
+
+
+def make_photo(seed, size=(800, 600), quality=90):
+    rng = random.Random(seed)
+    image = Image.new('RGB', size, (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        draw.rectangle([x, y, x + size[0] // 4, y + size[1] // 4],
+                       fill=(rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    buffer = BytesIO()
+    image.save(buffer, format='JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+def reencode(image_data, size, quality):
+    buffer = BytesIO()
+    Image.open(BytesIO(image_data)).resize(size).save(buffer, format='JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+class TestPerceptualHashing:
+    """Test class for hashing and lookup structures"""
+
+    def test_dhash_survives_reencoding(self):
+        """Test that a resized, recompressed copy hashes close to the original"""
+        original = make_photo(1)
+        copy = reencode(original, (400, 300), 60)
+        unrelated = make_photo(2)
+
+        assert hamming(dhash(original), dhash(copy)) <= 6
+        assert hamming(dhash(original), dhash(unrelated)) > 10
+        assert dhash(b'not an image') is None
+
+    def test_bk_tree_matches_brute_force(self):
+        """Test that BK-tree range search returns exactly the brute-force result"""
+        rng = random.Random(7)
+        hashes = [rng.getrandbits(64) for _ in range(500)]
+        base = hashes[0]
+        hashes += [base ^ (1 << bit) for bit in range(0, 64, 9)]
+        tree = BKTree()
+        for index, value in enumerate(hashes):
+            tree.add(value, index)
+
+        for query in (base, hashes[42]):
+            expected = sorted((index, hamming(query, value)) for index, value in enumerate(hashes)
+                              if hamming(query, value) <= 6)
+            assert sorted(tree.search(query, 6)) == expected
+
+    def test_band_neighbours_cover_radius(self):
+        """Test the multi-index guarantee: hashes within 7 bits share a band within 1 bit"""
+        rng = random.Random(11)
+        for _ in range(200):
+            value = rng.getrandbits(64)
+            other = value
+            for bit in rng.sample(range(64), rng.randrange(8)):
+                other ^= 1 << bit
+            candidates = [band_neighbours(band_value, 7 // BAND_COUNT) for band_value in hash_bands(value)]
+            assert any(band_value in candidates[band] for band, band_value in enumerate(hash_bands(other)))
+
+
+class TestDuplicateEndpoint:
+    """Test class for duplicate detection routes and batch job"""
+
+    def add_property(self, client, photos):
+        data = {
+            'property_type': 'House',
+            'address': '4 Temple Street',
+            'city': 'Tirupati',
+            'price': '3200000',
+            'status': 'Available',
+            'photos': [(BytesIO(photo), f'photo_{index}.jpg') for index, photo in enumerate(photos)]
+        }
+        response = client.post('/properties', data=data, content_type='multipart/form-data')
+        assert response.status_code == 201
+        return response.get_json()['property_id']
+
+    def test_hash_stored_at_upload(self, client):
+        """Test that add_property stores the hash and its indexed bands"""
+        photo_data = make_photo(3)
+        self.add_property(client, [photo_data])
+        photo = PropertyPhoto.query.first()
+
+        assert int(photo.dhash, 16) == dhash(photo_data)
+        assert [photo.dhash_band_0, photo.dhash_band_1, photo.dhash_band_2, photo.dhash_band_3] == hash_bands(dhash(photo_data))
+
+    def test_reposted_listing_is_reported(self, client):
+        """Test that a re-post with recompressed photos is found and an unrelated listing is not"""
+        first, second = make_photo(4), make_photo(5)
+        original_id = self.add_property(client, [first, second])
+        repost_id = self.add_property(client, [reencode(first, (640, 480), 70), reencode(second, (1024, 768), 80)])
+        unrelated_id = self.add_property(client, [make_photo(6)])
+
+        response = client.get(f'/properties/{original_id}/duplicates')
+        assert response.status_code == 200
+        duplicates = response.get_json()['duplicates']
+        assert [item['property_id'] for item in duplicates] == [repost_id]
+        assert len(duplicates[0]['matches']) == 2
+
+        assert client.get(f'/properties/{unrelated_id}/duplicates').get_json()['duplicates'] == []
+        assert client.get('/properties/999/duplicates').status_code == 404
+
+    @pytest.mark.commits
+    def test_dedup_job_hashes_and_reports(self, client):
+        """Test that the batch job backfills missing hashes and reports listing pairs"""
+        photo_data = make_photo(8)
+        first_id = self.add_property(client, [photo_data])
+        second_id = self.add_property(client, [photo_data])
+        for photo in PropertyPhoto.query.all():
+            photo.set_dhash(None)
+        db.session.commit()
+
+        result = app.test_cli_runner().invoke(dedup_photos)
+        assert result.exit_code == 0
+        assert 'Hashed 2 photos' in result.output
+        assert f'Properties {first_id} and {second_id} share 1 near-duplicate photos' in result.output
+        assert PropertyPhoto.query.filter(PropertyPhoto.dhash.is_(None)).count() == 0
+
+
+def run_tests():
+    """Run all tests with pytest"""
+    pytest.main([__file__, "-v", "--tb=short"])
+
+
+if __name__ == "__main__":
+    # Run tests directly
+    run_tests()
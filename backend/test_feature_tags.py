@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Pytest for the structured features tag index.
+This test suite includes:
+1. Parsing and normalization of free-text features into tags
+2. Tag maintenance on add_property and PATCH
+3. The features= filter in AND and OR mode, and the index-features backfill
+"""
+
+import pytest
+import os
+from datetime import datetime
+
+# Import the Flask app and functions
+import sys
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+from app import app, db, Property, FeatureTag, index_features
+from features import parse_features
+
+
+class TestFeatureParsing:
+    """Test class for feature parsing"""
+
+    def test_parse_features(self):
+        """Test splitting, case folding and synonym mapping"""
+        assert parse_features('Parking, Lift;  East Facing ') == ['east facing', 'lift', 'parking']
+        assert parse_features('Car Parking,elevator, Gym.') == ['gym', 'lift', 'parking']
+        assert parse_features('parking,,PARKING') == ['parking']
+        assert parse_features('') == []
+        assert parse_features(None) == []
+
+
+class TestFeatureFilter:
+    """Test class for tag maintenance and the features= filter"""
+
+    def add_property(self, client, features):
+        response = client.post('/properties', data={
+            'property_type': 'Apartment', 'address': '3 Lake View', 'city': 'Vijayawada', 'status': 'Available',
+            'features': features
+        })
+        assert response.status_code == 201
+        return response.get_json()['property_id']
+
+    def search(self, client, query):
+        response = client.get(f'/properties?{query}')
+        assert response.status_code == 200
+        return sorted(prop['id'] for prop in response.get_json())
+
+    def test_features_filter_modes(self, client):
+        """Test AND (default) and OR matching against the tag index"""
+        both = self.add_property(client, 'Parking, Lift, Gym')
+        parking = self.add_property(client, 'car parking')
+        lift = self.add_property(client, 'Elevator')
+        self.add_property(client, '')
+
+        assert self.search(client, 'features=parking,lift') == [both]
+        assert self.search(client, 'features=Parking') == [both, parking]
+        assert self.search(client, 'features=parking,lift&features_mode=any') == [both, parking, lift]
+        assert self.search(client, 'features=parking,sauna') == []
+        assert self.search(client, 'features=sauna&features_mode=any') == []
+        assert FeatureTag.query.count() == 3
+
+        client.delete(f'/properties/{both}')
+        assert self.search(client, 'features=lift') == [lift]
+
+    def test_patch_updates_tags(self, client):
+        """Test that editing features replaces the listing's tags"""
+        property_id = self.add_property(client, 'Parking')
+        response = client.patch(f'/properties/{property_id}', json={'features': 'Lift, Garden'})
+        assert response.status_code == 200
+
+        assert self.search(client, 'features=parking') == []
+        assert self.search(client, 'features=garden,lift') == [property_id]
+
+    def test_index_features_backfills_existing_rows(self, client):
+        """Test that the CLI command builds tags for rows written before the index"""
+        for features in ('Parking, Lift', 'Gym', None):
+            db.session.add(Property(property_type='House', address='2 Old Road', city='Guntur',
+                                    status='Available', features=features, created_at=datetime.now()))
+        db.session.commit()
+        assert self.search(client, 'features=parking') == []
+
+        result = app.test_cli_runner().invoke(index_features)
+        assert result.exit_code == 0, result.output
+        assert 'Indexed features for 2 properties across 3 tags' in result.output
+        assert self.search(client, 'features=lift,parking') == [1]
+
+
+def run_tests():
+    """Run all tests with pytest"""
+    pytest.main([__file__, "-v", "--tb=short"])
+
+
+if __name__ == "__main__":
+    # Run tests directly
+    run_tests()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Pytest for the shared test harness in conftest.py.
+This test suite includes:
+1. Commits inside a test being rolled back before the next one
+2. Tests marked commits writing for real, with the schema rebuilt afterwards
+3. The seeded listing dataset loading under the class and going away after it
+"""
+
+import pytest
+import os
+import threading
+
+# Import the Flask app and functions
+import sys
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+from app import app, db, Property
+from conftest import LISTINGS_DATASET_SIZE
+
+
+def listing_count():
+    return db.session.query(db.func.count(Property.id)).scalar()
+
+
+class TestTransactionalTests:
+    """Test class for rolled-back and committing tests; order matters here"""
+
+    def add_property(self, client, city):
+        response = client.post('/properties', data={
+            'property_type': 'House', 'address': '8 Station Road', 'city': city, 'status': 'Available'})
+        assert response.status_code == 201
+        return response.get_json()['property_id']
+
+    def test_commit_inside_a_test(self, client):
+        """Test that committed writes and failed writes behave as usual inside a test"""
+        self.add_property(client, 'Ongole')
+        assert client.patch('/properties/1', json={'price': 'not a number'}).status_code == 400
+        assert [prop['city'] for prop in client.get('/properties').get_json()] == ['Ongole']
+
+    def test_previous_commit_was_rolled_back(self, client):
+        """Test that the listing from the previous test, and its id, are gone"""
+        assert listing_count() == 0
+        assert self.add_property(client, 'Chittoor') == 1
+
+    @pytest.mark.commits
+    def test_marked_commits_are_real(self, client):
+        """Test that another thread sees a committed listing"""
+        self.add_property(client, 'Kadapa')
+        seen = []
+
+        def read():
+            with app.app_context():
+                seen.append(listing_count())
+
+        thread = threading.Thread(target=read)
+        thread.start()
+        thread.join()
+        assert seen == [1]
+
+    def test_schema_rebuilt_after_committing_test(self, client):
+        """Test that the committed listing was cleared with the schema"""
+        assert listing_count() == 0
+
+
+class TestSeededListings:
+    """Test class for the cached listing dataset"""
+
+    def test_dataset_is_loaded(self, client, seeded_listings):
+        """Test that every seeded listing is visible and writes still roll back"""
+        assert listing_count() == seeded_listings == LISTINGS_DATASET_SIZE
+        client.delete('/properties/1')
+        assert client.get('/properties/1').status_code == 404
+
+    def test_dataset_is_shared_by_the_class(self, client, seeded_listings):
+        """Test that the previous test's delete was rolled back but the dataset stayed"""
+        assert client.get('/properties/1').status_code == 200
+        assert listing_count() == LISTINGS_DATASET_SIZE
+
+
+def run_tests():
+    """Run all tests with pytest"""
+    pytest.main([__file__, "-v", "--tb=short"])
+
+
+if __name__ == "__main__":
+    # Run tests directly
+    run_tests()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Pytest for the listing change feed.
+This test suite includes:
+1. Change rows written with add_property, PATCH and DELETE
+2. since= long-polling, including the empty timeout case
+3. Server-Sent Events framing and Last-Event-ID resumption
+4. Sequence numbers surviving the purge of deleted listings
+5. Holding the cursor at a gap left by a transaction that has not committed yet
+"""
+
+import pytest
+import os
+import json
+import threading
+from datetime import datetime, timedelta
+
+# Import the Flask app and functions
+import sys
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+from app import app, db, ListingChange, purge_deleted_properties
+
+
+class TestListingEvents:
+    """Test class for the /events change feed"""
+
+    def add_property(self, client, city='Nellore'):
+        response = client.post('/properties', data={
+            'property_type': 'House', 'address': '4 Beach Road', 'city': city, 'status': 'Available'
+        })
+        assert response.status_code == 201
+        return response.get_json()['property_id']
+
+    def test_writes_append_changes(self, client):
+        """Test that each write appends exactly one change in order"""
+        first_id = self.add_property(client)
+        second_id = self.add_property(client, city='Ongole')
+        client.patch(f'/properties/{first_id}', json={'price': 4500000})
+        client.delete(f'/properties/{second_id}')
+
+        response = client.get('/events?since=0&timeout=0')
+        assert response.status_code == 200
+        body = response.get_json()
+        assert [(event['property_id'], event['action']) for event in body['events']] == [
+            (first_id, 'created'), (second_id, 'created'), (first_id, 'updated'), (second_id, 'deleted')]
+        assert body['last_sequence'] == body['events'][-1]['sequence']
+        assert body['events'][2]['property']['price'] == 4500000
+        assert body['events'][3]['property'] is None
+
+        tail = client.get(f"/events?since={body['events'][1]['sequence']}&timeout=0").get_json()
+        assert [event['action'] for event in tail['events']] == ['updated', 'deleted']
+
+    def test_failed_write_leaves_no_change(self, client):
+        """Test that a rejected PATCH does not add to the feed"""
+        property_id = self.add_property(client)
+        response = client.patch(f'/properties/{property_id}', json={'price': 1}, headers={'If-Match': '"stale"'})
+        assert response.status_code == 412
+        assert ListingChange.query.count() == 1
+
+    def test_purge_keeps_sequence(self, client):
+        """Test that purged listings keep their changes and sequence numbers are not reused"""
+        kept_id = self.add_property(client)
+        deleted_id = self.add_property(client, city='Ongole')
+        client.delete(f'/properties/{deleted_id}')
+        assert purge_deleted_properties(pause=0) == 1
+
+        events = client.get('/events?since=0&timeout=0').get_json()['events']
+        assert [(event['property_id'], event['action']) for event in events] == [
+            (kept_id, 'created'), (deleted_id, 'created'), (deleted_id, 'deleted')]
+        new_id = self.add_property(client, city='Kavali')
+        tail = client.get(f"/events?since={events[-1]['sequence']}&timeout=0").get_json()['events']
+        assert [(event['sequence'], event['property_id']) for event in tail] == [(events[-1]['sequence'] + 1, new_id)]
+
+    def test_cursor_waits_at_uncommitted_gap(self, client):
+        """Test that a change visible before a lower id stays back until the gap fills or ages out"""
+        property_id = self.add_property(client)
+        # Change 3 committed first; change 2 belongs to a transaction still in flight
+        db.session.add(ListingChange(id=3, property_id=property_id, action='updated', created_at=datetime.now()))
+        db.session.commit()
+        body = client.get('/events?since=0&timeout=0').get_json()
+        assert [event['sequence'] for event in body['events']] == [1] and body['last_sequence'] == 1
+        assert client.get('/events?timeout=0').get_json()['last_sequence'] == 1
+
+        db.session.add(ListingChange(id=2, property_id=property_id, action='updated', created_at=datetime.now()))
+        db.session.commit()
+        assert [event['sequence'] for event in client.get('/events?since=1&timeout=0').get_json()['events']] == [2, 3]
+
+        # A gap older than EVENTS_GAP_SECONDS is an id lost to a rollback
+        db.session.add(ListingChange(id=5, property_id=property_id, action='updated',
+                                     created_at=datetime.now() - timedelta(minutes=1)))
+        db.session.commit()
+        assert [event['sequence'] for event in client.get('/events?since=3&timeout=0').get_json()['events']] == [5]
+
+    def test_long_poll_times_out_empty(self, client):
+        """Test that a caught-up client gets an empty batch after the timeout"""
+        self.add_property(client)
+        response = client.get('/events?since=1&timeout=0.2')
+        assert response.status_code == 200
+        assert response.get_json() == {'events': [], 'last_sequence': 1}
+
+    @pytest.mark.commits
+    def test_long_poll_wakes_on_commit(self, client):
+        """Test that a waiting long-poll returns as soon as a listing is added"""
+        timer = threading.Timer(0.3, lambda: app.test_client().post('/properties', data={
+            'property_type': 'Land', 'address': 'Survey 12', 'city': 'Kadapa', 'status': 'Available'}))
+        timer.start()
+        response = client.get('/events?since=0&timeout=10')
+        timer.join()
+        events = response.get_json()['events']
+        assert [event['action'] for event in events] == ['created']
+        assert events[0]['property']['city'] == 'Kadapa'
+
+    def test_event_stream_resumes_from_last_event_id(self, client):
+        """Test SSE framing and resuming after the last delivered event"""
+        self.add_property(client)
+        self.add_property(client, city='Tirupati')
+
+        response = client.get('/events', headers={'Accept': 'text/event-stream', 'Last-Event-ID': '1'})
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        chunks = response.iter_encoded()
+        assert next(chunks) == b'retry: 3000\n\n'
+        message = next(chunks).decode()
+        response.close()
+
+        fields = dict(line.split(': ', 1) for line in message.strip().split('\n'))
+        assert fields['id'] == '2'
+        assert fields['event'] == 'created'
+        assert json.loads(fields['data'])['property']['city'] == 'Tirupati'
+
+
+def run_tests():
+    """Run all tests with pytest"""
+    pytest.main([__file__, "-v", "--tb=short"])
+
+
+if __name__ == "__main__":
+    # Run tests directly
+    run_tests()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Pytest for the server-rendered listing pages.
+This test suite includes:
+1. /listings search results, paging links and escaping
+2. Fragment cache hits, and new fragments after an edit or in another locale
+3. /listings/<id> detail pages, including archived listings
+"""
+
+import pytest
+import os
+from io import BytesIO
+from datetime import datetime, timedelta
+from PIL import Image
+from flask_babel import refresh
+
+# Import the Flask app and functions
+import sys
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+from app import app, db, fragment_cache, archive_inactive_properties, Property
+from fragments import FragmentCache
+
+
+def jpeg():
+    buffer = BytesIO()
+    Image.new('RGB', (64, 48), 'green').save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+class TestFragmentCache:
+    """Test class for the LRU fragment store"""
+
+    def test_eviction(self):
+        """Test that the least recently used fragment goes first"""
+        cache = FragmentCache(max_entries=2)
+        cache.set('a', '<a>')
+        cache.set('b', '<b>')
+        assert cache.get_many(['a']) == {'a': '<a>'}
+        cache.set('c', '<c>')
+        assert cache.get_many(['a', 'b', 'c']) == {'a': '<a>', 'c': '<c>'}
+        assert (cache.hits, cache.misses) == (3, 1)
+
+
+class TestListingPages:
+    """Test class for /listings and /listings/<id>"""
+
+    @pytest.fixture
+    def client(self, client):
+        """Create a test client"""
+        fragment_cache.clear()
+
+        yield client
+
+    def add_property(self, client, **fields):
+        data = {'property_type': 'House', 'address': '5 Canal Road', 'city': 'Rajahmundry', 'status': 'Available',
+                'price': '4500000', **fields}
+        response = client.post('/properties', data=data, content_type='multipart/form-data')
+        assert response.status_code == 201
+        return response.get_json()['property_id']
+
+    def test_listing_page(self, client):
+        """Test that cards, filters and paging render on the server"""
+        first_id = self.add_property(client, address='<script>alert(1)</script>', bedrooms='3',
+                                     photos=(BytesIO(jpeg()), 'front.jpg'))
+        second_id = self.add_property(client, city='Kakinada', property_type='Land')
+        self.add_property(client, city='Kakinada')
+
+        response = client.get('/listings?city=Kakinada&per_page=1')
+        assert response.status_code == 200
+        assert response.mimetype == 'text/html'
+        assert 'Accept-Language' in response.headers['Vary']
+        html = response.get_data(as_text=True)
+        assert '2 properties found' in html
+        assert 'href="/listings?city=Kakinada&amp;per_page=1&amp;page=2"' in html
+        assert f'href="/listings/{second_id}"' not in html
+
+        html = client.get('/listings').get_data(as_text=True)
+        assert f'href="/listings/{first_id}"' in html and f'href="/listings/{second_id}"' in html
+        assert 'src="/property_photos/' in html and '?w=320' in html
+        assert '3 bedrooms' in html
+        assert client.get('/listings?archived=everything').status_code == 400
+
+        detail = client.get(f'/listings/{first_id}').get_data(as_text=True)
+        assert '&lt;script&gt;alert(1)&lt;/script&gt;' in detail and '<script>alert' not in detail
+        assert f'<link rel="canonical" href="http://localhost/listings/{first_id}">' in detail
+
+    def test_fragments_are_cached(self, client):
+        """Test that repeat renders hit the cache and edits or locales miss it"""
+        property_id = self.add_property(client)
+        self.add_property(client, city='Eluru', price='3000000')
+
+        client.get('/listings')
+        assert (fragment_cache.hits, fragment_cache.misses) == (0, 2)
+        client.get('/listings')
+        assert (fragment_cache.hits, fragment_cache.misses) == (2, 2)
+
+        client.patch(f'/properties/{property_id}', json={'price': 5200000})
+        html = client.get('/listings').get_data(as_text=True)
+        assert (fragment_cache.hits, fragment_cache.misses) == (3, 3)
+        assert '5,200,000' in html and '4,500,000' not in html
+
+        refresh()
+        html = client.get('/listings?lang=te').get_data(as_text=True)
+        assert (fragment_cache.hits, fragment_cache.misses) == (3, 5)
+        assert 'ఇల్లు' in html and '52,00,000' in html
+        assert '<html lang="te">' in html
+
+    def test_detail_pages(self, client):
+        """Test the detail page for live, archived and unknown listings"""
+        property_id = self.add_property(client, status='Sold/Rented', description='Corner plot near the river',
+                                        photos=(BytesIO(jpeg()), 'front.jpg'))
+        db.session.execute(Property.__table__.update().where(Property.id == property_id).values(
+            updated_at=datetime.now() - timedelta(days=200)))
+        db.session.commit()
+        archive_inactive_properties(older_than_days=90, pause=0)
+
+        response = client.get(f'/listings/{property_id}')
+        assert response.status_code == 200
+        html = response.get_data(as_text=True)
+        assert 'Corner plot near the river' in html and 'Archived' in html
+        assert 'srcset=' in html
+        assert client.get('/listings/999').status_code == 404
+
+
+def run_tests():
+    """Run all tests with pytest"""
+    pytest.main([__file__, "-v", "--tb=short"])
+
+
+if __name__ == "__main__":
+    # Run tests directly
+    run_tests()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Pytest for the materialized per-city and per-mediator statistics tables.
+This test suite includes:
+1. Incremental maintenance on insert, PATCH and delete
+2. Incremental results checked against a full recompute
+3. The /stats endpoints and the rebuild-stats command
+"""
+
+import pytest
+import os
+import random
+from datetime import date, timedelta
+
+# Import the Flask app and functions
+import sys
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+from app import app, db, Property, LocationStats, MediatorStats, STATS_SOURCE_COLUMNS, rebuild_stats
+import listing_stats
+
+
+def table_totals():
+    totals = {}
+    for row in LocationStats.query:
+        if row.listing_count:
+            totals[('location', (row.city, row.locality))] = row.totals()
+    for row in MediatorStats.query:
+        if row.listing_count:
+            totals[('mediator', (row.mediator_name,))] = row.totals()
+    return totals
+
+
+def recomputed_totals():
+    db.session.expire_all()
+    listings = [{column: getattr(prop, column) for column in STATS_SOURCE_COLUMNS} for prop in Property.query]
+    return listing_stats.aggregate(listings)
+
+
+def assert_totals_match(actual, expected):
+    assert actual.keys() == expected.keys()
+    for key in expected:
+        for column in listing_stats.STAT_COLUMNS:
+            assert actual[key][column] == pytest.approx(expected[key][column]), (key, column)
+
+
+class TestListingStats:
+    """Test class for incremental listing statistics"""
+
+    def add_property(self, client, **fields):
+        data = {'property_type': 'Apartment', 'address': '1 Main Road', 'status': 'Available', **fields}
+        response = client.post('/properties', data=data)
+        assert response.status_code == 201
+        return response.get_json()['property_id']
+
+    def test_incremental_matches_full_recompute(self, client):
+        """Test a random mix of inserts, price edits, moves and deletes against a recompute"""
+        rng = random.Random(3)
+        cities = ['Hyderabad', 'hyderabad ', 'Guntur', 'Warangal']
+        localities = ['', 'Madhapur', 'Kondapur']
+        mediators = ['Ravi Kumar', 'ravi  kumar', 'Lakshmi', '']
+        property_ids = []
+        for step in range(60):
+            action = rng.random()
+            if action < 0.5 or not property_ids:
+                property_ids.append(self.add_property(
+                    client, city=rng.choice(cities), locality=rng.choice(localities),
+                    mediator_name=rng.choice(mediators), price=str(rng.randrange(1, 100) * 100000),
+                    area_value=str(rng.randrange(500, 3000)), area_unit=rng.choice(['sqft', 'sqm', 'gunta']),
+                    listing_date=(date.today() - timedelta(days=rng.randrange(90))).isoformat()))
+            elif action < 0.8:
+                changes = rng.choice([{'price': rng.randrange(1, 100) * 100000}, {'city': rng.choice(cities)},
+                                      {'mediator_name': rng.choice(mediators)}, {'area_unit': 'acres'}])
+                client.patch(f'/properties/{rng.choice(property_ids)}', json=changes)
+            else:
+                client.delete(f'/properties/{property_ids.pop(rng.randrange(len(property_ids)))}')
+
+        assert len(table_totals()) > 5
+        assert_totals_match(table_totals(), recomputed_totals())
+
+    def test_location_and_mediator_endpoints(self, client):
+        """Test averages, city rollups and days on market"""
+        listed = (date.today() - timedelta(days=10)).isoformat()
+        self.add_property(client, city='Guntur', locality='Brodipet', price='3000000', area_value='1000',
+                          area_unit='sqft', mediator_name='Lakshmi', listing_date=listed)
+        self.add_property(client, city='guntur', locality='Arundelpet', price='5000000', area_value='1000',
+                          area_unit='sqft', mediator_name='lakshmi', listing_date=listed)
+        deleted_id = self.add_property(client, city='Guntur', price='9900000', mediator_name='Lakshmi')
+        client.delete(f'/properties/{deleted_id}')
+
+        cities = client.get('/stats/locations').get_json()
+        assert cities == [{'city': 'Guntur', 'listing_count': 2, 'average_price': 4000000.0,
+                           'average_price_per_sqft': 4000.0, 'average_days_on_market': 10.0}]
+
+        localities = client.get('/stats/locations?city=GUNTUR').get_json()
+        assert [row['locality'] for row in localities] == ['Arundelpet', 'Brodipet']
+
+        mediators = client.get('/stats/mediators').get_json()
+        assert mediators[0]['mediator_name'] == 'Lakshmi'
+        assert mediators[0]['listing_count'] == 2
+
+    def test_rebuild_command(self, client):
+        """Test that rebuild-stats reproduces the incrementally maintained tables"""
+        for city in ('Ongole', 'Ongole', 'Nandyal'):
+            self.add_property(client, city=city, price='1500000', mediator_name='Suresh')
+        incremental = table_totals()
+        LocationStats.query.delete()
+        db.session.commit()
+
+        result = app.test_cli_runner().invoke(rebuild_stats)
+        assert result.exit_code == 0
+        assert_totals_match(table_totals(), incremental)
+
+
+def run_tests():
+    """Run all tests with pytest"""
+    pytest.main([__file__, "-v", "--tb=short"])
+
+
+if __name__ == "__main__":
+    # Run tests directly
+    run_tests()
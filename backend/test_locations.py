@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Pytest for transliterated location search.
+This test suite includes:
+1. Telugu, Kannada and English spellings of a place sharing one search key
+2. Prefix, cross-script and typo-tolerant suggestions from the in-memory index
+3. Keys written with every listing and used by the city, locality and address filters,
+   with address keys matched on word boundaries
+4. GET /locations/suggest and the index-locations backfill
+"""
+
+import pytest
+import os
+from datetime import datetime, timedelta
+
+# Import the Flask app and functions
+import sys
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+import app as app_module
+from app import app, db, archive_inactive_properties, rebuild_listing_stats, Property
+from locations import LocationIndex, latin_name, location_key, transliterate
+
+
+class TestLocationKeys:
+    """Test class for transliteration and key normalization"""
+
+    def test_transliteration(self):
+        """Test Telugu and Kannada to Latin, including vowel signs, virama and anusvara"""
+        assert transliterate('హైదరాబాద్') == 'haidaraabaad'
+        assert transliterate('ಹೈದರಾಬಾದ್') == 'haidaraabaad'
+        assert transliterate('ಬೆಂಗಳೂರು') == 'bengaluuru'
+        assert transliterate('విశాఖపట్నం') == 'vishaakhapatnam'
+        assert transliterate('Road నం. ౧౨') == 'Road nam. 12'
+        # The zero-width non-joiner some keyboards insert doesn't split the word
+        assert latin_name('కూకట్‌పల్లి') == 'kuukatpalli'
+        assert latin_name('  Bañjara   HILLS, ') == 'banjara hills'
+
+    def test_spellings_share_a_key(self):
+        """Test that scripts and common spelling variants map to one key"""
+        for spellings in (['Hyderabad', 'Hyderbad', 'హైదరాబాద్', 'ಹೈದರಾಬಾದ್'],
+                          ['Vijayawada', 'Vijayavada', 'విజయవాడ'],
+                          ['Bengaluru', 'Bangalore', 'ಬೆಂಗಳೂರು'],
+                          ['Gachibowli', 'Gachibouli', 'గచ్చిబౌలి'],
+                          ['Kukatpally', 'Kukatpalli', 'కూకట్‌పల్లి'],
+                          ['Secunderabad', 'Sikindrabad', 'సికింద్రాబాద్'],
+                          ['Banjara Hills', 'banjarahills', 'బంజారా హిల్స్']):
+            assert len({location_key(spelling) for spelling in spellings}) == 1, spellings
+        assert location_key('Hyderabad') != location_key('Secunderabad')
+        assert location_key('Kakinada') != location_key('Kondapur')
+        assert location_key('Sector 12') != location_key('Sector 1')
+        assert location_key('') is None and location_key(' - ') is None and location_key(None) is None
+
+
+class TestLocationIndex:
+    """Test class for the autocomplete index on its own"""
+
+    @pytest.fixture
+    def index(self):
+        index = LocationIndex()
+        index.load([
+            ('city', 'Hyderabad', None, 120), ('city', 'హైదరాబాద్', None, 7), ('city', 'Secunderabad', None, 40),
+            ('city', 'Vijayawada', None, 20),
+            ('locality', 'Banjara Hills', 'Hyderabad', 12), ('locality', 'Gachibowli', 'Hyderabad', 30),
+            ('locality', 'గచ్చిబౌలి', 'హైదరాబాద్', 3), ('locality', 'Benz Circle', 'Vijayawada', 5),
+        ])
+        return index
+
+    def names(self, suggestions):
+        return [suggestion['name'] for suggestion in suggestions]
+
+    def test_prefixes_in_any_script(self, index):
+        """Test autocomplete from the start of a name or word, typed in Latin or Telugu"""
+        assert index.suggest('హైదరాబాద్') == [{'kind': 'city', 'name': 'Hyderabad', 'listing_count': 127}]
+        assert self.names(index.suggest('hyd')) == ['Hyderabad']
+        assert self.names(index.suggest('హైద')) == ['Hyderabad']
+        assert self.names(index.suggest('గచ్చి')) == ['Gachibowli']
+        assert self.names(index.suggest('hills')) == ['Banjara Hills']
+        assert self.names(index.suggest('b')) == ['Banjara Hills', 'Benz Circle']
+        assert index.suggest('') == [] and index.suggest('zzz') == []
+
+    def test_typos(self, index):
+        """Test that misspelled names are still suggested, below exact and prefix matches"""
+        assert self.names(index.suggest('Hyderanad')) == ['Hyderabad']
+        assert self.names(index.suggest('Vijaywada')) == ['Vijayawada']
+        assert self.names(index.suggest('Secunderbad')) == ['Secunderabad']
+
+    def test_merged_spellings_and_filters(self, index):
+        """Test one entry per place, and the kind, city and limit options"""
+        assert index.suggest('gachibowli') == [
+            {'kind': 'locality', 'name': 'Gachibowli', 'listing_count': 33, 'city': 'Hyderabad'}]
+        assert self.names(index.suggest('b', kind='city')) == []
+        assert self.names(index.suggest('b', city='హైదరాబాద్')) == ['Banjara Hills']
+        assert self.names(index.suggest('b', limit=1)) == ['Banjara Hills']
+
+    def test_update_counts(self, index):
+        """Test that counts refresh in place, places at zero drop out, and new names need a load"""
+        assert index.update_counts([('city', 'Hyderabad', None, 130), ('locality', 'Banjara Hills', 'Hyderabad', 4)])
+        assert index.suggest('hyd') == [{'kind': 'city', 'name': 'Hyderabad', 'listing_count': 130}]
+        assert self.names(index.suggest('b')) == ['Banjara Hills']
+        assert not index.update_counts([('city', 'Guntur', None, 1)])
+
+
+class TestLocationSearch:
+    """Test class for keys on listings and the search endpoints"""
+
+    @pytest.fixture
+    def client(self, client):
+        """Create a test client with a fresh suggestion index"""
+        app_module.location_index = None
+        yield client
+        app_module.location_index = None
+
+    def add_property(self, client, **fields):
+        data = {'property_type': 'Apartment', 'address': '4 Temple Street', 'city': 'Hyderabad', 'status': 'Available',
+                **fields}
+        response = client.post('/properties', data=data)
+        assert response.status_code == 201
+        return response.get_json()['property_id']
+
+    def search(self, client, query):
+        return sorted(prop['id'] for prop in client.get(f'/properties?{query}').get_json())
+
+    def test_keys_written_with_listing(self, client):
+        """Test that adds and edits store the keys"""
+        property_id = self.add_property(client, city='హైదరాబాద్', locality='Madhapur')
+        prop = db.session.get(Property, property_id)
+        assert (prop.city_key, prop.locality_key, prop.address_key) == ('hdrbd', 'mdpr', '4 tmpl strt')
+
+        client.patch(f'/properties/{property_id}', json={'locality': 'Gachibowli'})
+        db.session.expire_all()
+        assert db.session.get(Property, property_id).locality_key == 'gcbl'
+
+    def test_filters_across_scripts(self, client):
+        """Test city, locality and address filters in any script, with substrings still working"""
+        english = self.add_property(client, locality='Gachibowli')
+        telugu = self.add_property(client, city='హైదరాబాద్', locality='గచ్చిబౌలి', address='12 Station Road')
+        other = self.add_property(client, city='Secunderabad', address='9 Temple Street')
+
+        assert self.search(client, 'city=హైదరాబాద్') == [english, telugu]
+        assert self.search(client, 'city=Hyderbad') == [english, telugu]
+        assert self.search(client, 'city=bad') == [english, other]
+        assert self.search(client, 'locality=Gachibouli') == [english, telugu]
+        assert self.search(client, 'address=temple st') == [english, other]
+        assert self.search(client, 'address=Staton Road') == [telugu]
+
+        app.config['COLUMNAR_SEARCH'] = True
+        app_module.listing_indexes.clear()
+        try:
+            assert self.search(client, 'city=హైదరాబాద్') == [english, telugu]
+            assert self.search(client, 'locality=గచ్చిబౌలి&city=bad') == [english]
+        finally:
+            app.config['COLUMNAR_SEARCH'] = False
+            app_module.listing_indexes.clear()
+
+    def test_address_matches_whole_words(self, client):
+        """Test that address keys only match from the start of a word, not across word breaks"""
+        nagar = self.add_property(client, address='5 Ram Nagar Colony')
+        garden = self.add_property(client, address='14 Lakshmi Garden Road')
+        mg_road = self.add_property(client, address='22 MG Road')
+
+        assert self.search(client, 'address=Main') == []
+        assert self.search(client, 'address=MG Road') == [mg_road]
+        assert self.search(client, 'address=Gardan Rd') == [garden]
+        assert self.search(client, 'address=నగర్ కాలనీ') == [nagar]
+        assert self.search(client, 'address=road') == [garden, mg_road]
+
+    def test_archived_listings_keep_keys(self, client):
+        """Test that archived listings are found by key too"""
+        property_id = self.add_property(client, city='విజయవాడ', status='Sold/Rented')
+        db.session.execute(Property.__table__.update().where(Property.id == property_id).values(
+            updated_at=datetime.now() - timedelta(days=200)))
+        db.session.commit()
+        assert archive_inactive_properties(older_than_days=90, pause=0) == 1
+        assert self.search(client, 'city=Vijayawada&archived=only') == [property_id]
+
+    def test_suggest_endpoint(self, client):
+        """Test /locations/suggest, its validation and the index rebuilding after its TTL"""
+        self.add_property(client, locality='Banjara Hills')
+        self.add_property(client, city='హైదరాబాద్', locality='Banjara Hills')
+        self.add_property(client, city='Vijayawada', locality='Benz Circle')
+
+        response = client.get('/locations/suggest?q=హైద')
+        assert response.status_code == 200
+        assert response.get_json() == [{'kind': 'city', 'name': 'Hyderabad', 'listing_count': 2}]
+        assert client.get('/locations/suggest?q=b&kind=locality&city=Hyderabad').get_json() == [
+            {'kind': 'locality', 'name': 'Banjara Hills', 'listing_count': 2, 'city': 'Hyderabad'}]
+        assert client.get('/locations/suggest?q=').get_json() == []
+        assert client.get('/locations/suggest?q=b&kind=street').status_code == 400
+
+        self.add_property(client, city='Guntur')
+        assert client.get('/locations/suggest?q=gun').get_json() == []
+        app.config['LOCATION_INDEX_TTL'] = 0
+        try:
+            assert [hit['name'] for hit in client.get('/locations/suggest?q=gun').get_json()] == ['Guntur']
+        finally:
+            app.config['LOCATION_INDEX_TTL'] = 30
+
+    @pytest.mark.commits
+    def test_index_locations_backfills_keys(self, client):
+        """Test that the CLI fills keys on listings written before they existed"""
+        property_id = self.add_property(client, city='Warangal', locality='Hanamkonda')
+        db.session.execute(Property.__table__.update().values(city_key=None, locality_key=None, address_key=None))
+        db.session.commit()
+        assert self.search(client, 'city=వరంగల్') == []
+
+        result = app.test_cli_runner().invoke(args=['index-locations'])
+        assert result.exit_code == 0, result.output
+        assert 'Indexed location keys for 1 listings' in result.output
+        assert self.search(client, 'city=వరంగల్') == [property_id]
+
+        # --all rewrites keys stored in an older format
+        db.session.execute(Property.__table__.update().values(address_key='4tmplstrt'))
+        db.session.commit()
+        result = app.test_cli_runner().invoke(args=['index-locations', '--all'])
+        assert 'Indexed location keys for 1 listings' in result.output
+        assert db.session.get(Property, property_id).address_key == '4 tmpl strt'
+
+
+class TestLocationsOnSeededListings:
+    """Test class for suggestions against the cached 20k listing dataset"""
+
+    def test_suggest_at_scale(self, client, seeded_listings):
+        """Test that seeded cities and localities are suggested with their listing counts"""
+        app_module.location_index = None
+        rebuild_listing_stats()
+        try:
+            suggestions = client.get('/locations/suggest?q=గుంటూరు').get_json()
+            assert [(hit['kind'], hit['name']) for hit in suggestions] == [('city', 'Guntur')]
+            assert suggestions[0]['listing_count'] == Property.query.filter_by(city='Guntur').count()
+            # The exact name, then the names it starts, then near misses
+            localities = client.get('/locations/suggest?q=sector 1&kind=locality&city=Guntur&limit=25').get_json()
+            assert localities[0]['name'] == 'Sector 1'
+            assert {hit['name'] for hit in localities[1:11]} == {f'Sector {n}' for n in range(10, 20)}
+            assert len(localities) == 25 and all(hit['city'] == 'Guntur' for hit in localities)
+        finally:
+            app_module.location_index = None
+
+
+def run_tests():
+    """Run all tests with pytest"""
+    pytest.main([__file__, "-v", "--tb=short"])
+
+
+if __name__ == "__main__":
+    # Run tests directly
+    run_tests()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Pytest for the streamed media archive.
+This test suite includes:
+1. /properties/<id>/media.zip contents, Content-Length and unknown listings
+2. Archives for archived listings
+3. Bounded memory while streaming hundreds of MB of photos
+"""
+
+import pytest
+import os
+import zipfile
+import threading
+from io import BytesIO
+from datetime import datetime, timedelta
+from PIL import Image
+
+# Import the Flask app and functions
+import sys
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+from app import app, db, archive_inactive_properties, Property, PropertyPhoto
+
+LARGE_PHOTO_BYTES = 80 * 1024 * 1024
+LARGE_PHOTO_COUNT = 3
+MAX_RSS_GROWTH = 48 * 1024 * 1024
+
+
+def jpeg(colour):
+    buffer = BytesIO()
+    Image.new('RGB', (64, 48), colour).save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+def rss_bytes():
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+class TestMediaZip:
+    """Test class for GET /properties/<id>/media.zip"""
+
+    def add_property(self, client, **fields):
+        data = {'property_type': 'House', 'address': '12 Temple Street', 'city': 'Nellore', 'status': 'Available',
+                'price': '3800000', **fields}
+        response = client.post('/properties', data=data, content_type='multipart/form-data')
+        assert response.status_code == 201
+        return response.get_json()['property_id']
+
+    def test_archive_contents(self, client):
+        """Test that every photo comes back byte for byte under a stored entry"""
+        photos = [jpeg('red'), jpeg('blue')]
+        property_id = self.add_property(client, photos=[(BytesIO(photo), f'{n}.jpg') for n, photo in enumerate(photos)])
+        photo_ids = [photo.id for photo in PropertyPhoto.query.filter_by(property_id=property_id).order_by(PropertyPhoto.id)]
+
+        response = client.get(f'/properties/{property_id}/media.zip')
+        assert response.status_code == 200
+        assert response.mimetype == 'application/zip'
+        assert response.headers['Content-Disposition'] == f'attachment; filename="property-{property_id}-media.zip"'
+        body = response.get_data()
+        assert int(response.headers['Content-Length']) == len(body)
+
+        with zipfile.ZipFile(BytesIO(body)) as archive:
+            assert archive.testzip() is None
+            infos = archive.infolist()
+            assert [info.filename for info in infos] == [f'property-{property_id}/photo-{photo_id}.jpg'
+                                                         for photo_id in photo_ids]
+            assert all(info.compress_type == zipfile.ZIP_STORED for info in infos)
+            assert [archive.read(info) for info in infos] == photos
+
+        empty_id = self.add_property(client)
+        response = client.get(f'/properties/{empty_id}/media.zip')
+        assert int(response.headers['Content-Length']) == len(response.get_data()) == 22
+        assert zipfile.ZipFile(BytesIO(response.get_data())).namelist() == []
+        assert client.get('/properties/999/media.zip').status_code == 404
+
+    def test_archived_listing(self, client):
+        """Test that an archived listing's photos are still downloadable"""
+        property_id = self.add_property(client, status='Sold/Rented', photos=(BytesIO(jpeg('green')), 'front.jpg'))
+        db.session.execute(Property.__table__.update().where(Property.id == property_id).values(
+            updated_at=datetime.now() - timedelta(days=200)))
+        db.session.commit()
+        assert archive_inactive_properties(older_than_days=90, pause=0) == 1
+
+        response = client.get(f'/properties/{property_id}/media.zip')
+        assert response.status_code == 200
+        with zipfile.ZipFile(BytesIO(response.get_data())) as archive:
+            assert archive.read(archive.namelist()[0]) == jpeg('green')
+
+    def test_memory_is_bounded(self, client):
+        """Test that streaming hundreds of MB of photos keeps RSS flat"""
+        property_id = self.add_property(client)
+        for _ in range(LARGE_PHOTO_COUNT):
+            db.session.execute(PropertyPhoto.__table__.insert().values(
+                property_id=property_id, mimetype='image/jpeg', image_data=db.func.zeroblob(LARGE_PHOTO_BYTES)))
+        db.session.commit()
+        db.session.remove()
+
+        baseline = rss_bytes()
+        peak = baseline
+        done = threading.Event()
+
+        def sample():
+            nonlocal peak
+            while not done.wait(0.005):
+                peak = max(peak, rss_bytes())
+
+        sampler = threading.Thread(target=sample)
+        sampler.start()
+        try:
+            response = client.get(f'/properties/{property_id}/media.zip', buffered=False)
+            received = sum(len(chunk) for chunk in response.response)
+            response.close()
+        finally:
+            done.set()
+            sampler.join()
+
+        assert received == int(response.headers['Content-Length']) > LARGE_PHOTO_BYTES * LARGE_PHOTO_COUNT
+        assert peak - baseline < MAX_RSS_GROWTH
+
+
+def run_tests():
+    """Run all tests with pytest"""
+    pytest.main([__file__, "-v", "--tb=short"])
+
+
+if __name__ == "__main__":
+    # Run tests directly
+    run_tests()
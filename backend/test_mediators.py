@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Pytest for the normalized mediator entity.
+This test suite includes:
+1. Phone number normalization and grouping of free-text mediator rows
+2. Mediator resolution on add_property and PATCH
+3. The /mediators/<id>/properties endpoint and the migrate-mediators backfill
+"""
+
+import pytest
+import os
+from datetime import datetime
+
+# Import the Flask app and functions
+import sys
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+from app import app, db, Property, Mediator, migrate_mediators
+from mediators import group_listings, normalize_phone
+
+
+class TestMediatorNormalization:
+    """Test class for phone normalization and grouping"""
+
+    def test_normalize_phone(self):
+        """Test that common ways of writing one number normalize identically"""
+        for contact in ('9848022338', '+91 98480-22338', '098480 22338', '91 9848022338'):
+            assert normalize_phone(contact) == '+919848022338'
+        assert normalize_phone('') is None
+        assert normalize_phone('call me') is None
+        assert normalize_phone('12345') is None
+
+    def test_group_listings(self):
+        """Test grouping by phone first and by name when no phone is given"""
+        groups = group_listings([
+            (1, 'Ravi Kumar', '9848022338'),
+            (2, 'ravi kumar ', '+91 98480 22338'),
+            (3, 'RAVI KUMAR', None),
+            (4, 'Lakshmi', ''),
+            (5, 'lakshmi', 'n/a'),
+            (6, None, None),
+        ])
+        by_name = {group['name']: group for group in groups}
+        assert sorted(by_name['Ravi Kumar']['listing_ids']) == [1, 2, 3]
+        assert by_name['Ravi Kumar']['phone'] == '+919848022338'
+        assert sorted(by_name['Lakshmi']['listing_ids']) == [4, 5]
+        assert len(groups) == 2
+
+
+class TestMediatorRoutes:
+    """Test class for mediator resolution, listing lookup and backfill"""
+
+    def add_property(self, client, name, contact, city='Hyderabad'):
+        response = client.post('/properties', data={
+            'property_type': 'House', 'address': '6 Tank Bund Road', 'city': city, 'status': 'Available',
+            'mediator_name': name, 'mediator_contact': contact
+        })
+        assert response.status_code == 201
+        return response.get_json()['property_id']
+
+    def test_add_property_links_one_mediator(self, client):
+        """Test that differently written contacts resolve to a single mediator"""
+        first_id = self.add_property(client, 'Ravi Kumar', '9848022338')
+        second_id = self.add_property(client, 'ravi  kumar', '+91 98480 22338', city='Warangal')
+        self.add_property(client, 'Lakshmi', '9000011111')
+
+        mediator = Mediator.query.filter_by(phone='+919848022338').one()
+        assert mediator.name == 'Ravi Kumar'
+        assert Mediator.query.count() == 2
+
+        response = client.get(f'/mediators/{mediator.id}/properties')
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body['mediator'] == {'id': mediator.id, 'name': 'Ravi Kumar', 'phone': '+919848022338'}
+        assert sorted(prop['id'] for prop in body['properties']) == [first_id, second_id]
+
+        client.delete(f'/properties/{second_id}')
+        assert [prop['id'] for prop in client.get(f'/mediators/{mediator.id}/properties').get_json()['properties']] == [first_id]
+        assert client.get('/mediators/999/properties').status_code == 404
+
+    def test_patch_relinks_mediator(self, client):
+        """Test that changing the contact on PATCH moves the listing to the right mediator"""
+        property_id = self.add_property(client, 'Ravi Kumar', '9848022338')
+        client.patch(f'/properties/{property_id}', json={'mediator_contact': '9000011111'})
+
+        prop = db.session.get(Property, property_id)
+        assert prop.mediator.phone == '+919000011111'
+
+    @pytest.mark.commits
+    def test_migrate_mediators_backfills_existing_rows(self, client):
+        """Test that the migration adds the column and links legacy rows"""
+        # Recreate the property table as it was before mediator_id existed
+        legacy_columns = ', '.join(column.name for column in Property.__table__.columns if column.name != 'mediator_id')
+        db.session.execute(db.text(f'CREATE TABLE property_legacy AS SELECT {legacy_columns} FROM property'))
+        db.session.execute(db.text('DROP TABLE property'))
+        db.session.execute(db.text('ALTER TABLE property_legacy RENAME TO property'))
+        rows = (('Ravi Kumar', '9848022338'), ('RAVI KUMAR', '098480 22338'), ('Ravi Kumar', None), ('Sita', None))
+        for property_id, (name, contact) in enumerate(rows, start=1):
+            db.session.execute(db.text(
+                "INSERT INTO property (id, property_type, address, city, status, mediator_name, mediator_contact, version, created_at) "
+                "VALUES (:id, 'House', '1 Old Road', 'Guntur', 'Available', :name, :contact, 1, :now)"),
+                {'id': property_id, 'name': name, 'contact': contact, 'now': datetime.now()})
+        db.session.commit()
+
+        result = app.test_cli_runner().invoke(migrate_mediators)
+        assert result.exit_code == 0, result.output
+        assert 'Linked 4 listings, created 2 mediators' in result.output
+
+        ravi = Mediator.query.filter_by(phone='+919848022338').one()
+        assert Property.query.filter_by(mediator_id=ravi.id).count() == 3
+        assert Property.query.filter(Property.mediator_id.is_(None)).count() == 0
+
+
+def run_tests():
+    """Run all tests with pytest"""
+    pytest.main([__file__, "-v", "--tb=short"])
+
+
+if __name__ == "__main__":
+    # Run tests directly
+    run_tests()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Pytest for price estimates.
+This test suite includes:
+1. The batch-trained regression recovering known effects, with locality and city fallbacks
+2. The memory-mapped model file and vectorized scoring
+3. GET /properties/estimate, its input validation, train-price-model and picking up a retrained model
+4. import-listings checking prices against the model and queueing saved-search alerts
+"""
+
+import pytest
+import os
+import math
+import random
+
+import numpy as np
+
+# Import the Flask app and functions
+import sys
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+import app as app_module
+from app import app, Property
+from price_model import PriceModel, train
+
+TYPE_EFFECTS = {'Apartment': 0.0, 'House': 0.3, 'Land': -0.5}
+LOCALITY_EFFECTS = {('Hyderabad', 'Banjara Hills'): 0.6, ('Hyderabad', 'Kukatpally'): -0.2,
+                    ('Warangal', 'Hanamkonda'): 0.1}
+CITY_EFFECTS = {'Hyderabad': 0.4, 'Warangal': -0.3}
+
+
+def catalog(count, seed=7):
+    rng = random.Random(seed)
+    listings = []
+    for _ in range(count):
+        property_type = rng.choice(list(TYPE_EFFECTS))
+        city, locality = rng.choice(list(LOCALITY_EFFECTS))
+        area, bedrooms = rng.uniform(500, 3000), rng.randint(1, 4)
+        log_price = (12 + TYPE_EFFECTS[property_type] + CITY_EFFECTS[city] + LOCALITY_EFFECTS[city, locality]
+                     + 0.9 * math.log(area) + 0.05 * bedrooms + rng.gauss(0, 0.1))
+        listings.append({'property_type': property_type, 'city': city, 'locality': locality, 'area_value': area,
+                         'area_unit': 'sqft', 'bedrooms': bedrooms, 'bathrooms': None,
+                         'price': round(math.exp(log_price))})
+    return listings
+
+
+@pytest.fixture(scope='module')
+def model():
+    return train(catalog(3000))
+
+
+class TestPriceModel:
+    """Test class for training and scoring on their own"""
+
+    def test_recovers_known_effects(self, model):
+        """Test the area slope, the in-sample error and locality ordering"""
+        assert model.numeric[0] == pytest.approx(0.9, abs=0.05)
+        assert model.header['listings'] == 3000 and model.header['median_error'] < 0.1
+
+        listing = {'property_type': 'Apartment', 'area_value': 1200, 'area_unit': 'sqft', 'bedrooms': 2}
+        expected = math.exp(12 + 0.4 + 0.6 + 0.9 * math.log(1200) + 0.1)
+        banjara = model.estimate({**listing, 'city': 'Hyderabad', 'locality': 'Banjara Hills'})
+        assert banjara['estimate'] == pytest.approx(expected, rel=0.05)
+        assert banjara['low'] < banjara['estimate'] < banjara['high']
+        assert banjara['locality_listings'] > 900
+        kukatpally = model.estimate({**listing, 'city': 'Hyderabad', 'locality': 'Kukatpally'})
+        assert kukatpally['estimate'] < banjara['estimate']
+
+        # Unknown localities fall back to the city, unknown cities to the catalog
+        unknown = model.estimate({**listing, 'city': 'Hyderabad', 'locality': 'Somewhere New'})
+        assert kukatpally['estimate'] < unknown['estimate'] < banjara['estimate']
+        assert unknown['locality_listings'] == 0
+        assert model.estimate({**listing, 'area_unit': 'sqm'})['estimate'] > model.estimate(listing)['estimate']
+
+    def test_spellings_share_effects(self, model):
+        """Test that a locality typed in Telugu gets the English spelling's effect"""
+        listing = {'property_type': 'House', 'area_value': 900, 'area_unit': 'sqft'}
+        assert model.estimate({**listing, 'city': 'హైదరాబాద్', 'locality': 'బంజారా హిల్స్'}) == \
+            model.estimate({**listing, 'city': 'Hyderabad', 'locality': 'Banjara Hills'})
+
+    def test_memory_mapped_file(self, model, tmp_path):
+        """Test the saved file round trip, memory-mapped, and batch scoring matching single estimates"""
+        path = str(tmp_path / 'price_model.bin')
+        model.save(path)
+        loaded = PriceModel.load(path)
+        assert isinstance(loaded.coefficients, np.memmap)
+        assert os.path.getsize(path) < 4096
+
+        listings = catalog(50, seed=8)
+        assert [loaded.estimate(listing) for listing in listings] == [model.estimate(listing) for listing in listings]
+        batch = loaded.estimate_many(listings + [{'property_type': 'Villa', 'city': 'Pune'}])
+        single = [math.exp(loaded.predict_log(listing)[0]) for listing in listings + [{'property_type': 'Villa'}]]
+        assert batch == pytest.approx(single, rel=1e-5)
+
+        with open(path, 'r+b') as model_file:
+            model_file.write(b'NOTMODEL')
+        with pytest.raises(ValueError):
+            PriceModel.load(path)
+
+
+class TestEstimateRoutes:
+    """Test class for the estimate endpoint and the batch commands"""
+
+    @pytest.fixture
+    def client(self, client, tmp_path):
+        """Create a test client with the price model written to a temporary file"""
+        path = app.config['PRICE_MODEL_PATH']
+        app.config['PRICE_MODEL_PATH'] = str(tmp_path / 'models' / 'price_model.bin')
+        app_module.price_models.clear()
+
+        yield client
+
+        app.config['PRICE_MODEL_PATH'] = path
+        app_module.price_models.clear()
+
+    def add_listings(self, client, listings):
+        for listing in listings:
+            data = {'address': '1 Lake View Road', 'status': 'Available',
+                    **{field: str(value) for field, value in listing.items() if value is not None}}
+            assert client.post('/properties', data=data).status_code == 201
+
+    def train(self):
+        result = app.test_cli_runner().invoke(args=['train-price-model'])
+        assert result.exit_code == 0, result.output
+        return result.output
+
+    def test_estimate_endpoint(self, client):
+        """Test 503 before training, then estimates and validation"""
+        query = '/properties/estimate?property_type=Apartment&area_value=1200&area_unit=sqft&bedrooms=2' \
+                '&city=Hyderabad&locality=Banjara Hills'
+        assert client.get(query).status_code == 503
+
+        self.add_listings(client, catalog(60))
+        assert 'Trained on 60 listings across 3 localities' in self.train()
+
+        response = client.get(query)
+        assert response.status_code == 200
+        estimate = response.get_json()
+        assert estimate['low'] < estimate['estimate'] < estimate['high']
+        assert estimate['estimate'] == pytest.approx(math.exp(12 + 1.0 + 0.9 * math.log(1200) + 0.1), rel=0.25)
+        assert estimate['locality_listings'] > 0
+        assert client.get('/properties/estimate').status_code == 200
+        assert client.get('/properties/estimate?bedrooms=two').status_code == 400
+
+    def test_estimate_rejects_out_of_range_inputs(self, client):
+        """Test 400 for non-finite or non-positive numbers, and huge areas priced at the catalog's largest"""
+        listings = catalog(60)
+        self.add_listings(client, listings)
+        self.train()
+        for query in ('area_value=inf', 'area_value=nan', 'area_value=-1200', 'area_value=0', 'bedrooms=0',
+                      'bathrooms=-2'):
+            response = client.get(f'/properties/estimate?property_type=House&{query}')
+            assert response.status_code == 400, query
+            assert 'must be a positive number' in response.get_json()['error']
+
+        largest = client.get(f"/properties/estimate?area_value={max(listing['area_value'] for listing in listings)}")
+        huge = client.get('/properties/estimate?area_value=1e300')
+        assert huge.status_code == 200 and huge.get_json() == largest.get_json()
+
+    def test_retrained_model_is_picked_up(self, client):
+        """Test that replacing the model file changes the next estimate"""
+        self.add_listings(client, catalog(40))
+        self.train()
+        query = '/properties/estimate?property_type=House&area_value=1000&area_unit=sqft&city=Warangal'
+        before = client.get(query).get_json()['estimate']
+
+        self.add_listings(client, [{**listing, 'price': listing['price'] * 4} for listing in catalog(200, seed=9)])
+        self.train()
+        assert client.get(query).get_json()['estimate'] > before * 2
+
+    def test_import_listings(self, client, tmp_path):
+        """Test that bulk imports are checked against the model, alert saved searches, and skip bad rows"""
+        self.add_listings(client, catalog(60))
+        self.train()
+        response = client.post('/saved_searches', json={'email': 'buyer@example.com',
+                                                        'filters': {'city': 'Hyderabad', 'property_type': 'House'}})
+        search_id = response.get_json()['id']
+        path = tmp_path / 'listings.csv'
+        path.write_text(
+            'property_type,address,city,locality,price,area_value,area_unit,bedrooms,status,features\n'
+            'House,5 Hill Road,Hyderabad,Banjara Hills,400000000,1500,sqft,3,Available,Parking\n'
+            'Apartment,6 Hill Road,Hyderabad,Banjara Hills,3000000,1500,sqft,3,Available,\n'
+            'Apartment,7 Hill Road,,Kukatpally,5000000,1200,sqft,2,Available,\n'
+            'Land,8 Hill Road,వరంగల్,,abc,,,,Available,\n', encoding='utf-8')
+
+        result = app.test_cli_runner().invoke(args=['import-listings', str(path), '--batch-size', '1'])
+        assert result.exit_code == 0, result.output
+        assert 'Line 3: price 3,000,000 is 0.01x the estimate' in result.output
+        assert 'Line 4: skipped, missing city' in result.output
+        assert 'Line 5: skipped, could not convert' in result.output
+        assert 'Imported 2 listings, skipped 2, flagged 1 prices' in result.output
+        imported = Property.query.filter_by(address='5 Hill Road').one()
+        assert imported.city_key == 'hdrbd' and [tag.name for tag in imported.feature_tags] == ['parking']
+        notifications = client.get(f'/saved_searches/{search_id}/notifications').get_json()['notifications']
+        assert [notification['property_id'] for notification in notifications] == [imported.id]
+
+
+def run_tests():
+    """Run all tests with pytest"""
+    pytest.main([__file__, "-v", "--tb=short"])
+
+
+if __name__ == "__main__":
+    # Run tests directly
+    run_tests()
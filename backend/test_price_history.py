@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Pytest for price history and the locality price index.
+This test suite includes:
+1. History rows written on create and on every price change, but not on other edits
+2. /properties/<id>/price_history range queries
+3. The monthly series built by build-price-index and served by /price_index
+"""
+
+import pytest
+import os
+from datetime import datetime
+
+# Import the Flask app and functions
+import sys
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+from app import app, db, PriceChange, LocalityPriceIndex, build_price_index, backfill_price_history
+import price_index
+
+
+class TestPriceHistory:
+    """Test class for price history tracking"""
+
+    def add_property(self, client, **fields):
+        data = {'property_type': 'Flat', 'address': '2 Temple Street', 'city': 'Guntur', 'status': 'Available'}
+        data.update(fields)
+        response = client.post('/properties', data=data)
+        assert response.status_code == 201
+        return response.get_json()['property_id']
+
+    def set_history(self, property_id, *dates):
+        changes = PriceChange.query.filter_by(property_id=property_id).order_by(PriceChange.id).all()
+        for change, changed_at in zip(changes, dates):
+            change.changed_at = changed_at
+        db.session.commit()
+
+    def test_price_changes_are_recorded(self, client):
+        """Test that only price edits append history rows"""
+        property_id = self.add_property(client, price='3000000')
+        client.patch(f'/properties/{property_id}', json={'address': '3 Temple Street'})
+        client.patch(f'/properties/{property_id}', json={'price': 3200000})
+        client.patch(f'/properties/{property_id}', json={'price': 3200000})
+        unpriced_id = self.add_property(client)
+
+        history = client.get(f'/properties/{property_id}/price_history').get_json()['history']
+        assert [change['price'] for change in history] == [3000000, 3200000]
+        assert PriceChange.query.filter_by(property_id=unpriced_id).count() == 0
+
+        result = app.test_cli_runner().invoke(backfill_price_history)
+        assert 'Backfilled price history for 0 properties' in result.output
+
+    def test_price_history_range(self, client):
+        """Test from/to filtering and validation"""
+        property_id = self.add_property(client, price='3000000')
+        for price in (3100000, 2900000):
+            client.patch(f'/properties/{property_id}', json={'price': price})
+        self.set_history(property_id, datetime(2024, 1, 5), datetime(2024, 2, 10), datetime(2024, 3, 15))
+
+        response = client.get(f'/properties/{property_id}/price_history?from=2024-02-01&to=2024-03-15')
+        assert response.status_code == 200
+        assert [change['price'] for change in response.get_json()['history']] == [3100000]
+        assert client.get(f'/properties/{property_id}/price_history?from=soon').status_code == 400
+        assert client.get('/properties/999/price_history').status_code == 404
+
+    def test_monthly_prices_carry_forward(self):
+        """Test that a listing counts every month at its latest price until it ends"""
+        changes = [(datetime(2024, 1, 20), 100.0), (datetime(2024, 3, 2), 120.0), (datetime(2024, 3, 25), 110.0)]
+        months = list(price_index.monthly_prices(changes, price_index.parse_month('2023-11'),
+                                                 price_index.parse_month('2024-05'), ended_at=datetime(2024, 5, 10)))
+        assert [(month.strftime('%Y-%m'), price) for month, price in months] == [
+            ('2024-01', 100.0), ('2024-02', 100.0), ('2024-03', 110.0), ('2024-04', 110.0)]
+
+    def test_build_and_query_price_index(self, client):
+        """Test the downsampled locality series and city-level aggregation"""
+        first_id = self.add_property(client, locality='Brodipet', price='3000000', area_value='1000', area_unit='sqft')
+        client.patch(f'/properties/{first_id}', json={'price': 3600000})
+        self.set_history(first_id, datetime(2024, 1, 10), datetime(2024, 3, 1))
+        second_id = self.add_property(client, city='guntur ', locality='arundelpet', price='5000000')
+        self.set_history(second_id, datetime(2024, 2, 15))
+
+        result = app.test_cli_runner().invoke(build_price_index)
+        assert result.exit_code == 0
+        assert LocalityPriceIndex.query.filter_by(city='Guntur', locality='Brodipet').count() > 3
+
+        series = client.get('/price_index?city=Guntur&locality=Brodipet&from=2024-01&to=2024-03').get_json()
+        assert [(point['period'], point['avg_price'], point['avg_price_per_sqft']) for point in series] == [
+            ('2024-01', 3000000, 3000), ('2024-02', 3000000, 3000), ('2024-03', 3600000, 3600)]
+
+        city = client.get('/price_index?city=guntur&from=2024-01&to=2024-03').get_json()
+        assert [(point['period'], point['listing_count'], point['avg_price']) for point in city] == [
+            ('2024-01', 1, 3000000), ('2024-02', 2, 4000000), ('2024-03', 2, 4300000)]
+
+        # Rebuilding from a month replaces only that month onward
+        client.patch(f'/properties/{second_id}', json={'price': 4000000})
+        self.set_history(second_id, datetime(2024, 2, 15), datetime(2024, 3, 20))
+        app.test_cli_runner().invoke(build_price_index, ['--since', '2024-03'])
+        city = client.get('/price_index?city=Guntur&from=2024-02&to=2024-03').get_json()
+        assert [point['avg_price'] for point in city] == [4000000, 3800000]
+
+        assert client.get('/price_index').status_code == 400
+        assert client.get('/price_index?city=Guntur&from=2024').status_code == 400
+
+
+def run_tests():
+    """Run all tests with pytest"""
+    pytest.main([__file__, "-v", "--tb=short"])
+
+
+if __name__ == "__main__":
+    # Run tests directly
+    run_tests()
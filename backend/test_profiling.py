@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Pytest for the sampling and memory profilers.
+This test suite includes:
+1. Collapsed stacks and speedscope output from SamplingProfiler
+2. Admin token checks on /admin/profile endpoints
+3. CPU and memory windows over live requests
+4. The profile-requests CLI command
+"""
+
+import pytest
+import os
+import json
+import time
+import threading
+from io import BytesIO
+from PIL import Image
+
+# Import the Flask app and functions
+import sys
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+from app import app, profile_requests
+from profiling import SamplingProfiler
+
+ADMIN_HEADERS = {'Authorization': 'Bearer test-admin-token'}
+
+
+def busy_listing_search(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def jpeg():
+    buffer = BytesIO()
+    Image.new('RGB', (64, 48), 'orange').save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+class TestSamplingProfiler:
+    """Test class for the stack sampler"""
+
+    def test_samples_tracked_threads(self):
+        """Test that only tracked threads are sampled, rooted at their label"""
+        stop = threading.Event()
+        tracked_ready = threading.Event()
+        profiler = SamplingProfiler()
+        profiler.start(0.001)
+
+        def tracked():
+            profiler.track('get_properties')
+            tracked_ready.set()
+            busy_listing_search(stop)
+
+        threads = [threading.Thread(target=tracked), threading.Thread(target=busy_listing_search, args=(stop,))]
+        for thread in threads:
+            thread.start()
+        tracked_ready.wait()
+        time.sleep(0.2)
+        profiler.stop()
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        lines = profiler.collapsed().splitlines()
+        assert profiler.sample_count > 10 and lines
+        for line in lines:
+            stack, count = line.rsplit(' ', 1)
+            assert stack.startswith('get_properties;') and int(count) > 0
+        assert any('busy_listing_search (test_profiling.py:' in line for line in lines)
+
+        speedscope = json.loads(profiler.speedscope())
+        profile = speedscope['profiles'][0]
+        assert profile['type'] == 'sampled' and len(profile['samples']) == len(lines)
+        assert speedscope['shared']['frames'][profile['samples'][0][0]] == {'name': 'get_properties'}
+        with pytest.raises(RuntimeError):
+            profiler.start(0.001)
+            profiler.start(0.001)
+        profiler.stop()
+
+
+class TestProfileEndpoints:
+    """Test class for /admin/profile/cpu and /admin/profile/memory"""
+
+    @pytest.fixture
+    def client(self, client):
+        """Create a test client"""
+        app.config['ADMIN_TOKEN'] = 'test-admin-token'
+
+        yield client
+        app.config['ADMIN_TOKEN'] = None
+
+    def in_background(self, target):
+        stop = threading.Event()
+
+        def run():
+            with app.test_client() as client:
+                while not stop.is_set():
+                    target(client)
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        return stop, thread
+
+    def test_admin_only(self, client):
+        """Test that the endpoints need the admin token and are hidden without one"""
+        assert client.post('/admin/profile/cpu?seconds=0').status_code == 401
+        response = client.post('/admin/profile/cpu?seconds=0', headers={'Authorization': 'Bearer wrong'})
+        assert response.status_code == 401 and response.headers['WWW-Authenticate'] == 'Bearer'
+        assert client.post('/admin/profile/cpu?seconds=0&format=svg', headers=ADMIN_HEADERS).status_code == 400
+        assert client.post('/admin/profile/cpu?seconds=0&interval=0', headers=ADMIN_HEADERS).status_code == 400
+        for query in ('seconds=nan', 'seconds=inf', 'seconds=0&interval=nan', 'seconds=0&interval=inf'):
+            assert client.post(f'/admin/profile/cpu?{query}', headers=ADMIN_HEADERS).status_code == 400, query
+        assert client.post('/admin/profile/memory?seconds=nan', headers=ADMIN_HEADERS).status_code == 400
+        app.config['ADMIN_TOKEN'] = None
+        assert client.post('/admin/profile/memory?seconds=0', headers=ADMIN_HEADERS).status_code == 404
+
+    @pytest.mark.commits
+    def test_cpu_window(self, client):
+        """Test that a CPU window attributes samples to the endpoints being served"""
+        client.post('/properties', data={'property_type': 'House', 'address': '4 Beach Road', 'city': 'Vizag',
+                                         'status': 'Available'})
+        stop, thread = self.in_background(lambda background: background.get('/properties'))
+        try:
+            response = client.post('/admin/profile/cpu?seconds=0.5&interval=0.002', headers=ADMIN_HEADERS)
+            speedscope = client.post('/admin/profile/cpu?seconds=0.2&format=speedscope', headers=ADMIN_HEADERS)
+        finally:
+            stop.set()
+            thread.join()
+
+        assert response.status_code == 200 and response.mimetype == 'text/plain'
+        lines = response.get_data(as_text=True).splitlines()
+        assert lines and all(line.startswith('get_properties;') for line in lines)
+        assert any('get_properties (app.py:' in line for line in lines)
+        assert speedscope.get_json()['profiles'][0]['unit'] == 'seconds'
+
+    @pytest.mark.commits
+    def test_memory_window(self, client):
+        """Test that a memory window diffs allocations made by uploads"""
+        photo = jpeg()
+        stop, thread = self.in_background(lambda background: background.post('/properties', data={
+            'property_type': 'House', 'address': '9 Fort Road', 'city': 'Kurnool', 'status': 'Available',
+            'photos': (BytesIO(photo), 'front.jpg')}))
+        try:
+            response = client.post('/admin/profile/memory?seconds=0.5&limit=10', headers=ADMIN_HEADERS)
+        finally:
+            stop.set()
+            thread.join()
+
+        assert response.status_code == 200
+        result = response.get_json()
+        assert result['peak_bytes'] >= result['traced_bytes'] > 0
+        assert 0 < len(result['top']) <= 10
+        assert all(':' in stat['location'] and stat['size_diff'] or stat['count_diff'] for stat in result['top'])
+
+    def test_profile_requests_command(self, client, tmp_path):
+        """Test that the CLI profiles requests it sends itself"""
+        photo_path = tmp_path / 'front.jpg'
+        photo_path.write_bytes(jpeg())
+        output = tmp_path / 'uploads.collapsed'
+        result = app.test_cli_runner().invoke(profile_requests, [
+            '/properties', '--method', 'POST', '--count', '5', '--interval', '0.001', '--memory',
+            '--form', 'property_type=House', '--form', 'address=2 Hill Road', '--form', 'city=Ongole', '--form', 'status=Available',
+            '--file', f'photos={photo_path}', '--output', str(output)])
+        assert result.exit_code == 0, result.output
+        assert 'POST /properties: 5 requests' in result.stderr and '5 x 201' in result.stderr
+        assert 'peak' in result.stderr
+        assert all(line.startswith('add_property;') for line in output.read_text().splitlines())
+        assert len(client.get('/properties').get_json()) == 10
+
+
+def run_tests():
+    """Run all tests with pytest"""
+    pytest.main([__file__, "-v", "--tb=short"])
+
+
+if __name__ == "__main__":
+    # Run tests directly
+    run_tests()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Pytest for the bundled listing snapshot endpoint.
+This test suite includes:
+1. Inline blur placeholders and variant URLs for uploaded photos
+2. Pagination and filters on /properties/snapshot
+3. Resized photo variants served from /property_photos/<id>?w=
+"""
+
+import pytest
+import os
+from io import BytesIO
+from PIL import Image
+
+# Import the Flask app and functions
+import sys
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+from app import app, PropertyPhoto
+
+
+def make_jpeg(width=1200, height=800, color=(200, 120, 40)):
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), color).save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+class TestPropertySnapshot:
+    """Test class for the listing snapshot endpoint"""
+
+    def add_property(self, client, city='Hyderabad', photos=()):
+        data = {
+            'property_type': 'Apartment',
+            'address': '12 Lake View Road',
+            'city': city,
+            'price': '4500000',
+            'status': 'Available',
+            'photos': [(BytesIO(photo), f'photo_{index}.jpg') for index, photo in enumerate(photos)]
+        }
+        response = client.post('/properties', data=data, content_type='multipart/form-data')
+        assert response.status_code == 201
+        return response.get_json()['property_id']
+
+    def test_snapshot_inlines_placeholders_and_variants(self, client):
+        """Test that photos carry a small inline placeholder and variant URLs"""
+        self.add_property(client, photos=[make_jpeg(), make_jpeg(color=(10, 80, 160))])
+
+        response = client.get('/properties/snapshot')
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body['total'] == 1
+        assert body['has_more'] is False
+
+        photos = body['properties'][0]['photos']
+        assert len(photos) == 2
+        for photo in photos:
+            assert photo['placeholder'].startswith('data:image/jpeg;base64,')
+            assert len(photo['placeholder']) < 1024
+            assert photo['variants']['thumb'].endswith(f"/property_photos/{photo['id']}?w=320")
+            assert photo['variants']['medium'].endswith(f"/property_photos/{photo['id']}?w=960")
+
+    def test_snapshot_pagination_and_filters(self, client):
+        """Test that the snapshot pages through listings and honours filters"""
+        for index in range(5):
+            self.add_property(client, city='Hyderabad' if index % 2 == 0 else 'Vijayawada')
+
+        first_page = client.get('/properties/snapshot?per_page=2').get_json()
+        assert first_page['total'] == 5
+        assert len(first_page['properties']) == 2
+        assert first_page['has_more'] is True
+
+        last_page = client.get('/properties/snapshot?per_page=2&page=3').get_json()
+        assert len(last_page['properties']) == 1
+        assert last_page['has_more'] is False
+
+        filtered = client.get('/properties/snapshot?city=vijaya').get_json()
+        assert filtered['total'] == 2
+        assert all(prop['city'] == 'Vijayawada' for prop in filtered['properties'])
+
+    def test_undecodable_image_has_no_placeholder(self, client):
+        """Test that bytes Pillow cannot decode are stored without a placeholder"""
+        self.add_property(client, photos=[b'not really a jpeg'])
+
+        photo = client.get('/properties/snapshot').get_json()['properties'][0]['photos'][0]
+        assert photo['placeholder'] is None
+        assert client.get(f"/property_photos/{photo['id']}?w=320").data == b'not really a jpeg'
+
+    def test_photo_variant_is_resized(self, client):
+        """Test that a variant width returns a downscaled JPEG and the original stays intact"""
+        original = make_jpeg()
+        self.add_property(client, photos=[original])
+        photo_id = PropertyPhoto.query.first().id
+
+        thumb = client.get(f'/property_photos/{photo_id}?w=320')
+        assert thumb.status_code == 200
+        assert thumb.mimetype == 'image/jpeg'
+        assert 'immutable' in thumb.headers['Cache-Control']
+        assert Image.open(BytesIO(thumb.data)).size == (320, 213)
+
+        assert client.get(f'/property_photos/{photo_id}').data == original
+        assert client.get(f'/property_photos/{photo_id}?w=123').data == original
+
+
+def run_tests():
+    """Run all tests with pytest"""
+    pytest.main([__file__, "-v", "--tb=short"])
+
+
+if __name__ == "__main__":
+    # Run tests directly
+    run_tests()
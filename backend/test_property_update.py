@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Pytest for partial property updates with optimistic concurrency.
+This test suite includes:
+1. PATCH of individual columns from form and JSON bodies
+2. Adding and removing single photos without rewriting the others
+3. If-Match / ETag handling with 412 on conflicts
+4. Upgrading databases created before the version and photo columns existed
+"""
+
+import pytest
+import os
+from io import BytesIO
+from datetime import datetime
+
+# Import the Flask app and functions
+import sys
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+from app import app, db, Property, PropertyPhoto, upgrade_schema
+
+
+class TestPropertyUpdate:
+    """Test class for PATCH /properties/<id>"""
+
+    @pytest.fixture
+    def property_id(self, client):
+        data = {
+            'property_type': 'Apartment',
+            'address': '21 Beach Road',
+            'city': 'Visakhapatnam',
+            'price': '5500000',
+            'bedrooms': '2',
+            'status': 'Available',
+            'photos': [(BytesIO(b'photo one'), 'one.jpg'), (BytesIO(b'photo two'), 'two.jpg')]
+        }
+        response = client.post('/properties', data=data, content_type='multipart/form-data')
+        assert response.status_code == 201
+        return response.get_json()['property_id']
+
+    def test_patch_updates_only_given_fields(self, client, property_id):
+        """Test that a JSON PATCH changes price and leaves everything else alone"""
+        etag = client.get(f'/properties/{property_id}').headers['ETag']
+
+        response = client.patch(f'/properties/{property_id}', json={'price': 5200000}, headers={'If-Match': etag})
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body['price'] == 5200000
+        assert body['bedrooms'] == 2
+        assert body['address'] == '21 Beach Road'
+        assert len(body['photos']) == 2
+        assert response.headers['ETag'] != etag
+
+    def test_patch_adds_and_removes_single_photos(self, client, property_id):
+        """Test that photo edits touch only the named rows"""
+        removed, kept = PropertyPhoto.query.order_by(PropertyPhoto.id).all()
+        kept_id, removed_id = kept.id, removed.id
+        version = db.session.get(Property, property_id).version
+
+        response = client.patch(f'/properties/{property_id}', data={
+            'remove_photo_ids': str(removed_id),
+            'photos': [(BytesIO(b'photo three'), 'three.jpg')]
+        }, content_type='multipart/form-data')
+        assert response.status_code == 200
+
+        photo_ids = [photo['id'] for photo in response.get_json()['photos']]
+        assert kept_id in photo_ids and removed_id not in photo_ids
+        assert len(photo_ids) == 2
+        assert client.get(f'/property_photos/{kept_id}').data == b'photo two'
+        assert response.get_json()['version'] == version + 1
+
+    def test_stale_if_match_returns_412(self, client, property_id):
+        """Test that a second writer holding the old ETag is rejected"""
+        etag = client.get(f'/properties/{property_id}').headers['ETag']
+        assert client.patch(f'/properties/{property_id}', json={'price': 5000000}, headers={'If-Match': etag}).status_code == 200
+
+        response = client.patch(f'/properties/{property_id}', json={'price': 4000000}, headers={'If-Match': etag})
+        assert response.status_code == 412
+        assert db.session.get(Property, property_id).price == 5000000
+
+    def test_invalid_updates_are_rejected(self, client, property_id):
+        """Test validation of required columns and typed values"""
+        assert client.patch(f'/properties/{property_id}', json={'city': ''}).status_code == 400
+        assert client.patch(f'/properties/{property_id}', json={'bedrooms': 'two'}).status_code == 400
+        assert client.patch('/properties/999', json={'price': 1}).status_code == 404
+        db.session.expire_all()
+        assert db.session.get(Property, property_id).city == 'Visakhapatnam'
+
+    def test_invalid_photo_ids_are_rejected(self, client, property_id):
+        """Test that remove_photo_ids must be a list of ids, and bad ones leave the photos alone"""
+        for remove_photo_ids in (['abc'], 5, '7', [1.5], [True]):
+            response = client.patch(f'/properties/{property_id}', json={'remove_photo_ids': remove_photo_ids})
+            assert response.status_code == 400, remove_photo_ids
+        response = client.patch(f'/properties/{property_id}', data={'remove_photo_ids': 'abc'},
+                                content_type='multipart/form-data')
+        assert response.status_code == 400
+        assert PropertyPhoto.query.filter_by(property_id=property_id).count() == 2
+
+    @pytest.mark.commits
+    def test_upgrade_schema_adds_missing_columns(self, client):
+        """Test that an old database gets the new columns, with existing rows at version 1"""
+        # Recreate the tables as they were before soft deletes, versions, placeholders and hashes
+        new_columns = {'deleted_at', 'version', 'placeholder', 'dhash', 'dhash_band_0', 'dhash_band_1',
+                       'dhash_band_2', 'dhash_band_3'}
+        for table in (Property.__table__, PropertyPhoto.__table__):
+            legacy_columns = ', '.join(column.name for column in table.columns if column.name not in new_columns)
+            db.session.execute(db.text(f'CREATE TABLE {table.name}_legacy AS SELECT {legacy_columns} FROM {table.name}'))
+            db.session.execute(db.text(f'DROP TABLE {table.name}'))
+            db.session.execute(db.text(f'ALTER TABLE {table.name}_legacy RENAME TO {table.name}'))
+        db.session.execute(db.text(
+            "INSERT INTO property (id, property_type, address, city, status, created_at) "
+            "VALUES (1, 'House', '1 Old Road', 'Guntur', 'Available', :now)"), {'now': datetime.now()})
+        db.session.execute(db.text(
+            "INSERT INTO property_photo (id, property_id, image_data, mimetype, created_at) "
+            "VALUES (1, 1, :data, 'image/jpeg', :now)"), {'data': b'old photo', 'now': datetime.now()})
+        db.session.commit()
+
+        result = app.test_cli_runner().invoke(upgrade_schema)
+        assert result.exit_code == 0, result.output
+        result = app.test_cli_runner().invoke(upgrade_schema)
+        assert result.exit_code == 0, result.output
+
+        prop = db.session.get(Property, 1)
+        assert (prop.version, prop.deleted_at) == (1, None)
+        assert (prop.photos[0].placeholder, prop.photos[0].dhash) == (None, None)
+        db.session.remove()
+
+        listings = client.get('/properties').get_json()
+        assert [listing['id'] for listing in listings] == [1]
+        etag = client.get('/properties/1').headers['ETag']
+        response = client.patch('/properties/1', json={'price': 4000000}, headers={'If-Match': etag})
+        assert response.status_code == 200
+        assert db.session.get(Property, 1).version == 2
+
+
+def run_tests():
+    """Run all tests with pytest"""
+    pytest.main([__file__, "-v", "--tb=short"])
+
+
+if __name__ == "__main__":
+    # Run tests directly
+    run_tests()
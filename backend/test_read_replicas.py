@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Pytest for read-replica routing, using two SQLite files as primary and replica.
+This test suite includes:
+1. GET routes reading from the replica
+2. Writes going to the primary
+3. Read-after-write pinning to the primary for the writing client
+"""
+
+import pytest
+import os
+import tempfile
+import shutil
+import sqlalchemy as sa
+from datetime import datetime
+
+# Import the Flask app and functions
+import sys
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+from app import app, db, Property
+
+
+class TestReadReplicaRouting:
+    """Test class for primary/replica session routing"""
+
+    @pytest.fixture
+    def engines(self):
+        """Swap in file-backed primary and replica engines"""
+        temp_dir = tempfile.mkdtemp(prefix="test_replicas_")
+        primary = sa.create_engine(f"sqlite:///{os.path.join(temp_dir, 'primary.db')}")
+        replica = sa.create_engine(f"sqlite:///{os.path.join(temp_dir, 'replica.db')}")
+        app.config['TESTING'] = True
+
+        with app.app_context():
+            original_engine = db.engines[None]
+            db.engines[None] = primary
+            db.engines['replica_0'] = replica
+            app.config['SQLALCHEMY_BINDS'] = {'replica_0': str(replica.url)}
+            db.metadata.create_all(bind=primary)
+            db.metadata.create_all(bind=replica)
+
+        # Each request below pushes its own app context, and so gets its own session
+        yield primary, replica
+
+        with app.app_context():
+            db.engines[None] = original_engine
+            del db.engines['replica_0']
+        app.config['SQLALCHEMY_BINDS'] = {}
+        app.config['REPLICA_PIN_SECONDS'] = 5
+        primary.dispose()
+        replica.dispose()
+        shutil.rmtree(temp_dir)
+
+    def insert_listing(self, engine, city):
+        with engine.begin() as connection:
+            connection.execute(Property.__table__.insert().values(
+                property_type='House', address='1 Station Road', city=city, status='Available',
+                version=1, created_at=datetime.now()))
+
+    def cities(self, client):
+        return [prop['city'] for prop in client.get('/properties').get_json()]
+
+    def test_reads_go_to_replica_and_writes_to_primary(self, engines):
+        """Test that GET reads the replica while POST lands on the primary"""
+        primary, replica = engines
+        self.insert_listing(replica, 'Replicated City')
+
+        with app.test_client() as reader:
+            assert self.cities(reader) == ['Replicated City']
+            assert reader.get('/properties/snapshot').get_json()['total'] == 1
+
+        with app.test_client() as writer:
+            response = writer.post('/properties', data={
+                'property_type': 'House', 'address': '2 Canal Road', 'city': 'Written City', 'status': 'Available'
+            })
+            assert response.status_code == 201
+
+        with primary.connect() as connection:
+            assert connection.execute(sa.select(Property.city)).scalars().all() == ['Written City']
+
+    def test_writer_is_pinned_to_primary(self, engines):
+        """Test read-after-write: the writing client reads the primary, others the replica"""
+        primary, replica = engines
+        self.insert_listing(replica, 'Replicated City')
+        app.config['REPLICA_PIN_SECONDS'] = 30
+
+        with app.test_client() as writer, app.test_client() as other:
+            writer.post('/properties', data={
+                'property_type': 'House', 'address': '2 Canal Road', 'city': 'Written City', 'status': 'Available'
+            })
+            assert self.cities(writer) == ['Written City']
+            assert self.cities(other) == ['Replicated City']
+
+    def test_pin_expires(self, engines):
+        """Test that the writer returns to the replica once the pin window has passed"""
+        primary, replica = engines
+        self.insert_listing(replica, 'Replicated City')
+        app.config['REPLICA_PIN_SECONDS'] = 0
+
+        with app.test_client() as writer:
+            writer.post('/properties', data={
+                'property_type': 'House', 'address': '2 Canal Road', 'city': 'Written City', 'status': 'Available'
+            })
+            assert self.cities(writer) == ['Replicated City']
+
+
+def run_tests():
+    """Run all tests with pytest"""
+    pytest.main([__file__, "-v", "--tb=short"])
+
+
+if __name__ == "__main__":
+    # Run tests directly
+    run_tests()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Pytest for saved searches and alert matching.
+This test suite includes:
+1. Compiling filters and choosing the index keys of a search
+2. Matching new listings against only the candidate searches
+3. The notification outbox, its endpoint and the send-search-alerts command
+"""
+
+import pytest
+import os
+
+# Import the Flask app and functions
+import sys
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+from app import app, SavedSearchNotification, send_search_alerts
+from saved_searches import compile_search, listing_keys, matches, search_keys
+
+
+class TestSearchCompilation:
+    """Test class for compiled predicates and their index keys"""
+
+    def test_compile_search(self):
+        """Test normalization and dropping of empty filters"""
+        criteria = compile_search({'city': '  Hyderabad ', 'min_price': '2500000', 'bedrooms': '2',
+                                   'locality': '', 'features': 'Lift, car parking'})
+        assert criteria == {'city': 'hyderabad', 'min_price': 2500000.0, 'bedrooms': 2,
+                            'features': ['lift', 'parking'], 'features_mode': 'all'}
+        with pytest.raises(ValueError):
+            compile_search({'max_price': 'cheap'})
+
+    def test_search_keys_prefer_selective_dimensions(self):
+        """Test that city beats a narrow price range, which beats property type"""
+        assert search_keys(compile_search({'city': 'Pune', 'property_type': 'House'})) == ['city:pune']
+        assert search_keys(compile_search({'min_price': 3000000, 'max_price': 5000000, 'property_type': 'House'})) == \
+            ['band:4', 'band:5']
+        assert search_keys(compile_search({'min_price': 100000, 'max_price': 90000000, 'property_type': 'Land'})) == \
+            ['type:Land']
+        assert search_keys(compile_search({'bedrooms': 3})) == ['any']
+
+    def test_listing_reaches_every_indexed_search(self):
+        """Test that a matching search is always filed under one of the listing's keys"""
+        listing = {'property_type': 'House', 'city': 'Pune', 'price': 4200000, 'bedrooms': 3, 'features': ['lift']}
+        for filters in ({'city': 'pune'}, {'min_price': 4000000, 'max_price': 4500000},
+                        {'property_type': 'House', 'min_price': 1}, {'features': 'Elevator'}):
+            criteria = compile_search(filters)
+            assert matches(criteria, listing)
+            assert set(search_keys(criteria)) & set(listing_keys(listing))
+
+    def test_matches(self):
+        """Test the predicate against listings that miss on one field each"""
+        criteria = compile_search({'property_type': 'Apartment', 'max_price': 6000000, 'bedrooms': 2,
+                                   'features': 'parking,gym', 'features_mode': 'any'})
+        listing = {'property_type': 'Apartment', 'price': 5500000, 'bedrooms': 2, 'features': ['gym']}
+        assert matches(criteria, listing)
+        assert not matches(criteria, {**listing, 'property_type': 'House'})
+        assert not matches(criteria, {**listing, 'price': 6500000})
+        assert not matches(criteria, {**listing, 'price': None})
+        assert not matches(criteria, {**listing, 'bedrooms': 1})
+        assert not matches(criteria, {**listing, 'features': ['lift']})
+
+
+class TestSavedSearchRoutes:
+    """Test class for saved search endpoints and the outbox"""
+
+    def save_search(self, client, filters, email='buyer@example.com'):
+        response = client.post('/saved_searches', json={'email': email, 'filters': filters})
+        assert response.status_code == 201
+        return response.get_json()['id']
+
+    def add_property(self, client, **fields):
+        data = {'property_type': 'Apartment', 'address': '12 MG Road', 'city': 'Mysuru', 'status': 'Available', **fields}
+        response = client.post('/properties', data=data)
+        assert response.status_code == 201
+        return response.get_json()['property_id']
+
+    def notified(self, client, search_id):
+        response = client.get(f'/saved_searches/{search_id}/notifications')
+        assert response.status_code == 200
+        return [notification['property_id'] for notification in response.get_json()['notifications']]
+
+    def test_new_listing_fills_outbox(self, client):
+        """Test that add_property queues one alert per matching search"""
+        mysuru = self.save_search(client, {'city': 'mysuru', 'max_price': 5000000})
+        budget = self.save_search(client, {'min_price': 2000000, 'max_price': 4000000})
+        houses = self.save_search(client, {'property_type': 'House'})
+
+        match_id = self.add_property(client, price=3000000)
+        self.add_property(client, price=7000000)
+
+        assert self.notified(client, mysuru) == [match_id]
+        assert self.notified(client, budget) == [match_id]
+        assert self.notified(client, houses) == []
+
+    def test_invalid_saved_search(self, client):
+        """Test validation of the saved search body"""
+        assert client.post('/saved_searches', json={'filters': {'city': 'Mysuru'}}).status_code == 400
+        response = client.post('/saved_searches', json={'email': 'a@example.com', 'filters': {'bedrooms': 'two'}})
+        assert response.status_code == 400
+        for filters in ({'max_price': 'inf'}, {'min_price': '-inf'}, {'max_price': 'nan'}, {'min_price': -5}):
+            response = client.post('/saved_searches', json={'email': 'a@example.com', 'filters': filters})
+            assert response.status_code == 400, filters
+            assert 'finite, non-negative' in response.get_json()['error']
+        for body in ([{'email': 'a@example.com'}], {'email': 42}, {'email': ['a@example.com']},
+                     {'email': 'a@example.com', 'filters': ['city']}, {'email': 'a@example.com', 'filters': 'Mysuru'}):
+            assert client.post('/saved_searches', json=body).status_code == 400, body
+        assert client.get('/saved_searches/99/notifications').status_code == 404
+
+    def test_send_and_delete(self, client):
+        """Test that the sender marks alerts sent and skips deleted listings"""
+        search_id = self.save_search(client, {'city': 'Mysuru'})
+        kept_id = self.add_property(client)
+        removed_id = self.add_property(client)
+        client.delete(f'/properties/{removed_id}')
+
+        result = app.test_cli_runner().invoke(send_search_alerts)
+        assert result.exit_code == 0, result.output
+        assert f'property {kept_id} matches saved search {search_id}' in result.output
+        assert 'Sent 1 saved search alerts' in result.output
+        sent = SavedSearchNotification.query.filter(SavedSearchNotification.sent_at.isnot(None)).all()
+        assert [notification.property_id for notification in sent] == [kept_id]
+
+        assert client.delete(f'/saved_searches/{search_id}').status_code == 200
+        assert SavedSearchNotification.query.count() == 0
+        self.add_property(client)
+        assert SavedSearchNotification.query.count() == 0
+
+
+def run_tests():
+    """Run all tests with pytest"""
+    pytest.main([__file__, "-v", "--tb=short"])
+
+
+if __name__ == "__main__":
+    # Run tests directly
+    run_tests()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Pytest for similar-property recommendations.
+This test suite includes:
+1. Ranking by price, canonical area, rooms, type and location
+2. Incremental updates, removals and rescaling of the feature matrix
+3. The /properties/<id>/similar endpoint
+"""
+
+import pytest
+import os
+
+# Import the Flask app and functions
+import sys
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+import app as app_module
+from app import app
+from similarity import SimilarityIndex
+
+
+def listing(property_id, **fields):
+    return {'id': property_id, 'property_type': 'Apartment', 'city': 'Hyderabad', 'locality': 'Madhapur',
+            'price': 5000000, 'area_value': 1200, 'area_unit': 'sqft', 'bedrooms': 2, 'bathrooms': 2, **fields}
+
+
+class TestSimilarityIndex:
+    """Test class for the feature matrix and nearest-neighbour ranking"""
+
+    def build(self):
+        index = SimilarityIndex(capacity=4)
+        index.load([
+            listing(1),
+            listing(2, price=5200000, area_value=1250),
+            listing(3, price=5200000, area_value=1250, locality='Kondapur'),
+            listing(4, price=5200000, area_value=1250, city='Warangal'),
+            listing(5, price=5200000, area_value=1250, property_type='House'),
+            listing(6, price=15000000, area_value=3200, bedrooms=4),
+            listing(7, price=None, area_value=111.5, area_unit='sqm'),
+        ])
+        return index
+
+    def test_ranking(self):
+        """Test that numeric closeness beats category mismatches in the expected order"""
+        ranked = [property_id for property_id, _ in self.build().similar(1, limit=6)]
+        assert set(ranked[:2]) == {2, 7}
+        assert ranked.index(3) < ranked.index(5) < ranked.index(4)
+        assert 1 not in ranked
+
+    def test_updates_and_removals(self):
+        """Test that upserts move a listing and removed listings drop out"""
+        index = self.build()
+        index.remove(2)
+        index.upsert(listing(6))
+        ranked = [property_id for property_id, _ in index.similar(1, limit=3)]
+        assert ranked[:2] == [6, 7] or ranked[:2] == [7, 6]
+        assert 2 not in ranked
+        assert index.similar(2) == []
+        assert index.similar(99) == []
+
+    def test_rescale_on_growth(self):
+        """Test that column statistics are recomputed as the index grows"""
+        index = SimilarityIndex()
+        index.load([listing(1)])
+        for property_id in range(2, 40):
+            index.upsert(listing(property_id, price=1000000 * property_id))
+        assert index.scaled_at == 32
+        assert index.center[0] > 15
+
+
+class TestSimilarRoute:
+    """Test class for the similar listings endpoint"""
+
+    @pytest.fixture
+    def client(self, client):
+        """Create a test client"""
+        app_module.listing_indexes.clear()
+
+        yield client
+
+        app_module.listing_indexes.clear()
+
+    def add_property(self, client, **fields):
+        data = {'property_type': 'Apartment', 'address': '9 Lake Road', 'city': 'Hyderabad', 'locality': 'Madhapur',
+                'status': 'Available', 'price': '5000000', 'area_value': '1200', 'area_unit': 'sqft',
+                'bedrooms': '2', 'bathrooms': '2', **fields}
+        response = client.post('/properties', data=data)
+        assert response.status_code == 201
+        return response.get_json()['property_id']
+
+    def test_similar_endpoint(self, client):
+        """Test ordering, limit, and that edits and deletes are reflected"""
+        base = self.add_property(client)
+        close = self.add_property(client, price='5100000')
+        far = self.add_property(client, city='Tirupati', price='9000000')
+        other = self.add_property(client, property_type='Land', price='5100000')
+
+        response = client.get(f'/properties/{base}/similar')
+        assert response.status_code == 200
+        similar = response.get_json()['similar']
+        assert [prop['id'] for prop in similar] == [close, other, far]
+        assert similar[0]['distance'] <= similar[1]['distance']
+
+        client.patch(f'/properties/{far}', json={'city': 'Hyderabad', 'price': 5000000})
+        client.delete(f'/properties/{close}')
+        similar = client.get(f'/properties/{base}/similar?limit=1').get_json()['similar']
+        assert [prop['id'] for prop in similar] == [far]
+
+        assert client.get(f'/properties/{close}/similar').status_code == 404
+        assert client.get('/properties/999/similar').status_code == 404
+
+
+def run_tests():
+    """Run all tests with pytest"""
+    pytest.main([__file__, "-v", "--tb=short"])
+
+
+if __name__ == "__main__":
+    # Run tests directly
+    run_tests()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Pytest for soft deletion and the background purge of deleted properties.
+This test suite includes:
+1. DELETE marks the listing deleted and hides it from every read route
+2. Batched purge of photo rows and the property row
+3. The partial index over active listings
+"""
+
+import pytest
+import os
+from io import BytesIO
+from unittest.mock import patch
+
+# Import the Flask app and functions
+import sys
+sys.path.append('.')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+from app import app, db, Property, PropertyPhoto, purge_deleted_properties, purge_deleted
+
+
+class TestSoftDelete:
+    """Test class for soft delete and purge"""
+
+    def add_property(self, client, photo_count=3):
+        data = {
+            'property_type': 'Commercial',
+            'address': '7 Market Road',
+            'city': 'Nellore',
+            'price': '9000000',
+            'status': 'Available',
+            'photos': [(BytesIO(b'video bytes %d' % index), f'clip_{index}.mp4') for index in range(photo_count)]
+        }
+        response = client.post('/properties', data=data, content_type='multipart/form-data')
+        assert response.status_code == 201
+        return response.get_json()['property_id']
+
+    def test_delete_hides_listing_without_removing_rows(self, client):
+        """Test that DELETE only stamps deleted_at and the listing disappears from reads"""
+        kept_id = self.add_property(client)
+        deleted_id = self.add_property(client)
+        photo_id = PropertyPhoto.query.filter_by(property_id=deleted_id).first().id
+
+        response = client.delete(f'/properties/{deleted_id}')
+        assert response.status_code == 200
+        assert db.session.get(Property, deleted_id).deleted_at is not None
+        assert PropertyPhoto.query.filter_by(property_id=deleted_id).count() == 3
+
+        assert [prop['id'] for prop in client.get('/properties').get_json()] == [kept_id]
+        assert client.get('/properties/snapshot').get_json()['total'] == 1
+        assert client.get(f'/property_photos/{photo_id}').status_code == 404
+        assert client.get(f'/properties/{deleted_id}/duplicates').status_code == 404
+        assert client.delete(f'/properties/{deleted_id}').status_code == 404
+
+    def test_purge_removes_photos_in_batches(self, client):
+        """Test that the purger deletes photos in small commits before the property row"""
+        kept_id = self.add_property(client)
+        deleted_id = self.add_property(client, photo_count=5)
+        client.delete(f'/properties/{deleted_id}')
+
+        with patch('app.time.sleep') as mock_sleep:
+            assert purge_deleted_properties(batch_size=2, pause=0.25) == 1
+        assert mock_sleep.call_count == 3
+        mock_sleep.assert_called_with(0.25)
+
+        assert db.session.get(Property, deleted_id) is None
+        assert PropertyPhoto.query.filter_by(property_id=deleted_id).count() == 0
+        assert PropertyPhoto.query.filter_by(property_id=kept_id).count() == 3
+
+    def test_purge_command(self, client):
+        """Test the purge-deleted CLI command"""
+        client.delete(f'/properties/{self.add_property(client)}')
+
+        result = app.test_cli_runner().invoke(purge_deleted, ['--pause', '0'])
+        assert result.exit_code == 0
+        assert 'Purged 1 deleted properties' in result.output
+        assert Property.query.count() == 0
+
+    def test_active_listing_index_is_partial(self, client):
+        """Test that the listing index skips deleted rows on SQLite"""
+        sql = db.session.execute(db.text(
+            "SELECT sql FROM sqlite_master WHERE name = 'ix_property_active_created_at'")).scalar()
+        assert 'WHERE deleted_at IS NULL' in sql
+
+
+def run_tests():
+    """Run all tests with pytest"""
+    pytest.main([__file__, "-v", "--tb=short"])
+
+
+if __name__ == "__main__":
+    # Run tests directly
+    run_tests()
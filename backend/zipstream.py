@@ -0,0 +1,74 @@
+import struct
+import zlib
+from collections import namedtuple
+
+# Classic (non-ZIP64) archives: every size and offset must fit in 32 bits
+MAX_ARCHIVE_SIZE = 0xFFFFFFFF
+MAX_ENTRIES = 0xFFFF
+VERSION = 20
+# Bit 3: CRC follows the data in a descriptor, bit 11: UTF-8 names
+FLAGS = 0x0808
+STORED = 0
+
+LOCAL_HEADER = struct.Struct('<IHHHHHIIIHH')
+DATA_DESCRIPTOR = struct.Struct('<IIII')
+CENTRAL_HEADER = struct.Struct('<IHHHHHHIIIHHHHHII')
+END_OF_CENTRAL_DIRECTORY = struct.Struct('<IHHHHIIH')
+
+# `chunks` is a callable returning an iterator over exactly `size` bytes
+ZipEntry = namedtuple('ZipEntry', ['name', 'size', 'modified', 'chunks'])
+
+
+def dos_datetime(value):
+    if value is None or value.year < 1980:
+        return 0, (1 << 5) | 1
+    return ((value.hour << 11) | (value.minute << 5) | (value.second // 2),
+            ((value.year - 1980) << 9) | (value.month << 5) | value.day)
+
+
+def archive_size(entries):
+    # Known before any data is read, so the response can carry Content-Length
+    size = END_OF_CENTRAL_DIRECTORY.size
+    for entry in entries:
+        name_length = len(entry.name.encode('utf-8'))
+        size += LOCAL_HEADER.size + name_length + entry.size + DATA_DESCRIPTOR.size
+        size += CENTRAL_HEADER.size + name_length
+    return size
+
+
+def check_limits(entries):
+    if len(entries) > MAX_ENTRIES or archive_size(entries) > MAX_ARCHIVE_SIZE:
+        raise ValueError('Archive is too large for a classic ZIP file')
+
+
+def stream_zip(entries):
+    # Stored (uncompressed) entries, written as the data is read: memory use is
+    # one chunk plus the central directory, whatever the archive size
+    central_directory = []
+    offset = 0
+    for entry in entries:
+        name = entry.name.encode('utf-8')
+        time, date = dos_datetime(entry.modified)
+        header = LOCAL_HEADER.pack(0x04034B50, VERSION, FLAGS, STORED, time, date, 0, entry.size, entry.size,
+                                   len(name), 0) + name
+        yield header
+
+        crc = 0
+        written = 0
+        for chunk in entry.chunks():
+            crc = zlib.crc32(chunk, crc)
+            written += len(chunk)
+            yield chunk
+        if written != entry.size:
+            raise ValueError(f'{entry.name} changed size while streaming ({written} of {entry.size} bytes)')
+        yield DATA_DESCRIPTOR.pack(0x08074B50, crc, entry.size, entry.size)
+
+        central_directory.append(CENTRAL_HEADER.pack(
+            0x02014B50, VERSION, VERSION, FLAGS, STORED, time, date, crc, entry.size, entry.size,
+            len(name), 0, 0, 0, 0, 0, offset) + name)
+        offset += len(header) + entry.size + DATA_DESCRIPTOR.size
+
+    directory = b''.join(central_directory)
+    yield directory
+    yield END_OF_CENTRAL_DIRECTORY.pack(0x06054B50, 0, 0, len(central_directory), len(central_directory),
+                                        len(directory), offset, 0)
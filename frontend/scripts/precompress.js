@@ -0,0 +1,48 @@
+// Write .gz and .br siblings next to every compressible file in build/, so a
+// static server (nginx gzip_static/brotli_static, or any server that checks for
+// precompressed variants) can send them without compressing per request.
+const fs = require('fs');
+const path = require('path');
+const zlib = require('zlib');
+
+const BUILD_DIR = path.join(__dirname, '..', 'build');
+const EXTENSIONS = new Set(['.js', '.css', '.html', '.json', '.svg', '.map', '.txt']);
+const MIN_SIZE = 1024;
+
+const walk = (dir) => fs.readdirSync(dir, { withFileTypes: true }).flatMap(entry => {
+  const fullPath = path.join(dir, entry.name);
+  return entry.isDirectory() ? walk(fullPath) : [fullPath];
+});
+
+let original = 0;
+let gzipped = 0;
+let brotlied = 0;
+for (const file of walk(BUILD_DIR)) {
+  if (!EXTENSIONS.has(path.extname(file))) {
+    continue;
+  }
+  const data = fs.readFileSync(file);
+  if (data.length < MIN_SIZE) {
+    continue;
+  }
+  const gz = zlib.gzipSync(data, { level: zlib.constants.Z_BEST_COMPRESSION });
+  const br = zlib.brotliCompressSync(data, {
+    params: {
+      [zlib.constants.BROTLI_PARAM_QUALITY]: zlib.constants.BROTLI_MAX_QUALITY,
+      [zlib.constants.BROTLI_PARAM_SIZE_HINT]: data.length,
+    },
+  });
+  // Only keep variants that are actually smaller
+  if (gz.length < data.length) {
+    fs.writeFileSync(`${file}.gz`, gz);
+  }
+  if (br.length < data.length) {
+    fs.writeFileSync(`${file}.br`, br);
+  }
+  original += data.length;
+  gzipped += Math.min(gz.length, data.length);
+  brotlied += Math.min(br.length, data.length);
+}
+
+const kib = (bytes) => `${(bytes / 1024).toFixed(0)} KiB`;
+console.log(`Precompressed ${kib(original)}: gzip ${kib(gzipped)}, brotli ${kib(brotlied)}`);
@@ -1,6 +1,7 @@
 import React, { useState } from 'react';
 import axios from 'axios';
 import { useTranslation } from 'react-i18next';
+import { downscaleImage, uploadFileResumable } from './uploads';
 
 function AddPropertyForm() {
   const { t,i18n } = useTranslation('common'); 
@@ -26,6 +27,8 @@ function AddPropertyForm() {
   const [message, setMessage] = useState('');
   const [error, setError] = useState('');
   const [photoPreviews, setPhotoPreviews] = useState([]);
+  const [uploadIds, setUploadIds] = useState([]);
+  const [uploadProgress, setUploadProgress] = useState(null);
 
   const handleChange = (e) => {
     const { name, value } = e.target;
@@ -35,9 +38,10 @@ function AddPropertyForm() {
     }));
   };
 
-  const handlePhotoChange = (e) => {
-    const selectedFiles = Array.from(e.target.files);
+  const handlePhotoChange = async (e) => {
+    const selectedFiles = await Promise.all(Array.from(e.target.files).map(downscaleImage));
     setPhotos(selectedFiles);
+    setUploadIds(selectedFiles.map(() => null));
     const newPreviews = selectedFiles.map(file => URL.createObjectURL(file));
     setPhotoPreviews(newPreviews);
   };
@@ -51,6 +55,26 @@ function AddPropertyForm() {
     
     setPhotos(updatedFiles);
     setPhotoPreviews(updatedPreviews);
+    setUploadIds(uploadIds.filter((_, index) => index !== indexToRemove));
+  };
+
+  const uploadPhotos = async () => {
+    const ids = [...uploadIds];
+    const totalBytes = photos.reduce((sum, file) => sum + file.size, 0);
+    let doneBytes = 0;
+    for (let index = 0; index < photos.length; index++) {
+      const file = photos[index];
+      ids[index] = await uploadFileResumable(file, {
+        uploadId: ids[index],
+        onSessionCreated: (uploadId) => {
+          ids[index] = uploadId;
+          setUploadIds([...ids]);
+        },
+        onProgress: (fraction) => setUploadProgress(Math.round(100 * (doneBytes + fraction * file.size) / totalBytes)),
+      });
+      doneBytes += file.size;
+    }
+    return ids;
   };
 
   const handleSubmit = async (e) => {
@@ -71,11 +95,12 @@ function AddPropertyForm() {
       }
       data.append(key, value);
     }
-    photos.forEach((photo) => {
-      data.append('photos', photo);
-    });
-
     try {
+      const finishedUploadIds = await uploadPhotos();
+      finishedUploadIds.forEach((uploadId) => {
+        data.append('upload_ids', uploadId);
+      });
+
        await axios.post('http://localhost:5000/properties', data, {
         headers: {
           'Content-Type': 'multipart/form-data',
@@ -102,9 +127,12 @@ function AddPropertyForm() {
       });
       setPhotos([]);
       setPhotoPreviews([]);
+      setUploadIds([]);
     } catch (err) {
       console.error('Error adding property:', err.response ? err.response.data : err.message);
       setError(err.response ? err.response.data.error : t('failed_to_add_property')); 
+    } finally {
+      setUploadProgress(null);
     }
   };
 
@@ -113,6 +141,7 @@ function AddPropertyForm() {
       <h2>{t('add_new_property')}</h2>
       {message && <p className="success-message">{message}</p>}
       {error && <p className="error-message">{error}</p>}
+      {uploadProgress !== null && <p className="upload-progress">{t('uploading_media')}: {uploadProgress}%</p>}
       <form onSubmit={handleSubmit}>
         <div className="form-group">
           <label>{t('type')}:</label>
@@ -1,7 +1,30 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import axios from 'axios';
 import { useTranslation } from 'react-i18next'; 
 
+const containsText = (value, text) => (value || '').toLowerCase().includes(text.trim().toLowerCase());
+
+const featureList = (text) =>
+  (text || '').split(/[,;\n|]/).map(feature => feature.trim().toLowerCase()).filter(Boolean);
+
+// The numeric and type filters, which the client evaluates exactly as the server does
+function matchesRangeFilters(property, filters) {
+  const atLeast = (value, bound) => bound === '' || (value != null && value >= Number(bound));
+  const atMost = (value, bound) => bound === '' || (value != null && value <= Number(bound));
+  return (!filters.property_type || property.property_type === filters.property_type) &&
+    atLeast(property.price, filters.min_price) && atMost(property.price, filters.max_price) &&
+    atLeast(property.bedrooms, filters.bedrooms) && atLeast(property.bathrooms, filters.bathrooms);
+}
+
+// Close to the server's filters; names typed in another script only match after a refetch
+function matchesFilters(property, filters) {
+  const features = featureList(property.features);
+  return filters.archived !== 'only' && matchesRangeFilters(property, filters) &&
+    (!filters.city || containsText(property.city, filters.city)) &&
+    (!filters.locality || containsText(property.locality, filters.locality)) &&
+    featureList(filters.features).every(feature => features.includes(feature));
+}
+
 function PropertyList() {
   const { t, i18n } = useTranslation('common'); 
 
@@ -12,6 +35,8 @@ function PropertyList() {
   const [modalOpen, setModalOpen] = useState(false);
   const [selectedProperty, setSelectedProperty] = useState(null);
   const [currentMediaIndex, setCurrentMediaIndex] = useState(0);
+  const [page, setPage] = useState(1);
+  const [hasMore, setHasMore] = useState(false);
   const [filters, setFilters] = useState({
     property_type: '',
     city: '',
@@ -22,20 +47,25 @@ function PropertyList() {
     max_area: '',
     bedrooms: '',
     bathrooms: '',
-    keyword: '',
+    features: '',
+    archived: '',
   });
 
-  const fetchProperties = useCallback(async () => {
-    setLoading(true);
+  const fetchProperties = useCallback(async (pageToLoad = 1) => {
+    setLoading(pageToLoad === 1);
     setError('');
     try {
-      const queryParams = new URLSearchParams(filters).toString();
-      const response = await axios.get(`http://localhost:5000/properties?${queryParams}`, {
+      const queryParams = new URLSearchParams({ ...filters, page: pageToLoad }).toString();
+      const response = await axios.get(`http://localhost:5000/properties/snapshot?${queryParams}`, {
         headers: {
           'Accept-Language': i18n.language, 
         }
       });
-      setProperties(response.data);
+      setProperties(prevProperties => 
+        pageToLoad === 1 ? response.data.properties : [...prevProperties, ...response.data.properties]
+      );
+      setPage(pageToLoad);
+      setHasMore(response.data.has_more);
     } catch (err) {
       console.error('Error fetching properties:', err.response ? err.response.data : err.message);
       setError(t('failed_to_fetch_properties')); 
@@ -48,6 +78,45 @@ function PropertyList() {
     fetchProperties();
   }, [fetchProperties]);
 
+  const filtersRef = useRef(filters);
+  useEffect(() => {
+    filtersRef.current = filters;
+  }, [filters]);
+
+  // Apply listing changes pushed by the server instead of re-polling the catalog. One
+  // connection for the page's lifetime: the browser resumes it with Last-Event-ID after a
+  // drop, and filters are applied here rather than by reconnecting.
+  useEffect(() => {
+    const source = new EventSource('http://localhost:5000/events');
+    source.addEventListener('created', (e) => {
+      const change = JSON.parse(e.data);
+      if (change.property && matchesFilters(change.property, filtersRef.current)) {
+        setProperties(prevProperties => 
+          prevProperties.some(property => property.id === change.property_id) ? prevProperties : [change.property, ...prevProperties]
+        );
+      }
+    });
+    source.addEventListener('updated', (e) => {
+      const change = JSON.parse(e.data);
+      if (change.property) {
+        const stillMatches = matchesRangeFilters(change.property, filtersRef.current);
+        setProperties(prevProperties => stillMatches
+          ? prevProperties.map(property => property.id === change.property_id ? change.property : property)
+          : prevProperties.filter(property => property.id !== change.property_id)
+        );
+      }
+    });
+    const removeProperty = (e) => {
+      const change = JSON.parse(e.data);
+      setProperties(prevProperties => 
+        prevProperties.filter(property => property.id !== change.property_id)
+      );
+    };
+    source.addEventListener('deleted', removeProperty);
+    source.addEventListener('archived', removeProperty);
+    return () => source.close();
+  }, []);
+
   const handleFilterChange = (e) => {
     const { name, value } = e.target;
     setFilters((prevFilters) => ({
@@ -72,10 +141,15 @@ function PropertyList() {
       max_area: '',
       bedrooms: '',
       bathrooms: '',
-      keyword: '',
+      features: '',
+      archived: '',
     });
   };
 
+  const loadMore = () => {
+    fetchProperties(page + 1);
+  };
+
   const handleDeleteProperty = async (propertyId) => {
     const confirmDelete = window.confirm(t('confirm_delete_property'));
     if (!confirmDelete) return;
@@ -152,10 +226,10 @@ function PropertyList() {
     } else {
       return (
         <img 
-          src={photo.image_url} 
+          src={(photo.variants && photo.variants.medium) || photo.image_url} 
           alt={`Property media ${currentMediaIndex + 1}`}
           className="gallery-media"
-          style={{ maxWidth: '100%', maxHeight: '80vh', objectFit: 'contain' }}
+          style={{ maxWidth: '100%', maxHeight: '80vh', objectFit: 'contain', backgroundImage: photo.placeholder ? `url(${photo.placeholder})` : undefined, backgroundSize: 'cover' }}
         />
       );
     }
@@ -211,7 +285,16 @@ function PropertyList() {
 
         <div className="filter-group">
           <label>{t('keyword')}:</label>
-          <input type="text" name="keyword" value={filters.keyword} onChange={handleFilterChange} placeholder={t('features_placeholder')} />
+          <input type="text" name="features" value={filters.features} onChange={handleFilterChange} placeholder={t('features_placeholder')} />
+        </div>
+
+        <div className="filter-group">
+          <label>{t('archived_listings')}:</label>
+          <select name="archived" value={filters.archived} onChange={handleFilterChange}>
+            <option value="">{t('hide_archived')}</option>
+            <option value="include">{t('include_archived')}</option>
+            <option value="only">{t('only_archived')}</option>
+          </select>
         </div>
 
         <div className="filter-actions">
@@ -231,11 +314,16 @@ function PropertyList() {
           {properties.map((property) => (
             <div key={property.id} className="property-card">
               <img
-                src={(property.photos && property.photos.length > 0 ? property.photos[0].image_url : null) || `https://via.placeholder.com/300x200?text=${t('no_image')}`}
+                src={(property.photos && property.photos.length > 0 ? (property.photos[0].variants.thumb || property.photos[0].image_url) : null) || `https://via.placeholder.com/300x200?text=${t('no_image')}`}
                 alt={property.address}
                 className="property-image"
+                loading="lazy"
                 onClick={() => property.photos && property.photos.length > 0 && openGallery(property)}
-                style={{ cursor: property.photos && property.photos.length > 0 ? 'pointer' : 'default' }}
+                style={{
+                  cursor: property.photos && property.photos.length > 0 ? 'pointer' : 'default',
+                  backgroundImage: property.photos && property.photos.length > 0 && property.photos[0].placeholder ? `url(${property.photos[0].placeholder})` : undefined,
+                  backgroundSize: 'cover',
+                }}
               />
               <h3>{t(property.property_type.toLowerCase())} - {property.address}, {property.city}</h3>
               <p><strong>{t('price_label')}:</strong> ₹{property.price.toLocaleString('en-IN')}</p>
@@ -261,6 +349,10 @@ function PropertyList() {
         </div>
       )}
 
+      {!loading && hasMore && (
+        <button type="button" onClick={loadMore} className="load-more-button">{t('load_more')}</button>
+      )}
+
       {/* Modal Gallery */}
       {modalOpen && selectedProperty && (
         <div className="gallery-modal" onClick={closeGallery}>
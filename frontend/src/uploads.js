@@ -0,0 +1,117 @@
+import axios from 'axios';
+
+const API_URL = 'http://localhost:5000';
+const MAX_IMAGE_DIMENSION = 1920;
+const IMAGE_QUALITY = 0.82;
+const MAX_CHUNK_ATTEMPTS = 5;
+
+const loadImage = (file) => new Promise((resolve, reject) => {
+  const url = URL.createObjectURL(file);
+  const image = new Image();
+  image.onload = () => {
+    URL.revokeObjectURL(url);
+    resolve(image);
+  };
+  image.onerror = (err) => {
+    URL.revokeObjectURL(url);
+    reject(err);
+  };
+  image.src = url;
+});
+
+const ALPHA_TYPES = ['image/png', 'image/webp'];
+
+const hasTransparency = (context, width, height) => {
+  const { data } = context.getImageData(0, 0, width, height);
+  for (let i = 3; i < data.length; i += 4) {
+    if (data[i] < 255) {
+      return true;
+    }
+  }
+  return false;
+};
+
+// Re-encode photos larger than MAX_IMAGE_DIMENSION, scaled down to fit it: as JPEG,
+// or as PNG when the image has transparency. Smaller images, videos, GIFs and anything
+// that would not get smaller are sent unchanged.
+export const downscaleImage = async (file) => {
+  if (!file.type.startsWith('image/') || file.type === 'image/gif') {
+    return file;
+  }
+  try {
+    const image = await loadImage(file);
+    const scale = Math.min(1, MAX_IMAGE_DIMENSION / Math.max(image.width, image.height));
+    if (scale === 1) {
+      return file;
+    }
+    const canvas = document.createElement('canvas');
+    canvas.width = Math.round(image.width * scale);
+    canvas.height = Math.round(image.height * scale);
+    const context = canvas.getContext('2d');
+    context.drawImage(image, 0, 0, canvas.width, canvas.height);
+    const keepAlpha = ALPHA_TYPES.includes(file.type) && hasTransparency(context, canvas.width, canvas.height);
+    const type = keepAlpha ? 'image/png' : 'image/jpeg';
+    const blob = await new Promise(resolve => canvas.toBlob(resolve, type, IMAGE_QUALITY));
+    if (!blob || blob.size >= file.size) {
+      return file;
+    }
+    return new File([blob], file.name.replace(/\.[^.]+$/, '') + (keepAlpha ? '.png' : '.jpg'), { type });
+  } catch (err) {
+    console.error('Error downscaling image:', err);
+    return file;
+  }
+};
+
+const wait = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+const putChunk = async (uploadId, index, chunk) => {
+  for (let attempt = 1; ; attempt++) {
+    try {
+      await axios.put(`${API_URL}/uploads/${uploadId}/chunks/${index}`, chunk, {
+        headers: { 'Content-Type': 'application/octet-stream' },
+      });
+      return;
+    } catch (err) {
+      const status = err.response && err.response.status;
+      if (attempt >= MAX_CHUNK_ATTEMPTS || (status && status < 500 && status !== 429)) {
+        throw err;
+      }
+      // 429/503 from admission control say how long to back off
+      const retryAfter = Number(err.response && err.response.headers['retry-after']);
+      await wait(retryAfter ? retryAfter * 1000 : 500 * 2 ** attempt);
+    }
+  }
+};
+
+// Upload a file through an upload session, one chunk at a time. Chunks the
+// server already has are skipped, so calling this again with the same
+// uploadId after a dropped connection only resends what is missing.
+export const uploadFileResumable = async (file, { uploadId, onSessionCreated, onProgress } = {}) => {
+  let session;
+  if (uploadId) {
+    session = (await axios.get(`${API_URL}/uploads/${uploadId}`)).data;
+  } else {
+    session = (await axios.post(`${API_URL}/uploads`, {
+      filename: file.name,
+      mimetype: file.type || 'application/octet-stream',
+      size: file.size,
+    })).data;
+    if (onSessionCreated) {
+      onSessionCreated(session.upload_id);
+    }
+  }
+
+  const received = new Set(session.received_chunks);
+  for (let index = 0; index < session.chunk_count; index++) {
+    if (!received.has(index)) {
+      const start = index * session.chunk_size;
+      await putChunk(session.upload_id, index, file.slice(start, start + session.chunk_size));
+    }
+    if (onProgress) {
+      onProgress(Math.min(file.size, (index + 1) * session.chunk_size) / file.size);
+    }
+  }
+
+  await axios.post(`${API_URL}/uploads/${session.upload_id}/finalize`);
+  return session.upload_id;
+};